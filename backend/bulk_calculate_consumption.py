@@ -40,6 +40,7 @@ async def main():
         if clear_existing == 'y':
             logger.info("Mevcut tüketim kayıtları siliniyor...")
             result = await db.customer_consumption.delete_many({})
+            await db.consumption_baselines.delete_many({})
             logger.info(f"{result.deleted_count} kayıt silindi")
         
         # Consumption service oluştur
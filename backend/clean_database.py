@@ -65,6 +65,8 @@ async def clean_database():
     
     result = await db.customer_consumption.delete_many({})
     logger.info(f"   ✅ {result.deleted_count} tüketim kaydı silindi")
+    await db.consumption_baselines.delete_many({})
+    await db.invoice_purchases.delete_many({})
     
     # 5. PERİYODİK TÜKETİM KAYITLARI - Tümünü sil
     logger.info("\n5. Periyodik tüketim kayıtları temizleniyor...")
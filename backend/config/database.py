@@ -1,24 +1,169 @@
+from typing import Any, Dict, Optional
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from .settings import settings
 
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Bağlantı havuzu olaylarından kullanımdaki / bekleyen bağlantı sayaçları"""
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.wait_queue = 0
+        self.max_wait_queue = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_check_out_started(self, event):
+        self.wait_queue += 1
+        self.max_wait_queue = max(self.max_wait_queue, self.wait_queue)
+
+    def connection_check_out_failed(self, event):
+        self.wait_queue -= 1
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.wait_queue -= 1
+        self.checked_out += 1
+        self.checkouts += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+
 class Database:
+    """
+    Uygulama genelinde tek MongoDB istemcisi.
+
+    Havuz ayarları (MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS, MONGO_COMPRESSORS, MONGO_READ_PREFERENCE)
+    Settings'ten okunur. Route'lar, servisler ve script'ler kendi
+    istemcilerini oluşturmak yerine get_client() / db kullanır.
+    """
     client: AsyncIOMotorClient = None
-    
+    pool_listener: PoolMetricsListener = None
+
+    @classmethod
+    def client_options(cls) -> Dict[str, Any]:
+        options = {
+            "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+            "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+            "readPreference": settings.MONGO_READ_PREFERENCE,
+        }
+        if settings.MONGO_MAX_IDLE_TIME_MS:
+            options["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+        if settings.MONGO_COMPRESSORS:
+            options["compressors"] = settings.MONGO_COMPRESSORS
+        return options
+
     @classmethod
     def get_client(cls) -> AsyncIOMotorClient:
         if cls.client is None:
-            cls.client = AsyncIOMotorClient(settings.MONGO_URL)
+            cls.pool_listener = PoolMetricsListener()
+            cls.client = AsyncIOMotorClient(
+                settings.MONGO_URL,
+                event_listeners=[cls.pool_listener],
+                **cls.client_options()
+            )
         return cls.client
-    
+
     @classmethod
     def get_database(cls):
         client = cls.get_client()
         return client[settings.DB_NAME]
-    
+
+    @classmethod
+    def lazy_database(cls, name: str) -> "_LazyDatabase":
+        """DB_NAME dışındaki bir veritabanı için db gibi istemciyi izleyen referans"""
+        return _LazyDatabase(name)
+
+    @classmethod
+    async def connect(cls) -> None:
+        """Uygulama açılışında bağlantıyı doğrula (havuz minPoolSize'a ısınır)"""
+        await cls.get_client().admin.command("ping")
+
     @classmethod
     def close_connection(cls):
         if cls.client:
             cls.client.close()
             cls.client = None
 
-db = Database.get_database()
+    @classmethod
+    def pool_metrics(cls) -> Dict[str, Any]:
+        """Bağlantı havuzu ayarları ve anlık kullanım"""
+        listener = cls.pool_listener
+        metrics = {
+            "connected": cls.client is not None,
+            "max_pool_size": settings.MONGO_MAX_POOL_SIZE,
+            "min_pool_size": settings.MONGO_MIN_POOL_SIZE,
+            "max_idle_time_ms": settings.MONGO_MAX_IDLE_TIME_MS,
+            "compressors": settings.MONGO_COMPRESSORS,
+            "read_preference": settings.MONGO_READ_PREFERENCE,
+        }
+        if listener is not None:
+            metrics.update({
+                "open_connections": listener.open,
+                "checked_out": listener.checked_out,
+                "wait_queue": listener.wait_queue,
+                "max_wait_queue": listener.max_wait_queue,
+                "checkouts": listener.checkouts,
+                "checkout_failures": listener.checkout_failures,
+                "pool_clears": listener.pool_clears,
+            })
+        return metrics
+
+
+class _LazyDatabase:
+    """
+    Modül düzeyindeki db: her erişimde Database'in güncel istemcisine yönlenir.
+
+    name verilmezse settings.DB_NAME kullanılır.
+
+    close_connection() istemciyi kapatıp sıfırladığında (lifespan kapanışı,
+    birden fazla komut çalıştıran script'ler) import edilmiş db referansları
+    kapalı istemcide kalmaz; sonraki kullanım yeni istemciyi açar.
+    """
+
+    def __init__(self, name: Optional[str] = None):
+        self._name = name or settings.DB_NAME
+        self._client = None
+        self._database = None
+
+    def _resolve(self):
+        client = Database.get_client()
+        if client is not self._client:
+            self._client, self._database = client, client[self._name]
+        return self._database
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, name):
+        return self._resolve()[name]
+
+
+db = _LazyDatabase()
@@ -15,6 +15,13 @@ class Settings:
     MONGO_URL: str = os.environ['MONGO_URL']
     DB_NAME: str = os.environ['DB_NAME']
     
+    # Connection pool (config.database.Database tek istemcisi için)
+    MONGO_MAX_POOL_SIZE: int = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+    MONGO_MIN_POOL_SIZE: int = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+    MONGO_MAX_IDLE_TIME_MS: int = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '0'))  # 0: sınırsız
+    MONGO_COMPRESSORS: str = os.environ.get('MONGO_COMPRESSORS', '')  # ör. "zstd,snappy,zlib"
+    MONGO_READ_PREFERENCE: str = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+    
     # Security
     SECRET_KEY: str = os.environ.get('SECRET_KEY', secrets.token_urlsafe(32))
     ALGORITHM: str = "HS256"
@@ -35,5 +42,16 @@ class Settings:
     PASSWORD_REQUIRE_LOWERCASE: bool = True
     PASSWORD_REQUIRE_DIGIT: bool = True
     PASSWORD_REQUIRE_SPECIAL: bool = False
+    
+    # bcrypt hash / doğrulama için ayrılmış thread havuzu boyutu
+    PASSWORD_HASH_WORKERS: int = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+    
+    # Authenticated user cache (kullanıcı id + token iat)
+    USER_CACHE_SIZE: int = int(os.environ.get('USER_CACHE_SIZE', '1024'))
+    USER_CACHE_TTL_SECONDS: float = float(os.environ.get('USER_CACHE_TTL_SECONDS', '60'))
+    
+    # ŞEFTALİ
+    # Müşteri kartı özetleri sf_customer_summary koleksiyonundan okunur
+    CUSTOMER_SUMMARY_MATERIALIZED: bool = os.environ.get('CUSTOMER_SUMMARY_MATERIALIZED', 'False') == 'True'
 
 settings = Settings()
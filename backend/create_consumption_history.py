@@ -148,6 +148,10 @@ async def create_consumption_history():
     # Önce mevcut tüketim kayıtlarını temizle
     deleted_count = await db.customer_consumption.delete_many({"customer_id": customer_id})
     print(f"   🗑️  {deleted_count.deleted_count} eski tüketim kaydı silindi")
+    # Artımlı güncellenen beklenen tüketim ve alım indeksi silinen/eklenen
+    # faturalara göre bayat kalmasın (alım indeksi ilk hesaplamada yeniden kurulur)
+    await db.consumption_baselines.delete_many({"customer_id": customer_id})
+    await db.invoice_purchases.delete_many({"customer_id": customer_id})
     
     # Faturaları tarih sırasına göre al
     invoices = await db.invoices.find(
@@ -69,6 +69,10 @@ async def create_weekly_consumption():
     # 4. Eski tüketim kayıtlarını temizle
     deleted_consumption = await db.customer_consumption.delete_many({"customer_id": customer_id})
     print(f"   Silinen tüketim kaydı: {deleted_consumption.deleted_count}")
+    # Artımlı güncellenen beklenen tüketim ve alım indeksi silinen faturalara
+    # göre bayat kalmasın (alım indeksi ilk hesaplamada yeniden kurulur)
+    await db.consumption_baselines.delete_many({"customer_id": customer_id})
+    await db.invoice_purchases.delete_many({"customer_id": customer_id})
     
     # 5. Eski periyodik kayıtları temizle
     deleted_periodic = await db.consumption_periods.delete_many({"customer_id": customer_id})
@@ -264,7 +264,7 @@ async def main():
             print(f"    {pn:40s} daily_avg={base_avg:.2f}")
 
     # ---- 5. Final draft'i goster ----
-    draft = await db.sf_system_drafts.find_one({"customer_id": customer_id}, {"_id": 0})
+    draft = await db.sf_system_drafts.find_one({"customer_id": customer_id}, {"_id": 0, "draft": 0})
     if draft:
         print(f"\n{'='*60}")
         print(f"FINAL DRAFT - AILEM MARKET")
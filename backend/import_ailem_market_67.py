@@ -130,7 +130,7 @@ async def main():
             print(f"    {pn:40s} daily_avg={ba:.2f}")
 
     # Final draft
-    draft = await db.sf_system_drafts.find_one({"customer_id": cid}, {"_id": 0})
+    draft = await db.sf_system_drafts.find_one({"customer_id": cid}, {"_id": 0, "draft": 0})
     if draft:
         print(f"\n{'='*60}")
         print("FINAL DRAFT - 7 FATURA SONRASI")
@@ -6,6 +6,7 @@ from models.user import User, UserRole
 from config.settings import settings
 from config.database import db
 from datetime import datetime
+from utils.user_cache import user_cache
 
 security = HTTPBearer()
 
@@ -22,6 +23,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
+    # Aynı token ile gelen istekler önbellekteki kullanıcıyı kullanır
+    iat = payload.get("iat")
+    cached = user_cache.get(user_id, iat)
+    if isinstance(cached, User):
+        return cached
+    
     user_doc = await db.users.find_one({"id": user_id}, {"_id": 0})
     if user_doc is None:
         raise HTTPException(status_code=401, detail="User not found")
@@ -30,7 +37,9 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     if isinstance(user_doc.get('created_at'), str):
         user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
     
-    return User(**user_doc)
+    user = User(**user_doc)
+    user_cache.put(user_id, iat, user)
+    return user
 
 def require_role(allowed_roles: List[UserRole]):
     """Dependency to check if user has required role"""
@@ -33,6 +33,13 @@ class CustomerConsumption(BaseModel):
     expected_consumption: float = 0.0  # Beklenen tüketim (önceki ortalamalara göre)
     deviation_rate: float = 0.0  # Sapma oranı: (gerçek - beklenen) / beklenen * 100
     
+    # Periyot anahtarları (target_invoice_date'ten; çözülemezse None)
+    target_date_iso: Optional[str] = None  # "YYYY-MM-DD"
+    target_year: Optional[int] = None
+    target_month: Optional[int] = None
+    target_iso_year: Optional[int] = None  # ISO hafta yılı
+    target_iso_week: Optional[int] = None  # ISO hafta: 1-52/53
+    
     # Metadata
     can_calculate: bool = True  # False ise ilk fatura
     notes: Optional[str] = None
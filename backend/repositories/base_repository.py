@@ -6,8 +6,7 @@ CRUD operasyonları için generic implementasyon sağlar.
 """
 
 from typing import Dict, List, Optional, Any
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-import os
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
 
 class BaseRepository:
@@ -89,8 +88,6 @@ class BaseRepository:
 
 
 def get_database() -> AsyncIOMotorDatabase:
-    """Get MongoDB database instance"""
-    mongo_url = os.environ['MONGO_URL']
-    db_name = os.environ['DB_NAME']
-    client = AsyncIOMotorClient(mongo_url)
-    return client[db_name]
+    """Get MongoDB database instance (paylaşılan istemci)"""
+    from config.database import Database
+    return Database.get_database()
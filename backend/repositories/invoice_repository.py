@@ -6,6 +6,7 @@ Fatura ile ilgili tüm database operasyonları.
 
 from typing import Dict, List, Optional
 from repositories.base_repository import BaseRepository, AsyncIOMotorDatabase
+from utils.helpers import normalize_invoice_date
 
 
 class InvoiceRepository(BaseRepository):
@@ -45,6 +46,8 @@ class InvoiceRepository(BaseRepository):
     async def create_invoice(self, invoice_data: Dict) -> str:
         """Create new invoice"""
         invoice_data["is_active"] = True
+        # Sıralanabilir tarih (önceki alım sorguları için)
+        invoice_data["invoice_date_iso"] = normalize_invoice_date(invoice_data.get("invoice_date"))
         return await self.insert_one(invoice_data)
     
     async def get_latest_invoice_for_customer(self, customer_id: str) -> Optional[Dict]:
@@ -58,4 +61,6 @@ class InvoiceRepository(BaseRepository):
     
     async def soft_delete_invoice(self, invoice_id: str) -> bool:
         """Soft delete invoice"""
+        # Silinen faturanın alımları önceki alım aramalarında görünmemeli
+        await self.db.invoice_purchases.delete_many({"invoice_id": invoice_id})
         return await self.update_one({"id": invoice_id}, {"is_active": False})
@@ -3,22 +3,16 @@ from typing import Dict, List
 from datetime import datetime
 from models.user import User, UserCreate, UserLogin, UserRole
 from utils.auth import (
-    hash_password, 
-    verify_password, 
+    hash_password_async,
+    verify_password_async,
     create_access_token,
     get_current_user,
     require_role
 )
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from config.database import db
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 @router.post("/register", response_model=Dict[str, str])
 async def register(user_input: UserCreate):
     # Check if username exists
@@ -29,7 +23,7 @@ async def register(user_input: UserCreate):
     # Create user
     user_dict = user_input.model_dump()
     password = user_dict.pop("password")
-    user_dict["password_hash"] = hash_password(password)
+    user_dict["password_hash"] = await hash_password_async(password)
     
     user_obj = User(**user_dict)
     doc = user_obj.model_dump()
@@ -65,7 +59,7 @@ async def create_user(
     # Create user
     user_dict = user_input.model_dump()
     password = user_dict.pop("password")
-    user_dict["password_hash"] = hash_password(password)
+    user_dict["password_hash"] = await hash_password_async(password)
     
     user_obj = User(**user_dict)
     doc = user_obj.model_dump()
@@ -88,7 +82,7 @@ async def login(credentials: UserLogin):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
     # Verify password
-    if not verify_password(credentials.password, user_doc["password_hash"]):
+    if not await verify_password_async(credentials.password, user_doc["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
     # Check if active
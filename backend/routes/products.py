@@ -6,6 +6,7 @@ from models.product import Product
 from schemas.product import ProductCreate
 from middleware.auth import get_current_user, require_role
 from config.database import db
+from services.seftali.product_catalog import ProductCatalog
 
 router = APIRouter(prefix="/products")
 
@@ -19,6 +20,7 @@ async def create_product(
     doc['created_at'] = doc['created_at'].isoformat()
     
     await db.products.insert_one(doc)
+    ProductCatalog.invalidate()
     
     # Initialize inventory
     inventory_obj = Inventory(product_id=product_obj.id)
@@ -39,19 +41,18 @@ async def get_products(
     - active_only: Sadece aktif ürünler (is_active=True)
     - in_stock_only: Sadece stokta olanlar (stock_quantity > 0)
     """
-    query = {}
+    products = await ProductCatalog.all()
     
     # Admin ve warehouse manager tüm ürünleri görebilir
-    if current_user.role not in [UserRole.ADMIN, UserRole.WAREHOUSE_MANAGER]:
-        query["is_active"] = True
-    elif active_only:
-        query["is_active"] = True
+    if current_user.role not in [UserRole.ADMIN, UserRole.WAREHOUSE_MANAGER] or active_only:
+        products = [p for p in products if p.get("is_active") is True]
     
     # Stok filtresi
     if in_stock_only:
-        query["stock_quantity"] = {"$gt": 0}
-    
-    products = await db.products.find(query, {"_id": 0}).to_list(1000)
+        products = [
+            p for p in products
+            if isinstance(p.get("stock_quantity"), (int, float)) and p["stock_quantity"] > 0
+        ]
     
     from datetime import datetime
     for product in products:
@@ -62,7 +63,7 @@ async def get_products(
 
 @router.get("/{product_id}", response_model=Product)
 async def get_product(product_id: str, current_user: User = Depends(get_current_user)):
-    product = await db.products.find_one({"id": product_id}, {"_id": 0})
+    product = await ProductCatalog.get(product_id, key="id")
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
@@ -114,6 +115,7 @@ async def update_product(
         {"id": product_id},
         {"$set": update_fields}
     )
+    ProductCatalog.invalidate()
     
     if result.modified_count == 0:
         # Kayıt bulundu ama değişiklik yapılmadı (aynı değerler)
@@ -143,5 +145,6 @@ async def delete_product(
         {"id": product_id},
         {"$set": {"is_active": False}}
     )
+    ProductCatalog.invalidate()
     
     return {"message": "Product deleted successfully"}
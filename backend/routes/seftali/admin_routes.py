@@ -2,10 +2,15 @@ from fastapi import APIRouter, Depends, Query
 from typing import Optional, List
 from models.user import UserRole
 from utils.auth import require_role
-from config.database import db
+from config.database import db, Database
 from services.seftali.core import (
     COL_DELIVERIES, COL_CUSTOMERS, COL_PRODUCTS, COL_VARIANCE_EVENTS, COL_WAREHOUSE_STOCK, std_resp
 )
+from services.seftali.draft_engine import DraftEngine
+from services.seftali.draft_queue import DraftQueue
+from services.seftali.delivery_acceptance import DeliveryAcceptance
+from services.seftali.enrichment import LookupCache
+from services.seftali.product_catalog import ProductCatalog
 
 router = APIRouter(prefix="/admin", tags=["Seftali-Admin"])
 
@@ -29,6 +34,51 @@ async def health_summary(current_user=Depends(require_role([UserRole.ADMIN]))):
     })
 
 
+# ===========================
+# 1b. GET /health/draft-queue
+# ===========================
+@router.get("/health/draft-queue")
+async def draft_queue_metrics(current_user=Depends(require_role([UserRole.ADMIN]))):
+    """Draft yenileme kuyruğu derinliği ve gecikme metrikleri"""
+    return std_resp(True, DraftQueue.metrics())
+
+
+# ===========================
+# 1b2. GET /health/delivery-accept
+# ===========================
+@router.get("/health/delivery-accept")
+async def delivery_accept_metrics(current_user=Depends(require_role([UserRole.ADMIN]))):
+    """Teslimat onayı outbox sayaçları (tamamlanan / kurtarılan / hatalı)"""
+    return std_resp(True, DeliveryAcceptance.metrics())
+
+
+# ===========================
+# 1c. GET /health/product-cache
+# ===========================
+@router.get("/health/product-cache")
+async def product_cache_metrics(current_user=Depends(require_role([UserRole.ADMIN]))):
+    """Ürün kataloğu önbelleği boyutu ve hit / miss sayaçları"""
+    return std_resp(True, ProductCatalog.metrics())
+
+
+# ===========================
+# 1d. GET /health/draft-reads
+# ===========================
+@router.get("/health/draft-reads")
+async def draft_read_metrics(current_user=Depends(require_role([UserRole.ADMIN]))):
+    """GET /customer/draft: kayıtlı draft'tan dönen / yeniden hesaplanan okumalar"""
+    return std_resp(True, DraftEngine.read_metrics())
+
+
+# ===========================
+# 1e. GET /health/db-pool
+# ===========================
+@router.get("/health/db-pool")
+async def db_pool_metrics(current_user=Depends(require_role([UserRole.ADMIN]))):
+    """MongoDB bağlantı havuzu ayarları, kullanımdaki ve bekleyen bağlantılar"""
+    return std_resp(True, Database.pool_metrics())
+
+
 # ===========================
 # 2. GET /variance
 # ===========================
@@ -54,13 +104,9 @@ async def list_variance(
 
     cursor = db[COL_VARIANCE_EVENTS].find(filt, {"_id": 0}).sort("detected_at", -1)
     items = await cursor.to_list(length=200)
-    for it in items:
-        c = await db[COL_CUSTOMERS].find_one({"id": it["customer_id"]}, {"_id": 0, "name": 1})
-        if c:
-            it["customer_name"] = c["name"]
-        p = await db[COL_PRODUCTS].find_one({"id": it["product_id"]}, {"_id": 0, "name": 1})
-        if p:
-            it["product_name"] = p["name"]
+    lookups = LookupCache()
+    await lookups.enrich(items, "customer_id", COL_CUSTOMERS, {"name": "customer_name"})
+    await lookups.enrich(items, "product_id", COL_PRODUCTS, {"name": "product_name"})
     return std_resp(True, items)
 
 
@@ -77,10 +123,7 @@ async def list_deliveries(
         filt["acceptance_status"] = status
     cursor = db[COL_DELIVERIES].find(filt, {"_id": 0}).sort("delivered_at", -1)
     items = await cursor.to_list(length=200)
-    for d in items:
-        c = await db[COL_CUSTOMERS].find_one({"id": d["customer_id"]}, {"_id": 0, "name": 1})
-        if c:
-            d["customer_name"] = c["name"]
+    await LookupCache().enrich(items, "customer_id", COL_CUSTOMERS, {"name": "customer_name"})
     return std_resp(True, items)
 
 
@@ -112,12 +155,10 @@ async def list_warehouse_orders(
     items = await cursor.to_list(length=100)
     
     # Enrich with product names
-    for order in items:
-        for it in order.get("items", []):
-            p = await db[COL_PRODUCTS].find_one({"id": it.get("product_id")}, {"_id": 0, "name": 1, "code": 1})
-            if p:
-                it["product_name"] = p.get("name", "")
-                it["product_code"] = p.get("code", "")
+    order_items = [it for order in items for it in order.get("items", [])]
+    await LookupCache().enrich(
+        order_items, "product_id", COL_PRODUCTS, {"name": "product_name", "code": "product_code"}
+    )
     
     return std_resp(True, items)
 
@@ -381,8 +422,7 @@ async def update_system_settings(
 @router.get("/products")
 async def list_products(current_user=Depends(require_role([UserRole.ADMIN]))):
     """Tüm ürünleri listele (Admin için)"""
-    cursor = db[COL_PRODUCTS].find({}, {"_id": 0}).sort("name", 1)
-    products = await cursor.to_list(length=500)
+    products = sorted(await ProductCatalog.all(), key=lambda p: p.get("name") or "")
     
     # SKT'yi string formatına çevir
     for prod in products:
@@ -399,7 +439,7 @@ async def list_products(current_user=Depends(require_role([UserRole.ADMIN]))):
 @router.get("/products/{product_id}")
 async def get_product(product_id: str, current_user=Depends(require_role([UserRole.ADMIN]))):
     """Tek bir ürün detayını getir"""
-    product = await db[COL_PRODUCTS].find_one({"product_id": product_id}, {"_id": 0})
+    product = await ProductCatalog.get(product_id)
     if not product:
         return std_resp(False, None, "Ürün bulunamadı")
     
@@ -480,6 +520,7 @@ async def update_product(
         {"product_id": product_id},
         {"$set": update_data}
     )
+    ProductCatalog.invalidate()
     
     # Güncellenmiş ürünü döndür
     updated = await db[COL_PRODUCTS].find_one({"product_id": product_id}, {"_id": 0})
@@ -543,12 +584,12 @@ async def list_warehouse_stock(
     items = await cursor.to_list(length=1000)
     
     # Ürün bilgilerini ekle
+    await LookupCache().enrich(
+        items, "product_id", COL_PRODUCTS,
+        {"name": "product_name", "category_id": "category_id"}, key="product_id"
+    )
+    
     for item in items:
-        product = await db[COL_PRODUCTS].find_one({"product_id": item["product_id"]}, {"_id": 0, "name": 1, "category_id": 1})
-        if product:
-            item["product_name"] = product.get("name", "")
-            item["category_id"] = product.get("category_id", "")
-        
         # Depo adını ekle
         depo = next((d for d in DEPOLAR if d["depo_no"] == item.get("depo_no")), None)
         if depo:
@@ -566,7 +607,7 @@ async def add_warehouse_stock(
     from services.seftali.core import now_utc, to_iso
     
     # Ürün kontrolü
-    product = await db[COL_PRODUCTS].find_one({"product_id": body.product_id})
+    product = await ProductCatalog.get(body.product_id)
     if not product:
         return std_resp(False, None, "Ürün bulunamadı")
     
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Header, Query, Response
 from typing import List, Optional
 from pydantic import BaseModel, field_validator
 from models.user import UserRole
@@ -6,11 +6,17 @@ from utils.auth import require_role
 from config.database import db
 from services.seftali.core import (
     gen_id, now_utc, to_iso, std_resp, get_product_by_id,
-    COL_CUSTOMERS, COL_PRODUCTS, COL_DELIVERIES, COL_ORDERS,
+    COL_CUSTOMERS, COL_DELIVERIES, COL_ORDERS,
     COL_SYSTEM_DRAFTS, COL_WORKING_COPIES, COL_STOCK_DECLARATIONS,
     COL_AUDIT_EVENTS, COL_VARIANCE_EVENTS
 )
 from services.seftali.draft_engine import DraftEngine
+from services.seftali.draft_queue import DraftQueue
+from services.seftali.delivery_acceptance import DeliveryAcceptance
+from services.seftali.variance_actions import VarianceActions
+from services.seftali.consumption_series import ConsumptionSeries
+from services.seftali.customer_summary import CustomerSummaryService
+from services.seftali.product_catalog import ProductCatalog
 
 router = APIRouter(prefix="/customer", tags=["Seftali-Customer"])
 
@@ -33,8 +39,8 @@ class DraftService:
     """Simplified draft service - logic moved to Draft Engine 2.0"""
     @classmethod
     async def update_draft_for_customer(cls, customer_id: str, product_ids: List[str], trigger: str):
-        """Trigger draft recalculation using Draft Engine 2.0"""
-        await DraftEngine.calculate(customer_id)
+        """Queue draft recalculation (Draft Engine 2.0, off the request path)"""
+        DraftQueue.mark_dirty(customer_id, trigger)
 
 
 class VarianceService:
@@ -69,6 +75,21 @@ async def _get_sf_customer(user):
     return c
 
 
+async def _raise_delivery_not_pending(customer_id: str, delivery_id: str, action: str):
+    """Koşullu onay / red eşleşmediğinde teslimatın durumuna göre hata ver."""
+    dlv = await db[COL_DELIVERIES].find_one(
+        {"id": delivery_id, "customer_id": customer_id}, {"_id": 0, "acceptance_status": 1}
+    )
+    if not dlv:
+        raise HTTPException(404, "Teslimat bulunamadi")
+    status = dlv.get("acceptance_status")
+    if status == "rejected":
+        raise HTTPException(409, "Teslimat zaten reddedilmis.")
+    if status == "accepted":
+        raise HTTPException(409, "Teslimat zaten onaylanmis.")
+    raise HTTPException(409, f"Teslimat bu durumda {action}: {status}")
+
+
 # ---------- schemas ----------
 class ItemQty(BaseModel):
     product_id: str
@@ -156,7 +177,11 @@ class BulkDismissBody(BaseModel):
 # ===========================
 
 @router.get("/draft")
-async def get_draft(current_user=Depends(require_role([UserRole.CUSTOMER]))):
+async def get_draft(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user=Depends(require_role([UserRole.CUSTOMER]))
+):
     """
     Müşteri için Draft Engine 2.0 ile hesaplanmış taslak siparişi getir.
     
@@ -171,43 +196,33 @@ async def get_draft(current_user=Depends(require_role([UserRole.CUSTOMER]))):
     """
     cust = await _get_sf_customer(current_user)
     
-    # Draft Engine 2.0 ile hesapla
-    draft = await DraftEngine.calculate(cust["id"])
+    # Draft girdileri (state / rota / çarpan) ve gün değişmediyse istemcinin
+    # kopyası geçerli; draft yüklenmeden 304 döner
+    etag = DraftEngine.etag(cust)
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    # Kayıtlı draft güncelse tek okuma, değilse Draft Engine 2.0 ile hesapla
+    draft = await DraftEngine.get_current(cust)
     
     if not draft or not draft.get("items"):
         # Fallback: eski draft'ı dene
-        old_draft = await db[COL_SYSTEM_DRAFTS].find_one({"customer_id": cust["id"]}, {"_id": 0})
+        old_draft = await db[COL_SYSTEM_DRAFTS].find_one({"customer_id": cust["id"]}, {"_id": 0, "draft": 0})
         if old_draft:
             return std_resp(True, old_draft, "Eski taslak (Draft Engine 2.0 verisi yok)")
         return std_resp(True, {"customer_id": cust["id"], "items": [], "generated_from": None}, "Henuz taslak yok")
     
-    # Her ürün için son teslimat miktarını enrich et
-    enriched_items = []
+    # Son onaylı teslimat miktarı state'te tutulur (onay anında yazılır);
+    # alanı olmayan eski state'ler bir kez tek pipeline ile doldurulur
+    await DraftEngine.fill_last_accepted(cust, draft)
+    
     for it in draft.get("items", []):
-        product_id = it["product_id"]
-        
-        # Bu ürünün son teslimat miktarını bul (accepted olanlardan)
-        pipeline = [
-            {
-                "$match": {
-                    "customer_id": cust["id"],
-                    "acceptance_status": "accepted",
-                    "items.product_id": product_id
-                }
-            },
-            {"$sort": {"delivered_at": -1}},
-            {"$limit": 1},
-            {"$unwind": "$items"},
-            {"$match": {"items.product_id": product_id}},
-            {"$project": {"qty": "$items.qty"}}
-        ]
-        
-        result = await db[COL_DELIVERIES].aggregate(pipeline).to_list(length=1)
-        it["last_delivery_qty"] = result[0]["qty"] if result else it.get("last_delivery_qty", 0)
-        
-        enriched_items.append(it)
+        if it.get("last_accepted_delivered_at") is not None:
+            it["last_delivery_qty"] = it["last_accepted_delivery_qty"]
+        else:
+            it["last_delivery_qty"] = it.get("last_delivery_qty", 0)
     
-    draft["items"] = enriched_items
     return std_resp(True, draft)
 
 
@@ -225,7 +240,7 @@ async def start_working_copy(current_user=Depends(require_role([UserRole.CUSTOME
     if active:
         return std_resp(True, active, "Mevcut calisma kopyasi")
 
-    draft = await db[COL_SYSTEM_DRAFTS].find_one({"customer_id": cid}, {"_id": 0})
+    draft = await db[COL_SYSTEM_DRAFTS].find_one({"customer_id": cid}, {"_id": 0, "draft": 0})
     wc_items = []
     if draft:
         for di in draft.get("items", []):
@@ -321,6 +336,7 @@ async def submit_working_copy(wc_id: str, current_user=Depends(require_role([Use
     }
     await db[COL_ORDERS].insert_one(order)
     order.pop("_id", None)
+    await CustomerSummaryService.refresh(cust["id"])
 
     await db[COL_WORKING_COPIES].update_one(
         {"id": wc_id}, {"$set": {"status": "submitted", "updated_at": to_iso(now_utc())}}
@@ -341,7 +357,7 @@ async def pending_deliveries(current_user=Depends(require_role([UserRole.CUSTOME
     # enrich product names
     for d in items:
         for it in d.get("items", []):
-            p = await get_product_by_id(db, it["product_id"])
+            p = await get_product_by_id(it["product_id"])
             if p:
                 it["product_name"] = p.get("name", "")
                 it["product_code"] = p.get("code", "")
@@ -356,46 +372,13 @@ async def accept_delivery(delivery_id: str, current_user=Depends(require_role([U
     cust = await _get_sf_customer(current_user)
     cid = cust["id"]
 
-    dlv = await db[COL_DELIVERIES].find_one({"id": delivery_id, "customer_id": cid}, {"_id": 0})
-    if not dlv:
-        raise HTTPException(404, "Teslimat bulunamadi")
-    if dlv["acceptance_status"] == "accepted":
-        raise HTTPException(409, "Teslimat zaten onaylanmis.")
-    if dlv["acceptance_status"] == "rejected":
-        raise HTTPException(409, "Teslimat zaten reddedilmis.")
-
-    now = now_utc()
-    # 1 - mark accepted
-    await db[COL_DELIVERIES].update_one(
-        {"id": delivery_id},
-        {"$set": {"acceptance_status": "accepted", "accepted_at": to_iso(now), "updated_at": to_iso(now)}},
-    )
-    dlv["accepted_at"] = now
-
-    # 2 - consumption
-    await ConsumptionService.apply_delivery_accepted(cid, dlv)
-
-    # 3 - draft
-    pids = [it["product_id"] for it in dlv["items"]]
-    await DraftService.update_draft_for_customer(cid, pids, "delivery_accept")
-
-    # 4 - kill active working copy
-    wc_deleted = False
-    active_wc = await db[COL_WORKING_COPIES].find_one({"customer_id": cid, "status": "active"}, {"_id": 0})
-    if active_wc:
-        await db[COL_WORKING_COPIES].update_one(
-            {"id": active_wc["id"]},
-            {"$set": {"status": "deleted_by_delivery", "updated_at": to_iso(now)}},
-        )
-        wc_deleted = True
+    # Koşullu durum değişimi + çalışma kopyası kapatma; özet, state, draft
+    # ve audit outbox ile arka planda tamamlanır
+    result = await DeliveryAcceptance.accept(cid, delivery_id, current_user.id)
+    if not result:
+        await _raise_delivery_not_pending(cid, delivery_id, "onaylanamaz")
 
-    # 5 - audit
-    await db[COL_AUDIT_EVENTS].insert_one({
-        "type": "delivery_accepted", "customer_id": cid, "delivery_id": delivery_id,
-        "performed_by": current_user.id, "at": to_iso(now),
-    })
-
-    return std_resp(True, {"delivery_id": delivery_id, "working_copy_deleted": wc_deleted},
+    return std_resp(True, {"delivery_id": delivery_id, "working_copy_deleted": result["working_copy_deleted"]},
                     "Teslimat onaylandi. Tuketim hesaplamalari guncellendi.")
 
 
@@ -405,20 +388,17 @@ async def accept_delivery(delivery_id: str, current_user=Depends(require_role([U
 @router.post("/deliveries/{delivery_id}/reject")
 async def reject_delivery(delivery_id: str, body: RejectBody = Body(default=RejectBody()), current_user=Depends(require_role([UserRole.CUSTOMER]))):
     cust = await _get_sf_customer(current_user)
-    dlv = await db[COL_DELIVERIES].find_one({"id": delivery_id, "customer_id": cust["id"]}, {"_id": 0})
-    if not dlv:
-        raise HTTPException(404, "Teslimat bulunamadi")
-    if dlv["acceptance_status"] == "rejected":
-        raise HTTPException(409, "Teslimat zaten reddedilmis.")
-    if dlv["acceptance_status"] == "accepted":
-        raise HTTPException(409, "Teslimat zaten onaylanmis.")
 
+    # Onayla aynı koşullu geçiş: yarışta önce onaylanan teslimat reddedilmez
     now = now_utc()
-    await db[COL_DELIVERIES].update_one(
-        {"id": delivery_id},
+    result = await db[COL_DELIVERIES].update_one(
+        {"id": delivery_id, "customer_id": cust["id"], "acceptance_status": "pending"},
         {"$set": {"acceptance_status": "rejected", "rejected_at": to_iso(now),
                   "rejection_reason": body.reason, "updated_at": to_iso(now)}},
     )
+    if not result.matched_count:
+        await _raise_delivery_not_pending(cust["id"], delivery_id, "reddedilemez")
+    await CustomerSummaryService.refresh(cust["id"])
     return std_resp(True, {"delivery_id": delivery_id}, "Teslimat reddedildi.")
 
 
@@ -476,7 +456,7 @@ async def pending_variance(current_user=Depends(require_role([UserRole.CUSTOMER]
     ).sort("detected_at", -1)
     items = await cursor.to_list(length=100)
     for it in items:
-        p = await get_product_by_id(db, it["product_id"])
+        p = await get_product_by_id(it["product_id"])
         if p:
             it["product_name"] = p.get("name", "")
     return std_resp(True, items)
@@ -488,26 +468,11 @@ async def pending_variance(current_user=Depends(require_role([UserRole.CUSTOMER]
 @router.post("/variance/apply-reason-bulk")
 async def apply_reason_bulk(body: BulkReasonBody, current_user=Depends(require_role([UserRole.CUSTOMER]))):
     cust = await _get_sf_customer(current_user)
-    now = now_utc()
-    modified = 0
-    for eid in body.event_ids:
-        ev = await db[COL_VARIANCE_EVENTS].find_one(
-            {"id": eid, "customer_id": cust["id"]}, {"_id": 0}
-        )
-        if not ev:
-            continue
-        if ev["status"] != "needs_reason":
-            continue
-        await db[COL_VARIANCE_EVENTS].update_one(
-            {"id": eid},
-            {"$set": {
-                "status": "recorded", "reason_code": body.reason_code,
-                "reason_note": body.reason_note, "customer_action_at": to_iso(now),
-                "updated_at": to_iso(now),
-            }},
-        )
-        modified += 1
-    return std_resp(True, {"modified": modified})
+    result = await VarianceActions.resolve_bulk(
+        cust["id"], body.event_ids, "recorded",
+        {"reason_code": body.reason_code, "reason_note": body.reason_note},
+    )
+    return std_resp(True, result)
 
 
 # ===========================
@@ -516,25 +481,10 @@ async def apply_reason_bulk(body: BulkReasonBody, current_user=Depends(require_r
 @router.post("/variance/dismiss-bulk")
 async def dismiss_bulk(body: BulkDismissBody, current_user=Depends(require_role([UserRole.CUSTOMER]))):
     cust = await _get_sf_customer(current_user)
-    now = now_utc()
-    modified = 0
-    for eid in body.event_ids:
-        ev = await db[COL_VARIANCE_EVENTS].find_one(
-            {"id": eid, "customer_id": cust["id"]}, {"_id": 0}
-        )
-        if not ev:
-            continue
-        if ev["status"] != "needs_reason":
-            continue
-        await db[COL_VARIANCE_EVENTS].update_one(
-            {"id": eid},
-            {"$set": {
-                "status": "dismissed", "reason_code": body.reason_code,
-                "customer_action_at": to_iso(now), "updated_at": to_iso(now),
-            }},
-        )
-        modified += 1
-    return std_resp(True, {"modified": modified})
+    result = await VarianceActions.resolve_bulk(
+        cust["id"], body.event_ids, "dismissed", {"reason_code": body.reason_code}
+    )
+    return std_resp(True, result)
 
 
 # ===========================
@@ -542,8 +492,7 @@ async def dismiss_bulk(body: BulkDismissBody, current_user=Depends(require_role(
 # ===========================
 @router.get("/products")
 async def list_products(current_user=Depends(require_role([UserRole.CUSTOMER]))):
-    cursor = db[COL_PRODUCTS].find({}, {"_id": 0})
-    items = await cursor.to_list(length=500)
+    items = await ProductCatalog.all()
     return std_resp(True, items)
 
 
@@ -569,7 +518,7 @@ async def delivery_history(current_user=Depends(require_role([UserRole.CUSTOMER]
     items = await cursor.to_list(length=500)
     for d in items:
         for it in d.get("items", []):
-            p = await get_product_by_id(db, it["product_id"])
+            p = await get_product_by_id(it["product_id"])
             if p:
                 it["product_name"] = p.get("name", "")
                 it["product_code"] = p.get("code", "")
@@ -584,9 +533,27 @@ async def daily_consumption(
     product_id: str = None,
     date_from: str = None,
     date_to: str = None,
+    bucket: Optional[str] = Query(None, description="day / week / month; verilirse sunucu tarafında gruplanır"),
+    cursor: Optional[str] = Query(None, description="Önceki sayfanın next_cursor değeri"),
+    limit: int = Query(ConsumptionSeries.DEFAULT_PAGE_SIZE, ge=1, le=ConsumptionSeries.MAX_PAGE_SIZE),
+    points: Optional[int] = Query(None, ge=3, description="LTTB ile en fazla bu kadar nokta"),
     current_user=Depends(require_role([UserRole.CUSTOMER]))
 ):
     cust = await _get_sf_customer(current_user)
+
+    # Gruplanmış, sayfalı seri: {"bucket", "points", "next_cursor", "source_points"}
+    if bucket or cursor or points:
+        try:
+            page = await ConsumptionSeries.get(
+                cust["id"], bucket=bucket or "day", product_id=product_id,
+                date_from=date_from, date_to=date_to,
+                cursor=cursor, limit=limit, points=points,
+            )
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        return std_resp(True, page)
+
+    # Ham günlük satırlar (eski yanıt biçimi, en fazla 5000 satır)
     query = {"customer_id": cust["id"]}
     if product_id:
         query["product_id"] = product_id
@@ -606,7 +573,7 @@ async def daily_consumption(
     for it in items:
         pid = it["product_id"]
         if pid not in prod_cache:
-            p = await get_product_by_id(db, pid)
+            p = await get_product_by_id(pid)
             prod_cache[pid] = p
         p = prod_cache.get(pid)
         if p:
@@ -639,7 +606,7 @@ async def daily_consumption_summary(current_user=Depends(require_role([UserRole.
 
     for r in results:
         r["product_id"] = r.pop("_id")
-        p = await get_product_by_id(db, r["product_id"])
+        p = await get_product_by_id(r["product_id"])
         if p:
             r["product_name"] = p.get("name", "")
             r["product_code"] = p.get("code", "")
@@ -10,6 +10,9 @@ from services.seftali.core import (
 )
 from services.seftali.draft_engine import DraftEngine
 from services.seftali.order_service import OrderService
+from services.seftali.customer_summary import CustomerSummaryService
+from services.seftali.enrichment import LookupCache
+from services.seftali.product_catalog import ProductCatalog
 
 router = APIRouter(prefix="/sales", tags=["Seftali-Sales"])
 
@@ -87,6 +90,7 @@ async def create_delivery(body: CreateDeliveryBody, current_user=Depends(require
     }
     await db[COL_DELIVERIES].insert_one(dlv)
     dlv.pop("_id", None)
+    await CustomerSummaryService.refresh(body.customer_id)
     return std_resp(True, dlv, "Teslimat olusturuldu (pending)")
 
 
@@ -113,10 +117,7 @@ async def list_deliveries(
     cursor = db[COL_DELIVERIES].find(filt, {"_id": 0}).sort("delivered_at", -1)
     items = await cursor.to_list(length=200)
     # enrich customer names
-    for d in items:
-        c = await db[COL_CUSTOMERS].find_one({"id": d["customer_id"]}, {"_id": 0, "name": 1})
-        if c:
-            d["customer_name"] = c["name"]
+    await LookupCache().enrich(items, "customer_id", COL_CUSTOMERS, {"name": "customer_name"})
     return std_resp(True, items)
 
 
@@ -142,14 +143,10 @@ async def list_orders(
 
     cursor = db[COL_ORDERS].find(filt, {"_id": 0}).sort("created_at", -1)
     items = await cursor.to_list(length=200)
-    for o in items:
-        c = await db[COL_CUSTOMERS].find_one({"id": o["customer_id"]}, {"_id": 0, "name": 1})
-        if c:
-            o["customer_name"] = c["name"]
-        for it in o.get("items", []):
-            p = await get_product_by_id(db, it["product_id"])
-            if p:
-                it["product_name"] = p.get("name", "")
+    lookups = LookupCache()
+    await lookups.enrich(items, "customer_id", COL_CUSTOMERS, {"name": "customer_name"})
+    order_items = [it for o in items for it in o.get("items", [])]
+    await lookups.enrich(order_items, "product_id", COL_PRODUCTS, {"name": "product_name"}, key="product_id")
     return std_resp(True, items)
 
 
@@ -167,6 +164,7 @@ async def approve_order(order_id: str, current_user=Depends(require_role(SALES_R
     await db[COL_ORDERS].update_one(
         {"id": order_id}, {"$set": {"status": "approved", "updated_at": to_iso(now_utc())}}
     )
+    await CustomerSummaryService.refresh(o["customer_id"])
     return std_resp(True, {"order_id": order_id}, "Siparis onaylandi")
 
 
@@ -185,6 +183,7 @@ async def request_edit(order_id: str, body: OrderActionBody, current_user=Depend
         {"id": order_id},
         {"$set": {"status": "needs_edit", "edit_note": body.note, "updated_at": to_iso(now_utc())}},
     )
+    await CustomerSummaryService.refresh(o["customer_id"])
     return std_resp(True, {"order_id": order_id}, "Duzenleme istegi gonderildi")
 
 
@@ -244,13 +243,16 @@ async def update_customer(customer_id: str, body: UpdateCustomerBody, current_us
     
     update_data["updated_at"] = to_iso(now_utc())
     
-    await db[COL_CUSTOMERS].update_one(
-        {"id": customer_id},
-        {"$set": update_data}
-    )
+    update = {"$set": update_data}
+    if body.route_days is not None:
+        # Kayıtlı draft'lar rota günlerine bağlı; sürümü artır
+        update["$inc"] = {"draft_generation": 1}
+    
+    await db[COL_CUSTOMERS].update_one({"id": customer_id}, update)
     
     # Rut günleri değiştiyse müşterinin draft'ını yeniden hesapla
     if body.route_days is not None:
+        DraftEngine.invalidate_route_cache(customer_id)
         await DraftEngine.save(customer_id, "route_change")
     
     # Güncellenmiş müşteriyi döndür
@@ -260,8 +262,7 @@ async def update_customer(customer_id: str, body: UpdateCustomerBody, current_us
 
 @router.get("/products")
 async def list_products(current_user=Depends(require_role(SALES_ROLES))):
-    cursor = db[COL_PRODUCTS].find({}, {"_id": 0})
-    items = await cursor.to_list(length=500)
+    items = await ProductCatalog.all()
     return std_resp(True, items)
 
 
@@ -309,7 +310,7 @@ async def get_customer_consumption(customer_id: str, current_user=Depends(requir
     consumption_data = []
     for r in results:
         product_id = r.pop("_id")
-        product = await get_product_by_id(db, product_id)
+        product = await get_product_by_id(product_id)
         
         consumption_data.append({
             "product_id": product_id,
@@ -333,6 +334,66 @@ async def get_customer_consumption(customer_id: str, current_user=Depends(requir
 # ===========================
 # 7. GET /warehouse-draft - Depo Sipariş Taslağı (Gelişmiş)
 # ===========================
+WAREHOUSE_DRAFT_CHUNK_SIZE = 1000
+WAREHOUSE_ORDERS_PER_CUSTOMER = 10
+
+
+async def _iter_chunks(cursor, size: int):
+    """Cursor'ı size'lık listeler halinde oku."""
+    chunk = []
+    async for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _load_warehouse_sources(customer_ids: List[str], today_start: str) -> tuple:
+    """
+    Müşteri listesi için depo taslağı kaynaklarını toplu getir.
+    
+    Öncelik (sipariş > working copy > sistem taslağı) çağıran tarafta
+    çözülür; working copy ve taslak sadece sipariş atmayanlar için okunur.
+    
+    Returns:
+        (orders_by_customer, working_copies, system_drafts)
+    """
+    orders_by_cust = {}
+    cursor = db[COL_ORDERS].find({
+        "customer_id": {"$in": customer_ids},
+        "status": {"$in": ["submitted", "approved"]},
+        "created_at": {"$gte": today_start}
+    }, {"_id": 0}).sort("created_at", -1)
+    async for order in cursor:
+        orders = orders_by_cust.setdefault(order["customer_id"], [])
+        if len(orders) < WAREHOUSE_ORDERS_PER_CUSTOMER:
+            orders.append(order)
+    
+    without_orders = [cid for cid in customer_ids if cid not in orders_by_cust]
+    working_copies = {}
+    system_drafts = {}
+    if without_orders:
+        cursor = db["sf_working_copies"].find(
+            {"customer_id": {"$in": without_orders}, "status": "active"},
+            {"_id": 0}
+        )
+        async for wc in cursor:
+            working_copies.setdefault(wc["customer_id"], wc)
+        
+        without_wc = [cid for cid in without_orders if cid not in working_copies]
+        if without_wc:
+            cursor = db["sf_system_drafts"].find(
+                {"customer_id": {"$in": without_wc}},
+                {"_id": 0, "customer_id": 1, "items": 1}
+            )
+            async for draft in cursor:
+                system_drafts.setdefault(draft["customer_id"], draft)
+    
+    return orders_by_cust, working_copies, system_drafts
+
+
 @router.get("/warehouse-draft")
 async def get_warehouse_draft(
     route_day: Optional[str] = None,
@@ -376,114 +437,105 @@ async def get_warehouse_draft(
     cursor = db[COL_CUSTOMERS].find(
         {"is_active": True, "route_plan.days": route_day},
         {"_id": 0}
-    )
-    route_customers = await cursor.to_list(length=500)
+    ).batch_size(WAREHOUSE_DRAFT_CHUNK_SIZE)
     
     customer_details = []
     product_totals = {}  # Ürün bazında toplam
     
-    # Ürün koli bilgilerini çek - yeni products koleksiyonundan
-    products_cursor = db["products"].find({}, {"_id": 0})
-    products_list = await products_cursor.to_list(length=500)
-    products_map = {p["product_id"]: p for p in products_list}
-    
-    # Eski sf_products koleksiyonundan da al (backward compatibility)
-    sf_products_cursor = db[COL_PRODUCTS].find({}, {"_id": 0})
-    sf_products_list = await sf_products_cursor.to_list(length=500)
-    for p in sf_products_list:
-        if p.get("id") not in products_map:
-            products_map[p.get("id")] = p
-    
     orders_total = {}  # Siparişlerden gelen toplam
     drafts_total = {}  # Taslaklardan gelen toplam
     
-    for cust in route_customers:
-        cust_id = cust["id"]
-        cust_name = cust.get("name", "Bilinmeyen")
-        
-        # Bu müşterinin bugün gönderilmiş siparişi var mı?
-        today_orders = await db[COL_ORDERS].find({
-            "customer_id": cust_id,
-            "status": {"$in": ["submitted", "approved"]},
-            "created_at": {"$gte": today_start}
-        }, {"_id": 0}).sort("created_at", -1).to_list(length=10)
-        
-        customer_items = []
-        source = "none"
+    async for chunk in _iter_chunks(cursor, WAREHOUSE_DRAFT_CHUNK_SIZE):
+        # Parça için siparişler, working copy'ler ve sistem taslakları (3 sorgu)
+        orders_by_cust, working_copies, system_drafts = await _load_warehouse_sources(
+            [c["id"] for c in chunk], today_start
+        )
         
-        if today_orders:
-            # Müşteri sipariş göndermiş
-            source = "order"
-            for order in today_orders:
-                for it in order.get("items", []):
-                    pid = it.get("product_id")
-                    qty = it.get("qty") or it.get("user_qty") or 0
-                    if pid and qty > 0:
-                        customer_items.append({
-                            "product_id": pid,
-                            "qty": qty,
-                            "source": "order"
-                        })
-                        # Sipariş toplamına ekle
-                        if pid not in orders_total:
-                            orders_total[pid] = 0
-                        orders_total[pid] += qty
-        else:
-            # 16:30'dan sonraysa veya sipariş yoksa taslağı al
-            source = "draft"
-            # Önce working_copy (müşteri taslağı) kontrol et
-            working_copy = await db["sf_working_copies"].find_one(
-                {"customer_id": cust_id, "status": "active"},
-                {"_id": 0}
-            )
+        for cust in chunk:
+            cust_id = cust["id"]
+            cust_name = cust.get("name", "Bilinmeyen")
+            
+            # Bu müşterinin bugün gönderilmiş siparişi var mı?
+            today_orders = orders_by_cust.get(cust_id, [])
             
-            if working_copy:
-                for it in working_copy.get("items", []):
-                    pid = it.get("product_id")
-                    qty = it.get("user_qty") or it.get("qty") or 0
-                    if pid and qty > 0:
-                        customer_items.append({
-                            "product_id": pid,
-                            "qty": qty,
-                            "source": "working_copy"
-                        })
-                        if pid not in drafts_total:
-                            drafts_total[pid] = 0
-                        drafts_total[pid] += qty
+            customer_items = []
+            source = "none"
+            
+            if today_orders:
+                # Müşteri sipariş göndermiş
+                source = "order"
+                for order in today_orders:
+                    for it in order.get("items", []):
+                        pid = it.get("product_id")
+                        qty = it.get("qty") or it.get("user_qty") or 0
+                        if pid and qty > 0:
+                            customer_items.append({
+                                "product_id": pid,
+                                "qty": qty,
+                                "source": "order"
+                            })
+                            # Sipariş toplamına ekle
+                            if pid not in orders_total:
+                                orders_total[pid] = 0
+                            orders_total[pid] += qty
             else:
-                # Sistem taslağını al
-                system_draft = await db["sf_system_drafts"].find_one(
-                    {"customer_id": cust_id},
-                    {"_id": 0}
-                )
-                if system_draft:
-                    for it in system_draft.get("items", []):
+                # 16:30'dan sonraysa veya sipariş yoksa taslağı al
+                source = "draft"
+                # Önce working_copy (müşteri taslağı) kontrol et
+                working_copy = working_copies.get(cust_id)
+                
+                if working_copy:
+                    for it in working_copy.get("items", []):
                         pid = it.get("product_id")
-                        qty = it.get("suggested_qty") or 0
+                        qty = it.get("user_qty") or it.get("qty") or 0
                         if pid and qty > 0:
                             customer_items.append({
                                 "product_id": pid,
                                 "qty": qty,
-                                "source": "system_draft"
+                                "source": "working_copy"
                             })
                             if pid not in drafts_total:
                                 drafts_total[pid] = 0
                             drafts_total[pid] += qty
-        
-        # Müşteri detayını ekle
-        total_qty = sum(it["qty"] for it in customer_items)
-        if total_qty > 0:
-            customer_details.append({
-                "customer_id": cust_id,
-                "customer_name": cust_name,
-                "source": source,
-                "items": customer_items,
-                "total_qty": total_qty
-            })
+                else:
+                    # Sistem taslağını al
+                    system_draft = system_drafts.get(cust_id)
+                    if system_draft:
+                        for it in system_draft.get("items", []):
+                            pid = it.get("product_id")
+                            qty = it.get("suggested_qty") or 0
+                            if pid and qty > 0:
+                                customer_items.append({
+                                    "product_id": pid,
+                                    "qty": qty,
+                                    "source": "system_draft"
+                                })
+                                if pid not in drafts_total:
+                                    drafts_total[pid] = 0
+                                drafts_total[pid] += qty
+            
+            # Müşteri detayını ekle
+            total_qty = sum(it["qty"] for it in customer_items)
+            if total_qty > 0:
+                customer_details.append({
+                    "customer_id": cust_id,
+                    "customer_name": cust_name,
+                    "source": source,
+                    "items": customer_items,
+                    "total_qty": total_qty
+                })
     
     # Tüm ürünleri birleştir ve koli hesapla
     all_product_ids = set(orders_total.keys()) | set(drafts_total.keys())
     
+    # Ürün koli bilgileri - katalogdan product_id ile
+    products_map = await ProductCatalog.get_many(all_product_ids)
+    
+    # Eski kayıtlar için id alanından da ara (backward compatibility)
+    missing_ids = all_product_ids - products_map.keys()
+    if missing_ids:
+        products_map.update(await ProductCatalog.get_many(missing_ids, key="id"))
+    
     final_order_items = []
     for pid in all_product_ids:
         prod = products_map.get(pid, {})
@@ -565,71 +617,11 @@ async def get_customers_summary(current_user=Depends(require_role(SALES_ROLES)))
     - Bekleyen siparişler
     - Son teslimat tarihi
     - Toplam sipariş sayısı
-    """
-    from datetime import datetime, timedelta
-    
-    # Tüm aktif müşterileri al
-    cursor = db[COL_CUSTOMERS].find({"is_active": True}, {"_id": 0})
-    customers = await cursor.to_list(length=500)
-    
-    customer_summaries = []
-    
-    for cust in customers:
-        cust_id = cust["id"]
-        
-        # Bekleyen siparişler (submitted veya approved)
-        pending_orders = await db[COL_ORDERS].find({
-            "customer_id": cust_id,
-            "status": {"$in": ["submitted", "approved"]}
-        }, {"_id": 0, "id": 1, "status": 1, "items": 1, "created_at": 1}).to_list(length=50)
-        
-        # Toplam siparişler
-        total_orders = await db[COL_ORDERS].count_documents({"customer_id": cust_id})
-        
-        # Son teslimat
-        last_delivery = await db[COL_DELIVERIES].find_one(
-            {"customer_id": cust_id, "acceptance_status": "accepted"},
-            {"_id": 0, "delivered_at": 1, "items": 1}
-        )
-        
-        # Vadesi geçmiş teslimatlar (beklemede olan ve 7 günden eski)
-        seven_days_ago = (datetime.utcnow() - timedelta(days=7)).isoformat() + "Z"
-        overdue_deliveries = await db[COL_DELIVERIES].count_documents({
-            "customer_id": cust_id,
-            "acceptance_status": "pending",
-            "delivered_at": {"$lt": seven_days_ago}
-        })
-        
-        # Toplam teslimat
-        total_deliveries = await db[COL_DELIVERIES].count_documents({"customer_id": cust_id})
-        
-        # Son sipariş tarihi
-        last_order = await db[COL_ORDERS].find_one(
-            {"customer_id": cust_id},
-            {"_id": 0, "created_at": 1}
-        )
-        
-        # Son sipariş kaç gün önce
-        days_since_last_order = None
-        if last_order:
-            try:
-                last_date = datetime.fromisoformat(last_order["created_at"].replace("Z", "+00:00"))
-                days_since_last_order = (datetime.now(last_date.tzinfo) - last_date).days
-            except:
-                pass
-        
-        customer_summaries.append({
-            **cust,
-            "pending_orders_count": len(pending_orders),
-            "pending_orders": pending_orders[:3],  # İlk 3 bekleyen sipariş
-            "total_orders": total_orders,
-            "overdue_deliveries_count": overdue_deliveries,
-            "total_deliveries": total_deliveries,
-            "last_delivery_date": last_delivery.get("delivered_at") if last_delivery else None,
-            "last_order_date": last_order.get("created_at") if last_order else None,
-            "days_since_last_order": days_since_last_order
-        })
     
+    Sipariş/teslimat özetleri müşteri başına sorgu yerine customer_id
+    bazında gruplanan tek aggregation (veya materyalize özet) ile okunur.
+    """
+    customer_summaries = await CustomerSummaryService.get_cards()
     return std_resp(True, customer_summaries)
 
 
@@ -653,12 +645,11 @@ async def submit_warehouse_draft(body: WarehouseSubmitBody, current_user=Depends
         {"is_active": True, "route_plan.days": tomorrow_code},
         {"_id": 0}
     )
-    tomorrow_customers = await cursor.to_list(length=500)
     
     all_items = []
     customer_details = []
     
-    for cust in tomorrow_customers:
+    async for cust in cursor:
         cust_id = cust["id"]
         
         # Bugün gönderilmiş sipariş var mı?
@@ -709,7 +700,7 @@ async def submit_warehouse_draft(body: WarehouseSubmitBody, current_user=Depends
         "submitted_at": to_iso(now),
         "note": body.note,
         "status": "submitted",
-        "customer_count": len(tomorrow_customers),
+        "customer_count": len(customer_details),
         "customer_details": customer_details,
         "items": [{"product_id": pid, "qty": qty} for pid, qty in product_totals.items()],
         "total_qty": sum(product_totals.values()),
@@ -889,9 +880,16 @@ class UpdateStockBody(BaseModel):
     operation: str = "set"  # "set", "add", "subtract"
 
 
+def _check_order_engine(engine: str) -> str:
+    if engine not in OrderService.ENGINES:
+        raise HTTPException(400, f"Geçersiz hesaplama motoru. Geçerli değerler: {', '.join(OrderService.ENGINES)}")
+    return engine
+
+
 @router.get("/plasiyer/order-calculation")
 async def calculate_plasiyer_order(
     route_day: Optional[str] = None,
+    engine: str = Query("python", description="python | pipeline"),
     current_user=Depends(require_role(SALES_ROLES))
 ):
     """
@@ -900,10 +898,13 @@ async def calculate_plasiyer_order(
     - Sipariş atan müşterilerin siparişleri
     - Sipariş atmayan müşterilerin draft'ları
     - Toplam ihtiyaç - Plasiyer stoğu = Sipariş listesi
+    
+    engine=pipeline ile hesaplama tek aggregation olarak yapılır.
     """
     result = await OrderService.calculate(
         salesperson_id=current_user.id,
-        route_day=route_day
+        route_day=route_day,
+        engine=_check_order_engine(engine)
     )
     return std_resp(True, result)
 
@@ -920,9 +921,8 @@ async def get_plasiyer_stock(current_user=Depends(require_role(SALES_ROLES))):
         return std_resp(False, None, "Stok kaydı bulunamadı")
     
     # Ürün isimlerini ekle
-    products_cursor = db["products"].find({}, {"_id": 0, "product_id": 1, "name": 1})
-    products = await products_cursor.to_list(length=500)
-    product_names = {p["product_id"]: p["name"] for p in products}
+    products = await ProductCatalog.get_many(item["product_id"] for item in stock_doc.get("items", []))
+    product_names = {pid: p.get("name", pid) for pid, p in products.items()}
     
     enriched_items = []
     for item in stock_doc.get("items", []):
@@ -995,7 +995,11 @@ async def get_route_customers(
 # ===========================
 
 @router.get("/route-order/{route_day}")
-async def get_route_order(route_day: str, current_user=Depends(require_role(SALES_ROLES))):
+async def get_route_order(
+    route_day: str,
+    engine: str = Query("python", description="python | pipeline"),
+    current_user=Depends(require_role(SALES_ROLES))
+):
     """
     Plasiyerin belirli bir rota günü için sipariş ihtiyacını hesapla.
     
@@ -1012,13 +1016,16 @@ async def get_route_order(route_day: str, current_user=Depends(require_role(SALE
     if route_day not in valid_days:
         raise HTTPException(400, f"Geçersiz gün kodu. Geçerli kodlar: {', '.join(valid_days)}")
     
-    result = await OrderService.calculate(current_user.id, route_day)
+    result = await OrderService.calculate(current_user.id, route_day, engine=_check_order_engine(engine))
     return std_resp(True, result)
 
 
 @router.get("/route-order")
-async def get_route_order_tomorrow(current_user=Depends(require_role(SALES_ROLES))):
+async def get_route_order_tomorrow(
+    engine: str = Query("python", description="python | pipeline"),
+    current_user=Depends(require_role(SALES_ROLES))
+):
     """Yarınki rota için sipariş ihtiyacını hesapla."""
-    result = await OrderService.calculate(current_user.id)
+    result = await OrderService.calculate(current_user.id, engine=_check_order_engine(engine))
     return std_resp(True, result)
 
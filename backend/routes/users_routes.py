@@ -6,17 +6,12 @@ Admin için kullanıcı CRUD işlemleri
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional
 from models.user import User, UserRole
-from utils.auth import get_current_user, require_role, hash_password
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from utils.auth import get_current_user, require_role, hash_password_async
+from utils.user_cache import user_cache
+from config.database import db
 
 router = APIRouter(prefix="/users", tags=["Users Management"])
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 
 @router.get("", response_model=List[dict])
 async def get_all_users(
@@ -66,7 +61,7 @@ async def create_user(
     
     # Şifreyi hash'le
     if "password" in user_data:
-        user_data["password_hash"] = hash_password(user_data["password"])
+        user_data["password_hash"] = await hash_password_async(user_data["password"])
         del user_data["password"]
     else:
         raise HTTPException(status_code=400, detail="Password is required")
@@ -135,6 +130,7 @@ async def update_user(
         {"id": user_id},
         {"$set": update_fields}
     )
+    user_cache.invalidate(user_id)
     
     # Güncellenmiş kullanıcıyı getir
     updated_user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
@@ -163,12 +159,13 @@ async def change_user_password(
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
     
     # Şifreyi hash'le ve güncelle
-    new_password_hash = hash_password(new_password)
+    new_password_hash = await hash_password_async(new_password)
     
     await db.users.update_one(
         {"id": user_id},
         {"$set": {"password_hash": new_password_hash}}
     )
+    user_cache.invalidate(user_id)
     
     return {
         "message": "Password changed successfully",
@@ -197,6 +194,7 @@ async def delete_user(
         {"id": user_id},
         {"$set": {"is_active": False}}
     )
+    user_cache.invalidate(user_id)
     
     return {
         "message": "User deleted successfully (deactivated)",
@@ -220,6 +218,7 @@ async def activate_user(
         {"id": user_id},
         {"$set": {"is_active": True}}
     )
+    user_cache.invalidate(user_id)
     
     return {
         "message": "User activated successfully",
@@ -246,6 +245,7 @@ async def permanently_delete_user(
     
     # Kalıcı silme (hard delete)
     result = await db.users.delete_one({"id": user_id})
+    user_cache.invalidate(user_id)
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=500, detail="Failed to delete user")
@@ -3,13 +3,16 @@
 
 import asyncio
 from datetime import datetime, timezone
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.database import Database
 
-MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.environ.get("DB_NAME", "dagitim_db")
 
 
@@ -21,7 +24,7 @@ async def run_weekly_multiplier_batch():
     Crontab örneği:
     0 0 * * 1 cd /app/backend && python scripts/batch_jobs.py --job=multipliers
     """
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = Database.get_client()
     db = client[DB_NAME]
     
     import sys
@@ -43,7 +46,7 @@ async def run_weekly_multiplier_batch():
     print(f"  Hesaplanan Çarpan: {result.get('total_multipliers_computed')}")
     print("=" * 60)
     
-    client.close()
+    Database.close_connection()
     return result
 
 
@@ -57,7 +60,7 @@ async def run_passivation_check():
     Crontab örneği:
     0 1 * * * cd /app/backend && python scripts/batch_jobs.py --job=passivation
     """
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = Database.get_client()
     db = client[DB_NAME]
     
     import sys
@@ -90,7 +93,7 @@ async def run_passivation_check():
     print(f"  Pasifleştirilen Ürün: {total_passivated}")
     print("=" * 60)
     
-    client.close()
+    Database.close_connection()
     return {"customers_checked": len(customers), "passivated": total_passivated}
 
 
@@ -104,7 +107,7 @@ async def run_rollup_cleanup():
     Crontab örneği:
     0 2 * * * cd /app/backend && python scripts/batch_jobs.py --job=cleanup
     """
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = Database.get_client()
     db = client[DB_NAME]
     
     import sys
@@ -123,7 +126,7 @@ async def run_rollup_cleanup():
     print("Temizlik tamamlandı.")
     print("=" * 60)
     
-    client.close()
+    Database.close_connection()
 
 
 async def run_daily_totals_update():
@@ -131,7 +134,7 @@ async def run_daily_totals_update():
     Günlük toplamları güncelleme.
     Multiplier hesaplaması için gerekli.
     """
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = Database.get_client()
     db = client[DB_NAME]
     
     import sys
@@ -208,15 +211,42 @@ async def run_daily_totals_update():
     print(f"  Güncellenen Günlük Toplam: {updated}")
     print("=" * 60)
     
-    client.close()
+    Database.close_connection()
     return {"updated": updated}
 
 
+async def run_customer_summary_rebuild():
+    """
+    Müşteri kartı özetlerini (sf_customer_summary) baştan oluştur.
+    CUSTOMER_SUMMARY_MATERIALIZED=True yapılmadan önce bir kez çalıştırılmalı.
+    
+    Crontab örneği (günlük tutarlılık kontrolü):
+    30 3 * * * cd /app/backend && python scripts/batch_jobs.py --job=customer_summary
+    """
+    import sys
+    sys.path.insert(0, '/app/backend')
+    
+    from services.seftali.customer_summary import CustomerSummaryService
+    
+    print("=" * 60)
+    print("CUSTOMER SUMMARY REBUILD")
+    print(f"Çalışma Zamanı: {datetime.now(timezone.utc).isoformat()}")
+    print("=" * 60)
+    
+    written = await CustomerSummaryService.rebuild()
+    
+    print(f"\nSonuç:")
+    print(f"  Yazılan Müşteri Özeti: {written}")
+    print("=" * 60)
+    
+    return {"written": written}
+
+
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Draft Engine Batch Jobs")
-    parser.add_argument("--job", choices=["multipliers", "passivation", "cleanup", "daily_totals", "all"],
+    parser.add_argument("--job", choices=["multipliers", "passivation", "cleanup", "daily_totals", "customer_summary", "all"],
                        default="all", help="Çalıştırılacak job")
     
     args = parser.parse_args()
@@ -229,6 +259,8 @@ if __name__ == "__main__":
         asyncio.run(run_rollup_cleanup())
     elif args.job == "daily_totals":
         asyncio.run(run_daily_totals_update())
+    elif args.job == "customer_summary":
+        asyncio.run(run_customer_summary_rebuild())
     else:
         # Tümünü çalıştır
         asyncio.run(run_daily_totals_update())
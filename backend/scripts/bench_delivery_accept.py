@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Delivery Accept Benchmark
+POST /deliveries/{id}/accept istek akışının gecikmesini ölçer: eski sıralı
+akış (bul, onayla, özet, state, draft, çalışma kopyası, audit) ile
+DeliveryAcceptance.accept (koşullu onay + çalışma kopyası, yan etkiler
+outbox ile arka planda) karşılaştırılır.
+
+Geçici bench_ müşterileri, teslimatları ve state'leri oluşturulur ve
+ölçümden sonra silinir.
+
+Kullanım:
+    cd /app/backend && python scripts/bench_delivery_accept.py
+    cd /app/backend && python scripts/bench_delivery_accept.py --deliveries 500 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from config.database import db
+from services.seftali.core import (
+    now_utc, to_iso,
+    COL_CUSTOMERS, COL_DELIVERIES, COL_WORKING_COPIES, COL_AUDIT_EVENTS, COL_DE_STATE,
+    COL_CUSTOMER_SUMMARY, COL_SYSTEM_DRAFTS
+)
+from services.seftali.customer_summary import CustomerSummaryService
+from services.seftali.delivery_acceptance import DeliveryAcceptance
+from services.seftali.draft_engine import DraftEngine
+from services.seftali.draft_queue import DraftQueue
+
+PREFIX = "bench_accept_"
+CUSTOMERS = 20
+ITEMS_PER_DELIVERY = 9
+
+
+async def _accept_inline(cid: str, delivery_id: str, user_id: str) -> None:
+    """Eski davranış: tüm adımlar istek içinde, sırayla."""
+    dlv = await db[COL_DELIVERIES].find_one({"id": delivery_id, "customer_id": cid}, {"_id": 0})
+    now = now_utc()
+    await db[COL_DELIVERIES].update_one(
+        {"id": delivery_id},
+        {"$set": {"acceptance_status": "accepted", "accepted_at": to_iso(now), "updated_at": to_iso(now)}},
+    )
+    await CustomerSummaryService.refresh(cid)
+    await DraftEngine.record_accepted_delivery(cid, dlv)
+    DraftQueue.mark_dirty(cid, "delivery_accept")
+    active_wc = await db[COL_WORKING_COPIES].find_one({"customer_id": cid, "status": "active"}, {"_id": 0})
+    if active_wc:
+        await db[COL_WORKING_COPIES].update_one(
+            {"id": active_wc["id"]},
+            {"$set": {"status": "deleted_by_delivery", "updated_at": to_iso(now)}},
+        )
+    await db[COL_AUDIT_EVENTS].insert_one({
+        "type": "delivery_accepted", "customer_id": cid, "delivery_id": delivery_id,
+        "performed_by": user_id, "at": to_iso(now),
+    })
+
+
+async def _seed(mode: str, deliveries: int) -> list:
+    """Her müşteri için state, çalışma kopyası ve bekleyen teslimatlar oluştur."""
+    now = now_utc()
+    customer_ids = [f"{PREFIX}{mode}_c{i}" for i in range(CUSTOMERS)]
+    product_ids = [f"{PREFIX}p{i}" for i in range(ITEMS_PER_DELIVERY)]
+    await db[COL_CUSTOMERS].insert_many([
+        {"id": cid, "user_id": f"{cid}_u", "is_active": True, "route_plan": {"days": ["MON"]}}
+        for cid in customer_ids
+    ])
+    await db[COL_DE_STATE].insert_many([
+        {"customer_id": cid, "product_id": pid, "is_active": True}
+        for cid in customer_ids for pid in product_ids
+    ])
+    await db[COL_WORKING_COPIES].insert_many([
+        {"id": f"{cid}_wc", "customer_id": cid, "status": "active", "items": [],
+         "created_at": to_iso(now), "updated_at": to_iso(now)}
+        for cid in customer_ids
+    ])
+    docs = [
+        {
+            "id": f"{PREFIX}{mode}_d{i}",
+            "customer_id": customer_ids[i % CUSTOMERS],
+            "acceptance_status": "pending",
+            "delivered_at": to_iso(now),
+            "items": [{"product_id": pid, "qty": 10} for pid in product_ids],
+        }
+        for i in range(deliveries)
+    ]
+    await db[COL_DELIVERIES].insert_many(docs)
+    return [(d["customer_id"], d["id"]) for d in docs]
+
+
+async def _cleanup() -> None:
+    regex = {"$regex": f"^{PREFIX}"}
+    await db[COL_CUSTOMERS].delete_many({"id": regex})
+    await db[COL_DE_STATE].delete_many({"customer_id": regex})
+    await db[COL_WORKING_COPIES].delete_many({"customer_id": regex})
+    await db[COL_DELIVERIES].delete_many({"customer_id": regex})
+    await db[COL_AUDIT_EVENTS].delete_many({"customer_id": regex})
+    await db[COL_CUSTOMER_SUMMARY].delete_many({"customer_id": regex})
+    await db[COL_SYSTEM_DRAFTS].delete_many({"customer_id": regex})
+
+
+async def _run(mode: str, deliveries: int, concurrency: int) -> dict:
+    targets = await _seed(mode, deliveries)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list = []
+
+    async def accept(cid: str, delivery_id: str) -> None:
+        async with semaphore:
+            t0 = time.perf_counter()
+            if mode == "inline":
+                await _accept_inline(cid, delivery_id, "bench")
+            else:
+                await DeliveryAcceptance.accept(cid, delivery_id, "bench")
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(accept(cid, did) for cid, did in targets))
+    elapsed = time.perf_counter() - t0
+
+    # Arka plan işleri ölçüme dahil değil ama bench sonunda tamamlanmalı
+    await DeliveryAcceptance.flush()
+    await DraftQueue.flush()
+    pending = await db[COL_DELIVERIES].count_documents(
+        {"customer_id": {"$regex": f"^{PREFIX}"}, "post_accept_pending": True}
+    )
+
+    latencies.sort()
+    return {
+        "elapsed_s": elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "max": latencies[-1],
+        "outbox_pending": pending,
+    }
+
+
+async def bench(deliveries: int, concurrency: int) -> None:
+    await _cleanup()
+    try:
+        for mode in ("inline", "outbox"):
+            r = await _run(mode, deliveries, concurrency)
+            print(
+                f"{mode:>6} | süre {r['elapsed_s']:6.2f} s | p50 {r['p50']:7.1f} ms | "
+                f"p99 {r['p99']:7.1f} ms | max {r['max']:7.1f} ms | outbox bekleyen {r['outbox_pending']}"
+            )
+    finally:
+        await _cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teslimat onayı istek gecikmesi (p50 / p99)")
+    parser.add_argument("--deliveries", type=int, default=200, help="Mod başına onaylanacak teslimat")
+    parser.add_argument("--concurrency", type=int, default=10, help="Eşzamanlı onay isteği")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"DELIVERY ACCEPT ({args.deliveries} teslimat, {args.concurrency} eşzamanlı)")
+    print("=" * 60)
+    asyncio.run(bench(args.deliveries, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Draft Kernel Benchmark
+Skaler DraftEngine._calculate_item ile vektörel DraftKernel yolunun
+saniyede işlenen item sayısını karşılaştırır.
+
+Kullanım:
+    cd /app/backend && python scripts/bench_draft_kernel.py
+    cd /app/backend && python scripts/bench_draft_kernel.py --sizes 10000 100000
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services.seftali.core import get_route_info, WEEKDAY_CODES
+from services.seftali.draft_engine import DraftEngine
+from services.seftali.draft_kernel import DraftKernel
+
+TODAY = date(2025, 6, 18)
+PRODUCT_COUNT = 60
+
+
+def make_dataset(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    products = {
+        f"p{i}": {"product_id": f"p{i}", "name": f"Urun {i}", "shelf_life_days": rng.choice([None, 7, 21, 90])}
+        for i in range(PRODUCT_COUNT)
+    }
+    multipliers = {f"p{i}": rng.uniform(0.8, 1.2) for i in range(0, PRODUCT_COUNT, 2)}
+    route_table = [get_route_info(rng.sample(WEEKDAY_CODES, rng.randint(1, 3))) for _ in range(32)]
+
+    states, route_infos = [], []
+    for _ in range(n):
+        last = TODAY - timedelta(days=rng.randint(0, 30))
+        states.append({
+            "product_id": f"p{rng.randrange(PRODUCT_COUNT)}",
+            "interval_rates": [rng.uniform(0.5, 30) for _ in range(rng.randint(0, 8))],
+            "rate_mt": None,
+            "weekly_multiplier": 1.0,
+            "last_delivery_qty": rng.randint(1, 300),
+            "last_delivery_date": last.isoformat(),
+            "delivery_count": rng.randint(1, 40),
+            "interval_count": rng.randint(0, 8),
+            "age_days": rng.randint(0, 700),
+        })
+        route_infos.append(route_table[rng.randrange(len(route_table))])
+    return states, products, multipliers, route_infos
+
+
+def bench(n: int) -> None:
+    states, products, multipliers, route_infos = make_dataset(n)
+
+    t0 = time.perf_counter()
+    scalar_items = [
+        DraftEngine._calculate_item(state, products, multipliers, route_info, TODAY)
+        for state, route_info in zip(states, route_infos)
+    ]
+    scalar = time.perf_counter() - t0
+    del scalar_items
+
+    t0 = time.perf_counter()
+    packed = DraftKernel.pack(states, products, multipliers, route_infos, TODAY)
+    t_pack = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = DraftKernel.compute(packed)
+    t_compute = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    kernel_items = DraftKernel.to_items(states, products, packed, result, TODAY)
+    t_items = time.perf_counter() - t0
+    del kernel_items
+
+    vector = t_pack + t_compute + t_items
+    print(
+        f"{n:>9,} | scalar {n / scalar:>12,.0f}/s | "
+        f"kernel {n / vector:>12,.0f}/s (x{scalar / vector:4.1f}) | "
+        f"compute-only {n / t_compute:>14,.0f}/s | "
+        f"pack {t_pack:6.2f}s compute {t_compute:6.3f}s items {t_items:6.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draft kernel benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("DRAFT KERNEL BENCHMARK (items/sec)")
+    print("=" * 60)
+    for n in args.sizes:
+        bench(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Login Load Benchmark
+Eşzamanlı bcrypt doğrulamaları (giriş yükü) sırasında event loop'taki
+diğer isteklerin gecikmesini ölçer: senkron verify_password ile
+havuzdaki verify_password_async karşılaştırılır.
+
+Auth dışı istek, her PROBE_INTERVAL_MS'de bir zamanlanan ve ne kadar geç
+çalıştığı ölçülen bir probe ile temsil edilir. Havuz modunda probe
+gecikmesi girişler yokken ölçülenle aynı seviyede kalmalıdır.
+
+Kullanım:
+    cd /app/backend && python scripts/bench_login_latency.py
+    cd /app/backend && python scripts/bench_login_latency.py --logins 50 --workers 4
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from config.settings import settings
+
+PROBE_INTERVAL_MS = 10
+PASSWORD = "Bench-Passw0rd"
+
+
+async def _probe(stop: asyncio.Event, lags: list) -> None:
+    """Auth dışı istek: planlanan zamandan ne kadar geç çalıştığını kaydet."""
+    interval = PROBE_INTERVAL_MS / 1000
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - t0 - interval) * 1000)
+
+
+async def _run(mode: str, logins: int, hashed: str) -> dict:
+    from utils.auth import verify_password, verify_password_async
+
+    async def login() -> None:
+        if mode == "sync":
+            # Eski davranış: handler içinde doğrudan bcrypt
+            await asyncio.sleep(0)
+            verify_password(PASSWORD, hashed)
+        else:
+            await verify_password_async(PASSWORD, hashed)
+
+    stop = asyncio.Event()
+    lags: list = []
+    probe = asyncio.create_task(_probe(stop, lags))
+    t0 = time.perf_counter()
+    if mode == "idle":
+        await asyncio.sleep(1.0)
+    else:
+        await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await probe
+
+    lags.sort()
+    return {
+        "elapsed_s": elapsed,
+        "p50": statistics.median(lags),
+        "p99": lags[min(len(lags) - 1, int(len(lags) * 0.99))],
+        "max": lags[-1],
+        "samples": len(lags),
+    }
+
+
+async def bench(logins: int) -> None:
+    from utils.auth import hash_password, shutdown_password_pool
+
+    hashed = hash_password(PASSWORD)
+    for mode in ("idle", "sync", "pool"):
+        r = await _run(mode, logins, hashed)
+        print(
+            f"{mode:>5} | süre {r['elapsed_s']:6.2f} s | probe gecikmesi "
+            f"p50 {r['p50']:8.1f} ms | p99 {r['p99']:8.1f} ms | max {r['max']:8.1f} ms | n {r['samples']}"
+        )
+    shutdown_password_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Giriş yükü altında event loop gecikmesi")
+    parser.add_argument("--logins", type=int, default=20, help="Eşzamanlı giriş sayısı")
+    parser.add_argument("--workers", type=int, default=None, help="PASSWORD_HASH_WORKERS (varsayılan: ayar)")
+    args = parser.parse_args()
+
+    if args.workers is not None:
+        settings.PASSWORD_HASH_WORKERS = args.workers
+
+    print("=" * 60)
+    print(f"LOGIN LOAD ({args.logins} eşzamanlı giriş, {settings.PASSWORD_HASH_WORKERS} worker)")
+    print("=" * 60)
+    asyncio.run(bench(args.logins))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Order Calculation A/B Benchmark
+OrderService.calculate "python" ve "pipeline" motorlarının gecikmesini
+ölçer ve sonuçların aynı olduğunu kontrol eder.
+
+Kullanım:
+    cd /app/backend && python scripts/bench_order_calculation.py --salesperson-id <id>
+    cd /app/backend && python scripts/bench_order_calculation.py --salesperson-id <id> --route-day SAT --runs 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services.seftali.order_service import OrderService
+
+
+def _comparable(result: dict) -> dict:
+    """Sıra ve zaman damgasından bağımsız karşılaştırma formu."""
+    return {
+        "summary": result["summary"],
+        "totals": result["totals"],
+        "customers": sorted(result["customers"], key=lambda c: (c["source"], c["customer_id"])),
+    }
+
+
+async def bench(salesperson_id: str, route_day: str, runs: int) -> None:
+    results = {}
+    for engine in OrderService.ENGINES:
+        timings = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            results[engine] = await OrderService.calculate(salesperson_id, route_day, engine=engine)
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(
+            f"{engine:>9} | customers {results[engine]['summary']['total_customers']:>6} | "
+            f"p50 {statistics.median(timings):8.1f} ms | p95 {p95:8.1f} ms | min {timings[0]:8.1f} ms"
+        )
+
+    same = _comparable(results["python"]) == _comparable(results["pipeline"])
+    print(f"Sonuçlar aynı: {'EVET' if same else 'HAYIR'}")
+    if not same:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OrderService A/B benchmark")
+    parser.add_argument("--salesperson-id", required=True)
+    parser.add_argument("--route-day", default=None, help="MON..SUN (varsayılan: yarın)")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    route_day = (args.route_day or OrderService.get_tomorrow_route_code()).upper()
+
+    print("=" * 60)
+    print(f"ORDER CALCULATION A/B ({route_day}, {args.runs} tekrar)")
+    print("=" * 60)
+    asyncio.run(bench(args.salesperson_id, route_day, args.runs))
+
+
+if __name__ == "__main__":
+    main()
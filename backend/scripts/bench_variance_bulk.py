@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Variance Bulk Benchmark
+POST /variance/apply-reason-bulk ve /variance/dismiss-bulk işlemlerini
+karşılaştırır: eski id başına find_one + update_one döngüsü ile
+VarianceActions.resolve_bulk (tek find + tek update_many).
+
+Veritabanı round-trip'leri pymongo CommandListener ile sayılır. Geçici
+bench_ müşterisinin olayları oluşturulur ve ölçümden sonra silinir.
+
+Kullanım:
+    cd /app/backend && python scripts/bench_variance_bulk.py
+    cd /app/backend && python scripts/bench_variance_bulk.py --ids 1000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from pymongo import monitoring
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Sunucuya giden komut sayısı"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# İstemci config.database import edilirken oluşturulur; listener önce kaydedilmeli
+counter = CommandCounter()
+monitoring.register(counter)
+
+from config.database import db
+from services.seftali.core import now_utc, to_iso, COL_VARIANCE_EVENTS
+from services.seftali.variance_actions import VarianceActions
+
+CUSTOMER_ID = "bench_variance_customer"
+
+
+async def _resolve_loop(customer_id: str, event_ids: list, status: str, fields: dict) -> int:
+    """Eski davranış: id başına find_one + update_one."""
+    now = now_utc()
+    modified = 0
+    for eid in event_ids:
+        ev = await db[COL_VARIANCE_EVENTS].find_one({"id": eid, "customer_id": customer_id}, {"_id": 0})
+        if not ev or ev["status"] != "needs_reason":
+            continue
+        await db[COL_VARIANCE_EVENTS].update_one(
+            {"id": eid},
+            {"$set": {**fields, "status": status, "customer_action_at": to_iso(now), "updated_at": to_iso(now)}},
+        )
+        modified += 1
+    return modified
+
+
+async def _seed(ids: int) -> list:
+    """Olayların %90'ı bekleyen, %10'u kapatılmış; ayrıca %5 yabancı id."""
+    now = to_iso(now_utc())
+    await db[COL_VARIANCE_EVENTS].delete_many({"customer_id": CUSTOMER_ID})
+    events = [
+        {
+            "id": f"bench_var_{i}",
+            "customer_id": CUSTOMER_ID,
+            "product_id": f"bench_p{i % 50}",
+            "status": "dismissed" if i % 10 == 0 else "needs_reason",
+            "detected_at": now,
+        }
+        for i in range(ids)
+    ]
+    await db[COL_VARIANCE_EVENTS].insert_many(events)
+    return [e["id"] for e in events] + [f"bench_missing_{i}" for i in range(ids // 20)]
+
+
+async def bench(ids: int) -> None:
+    try:
+        for mode in ("loop", "bulk"):
+            event_ids = await _seed(ids)
+            fields = {"reason_code": "BENCH", "reason_note": ""}
+            before = counter.count
+            t0 = time.perf_counter()
+            if mode == "loop":
+                modified = await _resolve_loop(CUSTOMER_ID, event_ids, "recorded", fields)
+            else:
+                modified = (await VarianceActions.resolve_bulk(CUSTOMER_ID, event_ids, "recorded", fields))["modified"]
+            elapsed = (time.perf_counter() - t0) * 1000
+            print(
+                f"{mode:>4} | {len(event_ids)} id | güncellenen {modified} | "
+                f"round-trip {counter.count - before:5d} | süre {elapsed:8.1f} ms"
+            )
+    finally:
+        await db[COL_VARIANCE_EVENTS].delete_many({"customer_id": CUSTOMER_ID})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Toplu varyans işlemi round-trip karşılaştırması")
+    parser.add_argument("--ids", type=int, default=1000, help="Oluşturulacak olay sayısı")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"VARIANCE BULK ({args.ids} olay)")
+    print("=" * 60)
+    asyncio.run(bench(args.ids))
+
+
+if __name__ == "__main__":
+    main()
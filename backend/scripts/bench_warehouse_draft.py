@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Warehouse Draft Benchmark
+GET /sales/warehouse-draft için müşteri sayısına göre p50/p99 gecikme:
+- önce: müşteri başına sipariş / working copy / taslak sorguları (N+1)
+- sonra: parça başına üç $in sorgusu
+
+Veriler ayrı bir veritabanına yazılır ve sonunda silinir.
+
+Kullanım:
+    cd /app/backend && python scripts/bench_warehouse_draft.py
+    cd /app/backend && python scripts/bench_warehouse_draft.py --sizes 100 1000 --runs 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+ROUTE_DAY = "WED"
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def _load_sources_per_customer(customer_ids, today_start):
+    """Eski davranış: her müşteri için ayrı sorgular."""
+    from config.database import db
+    from services.seftali.core import COL_ORDERS
+
+    orders_by_cust, working_copies, system_drafts = {}, {}, {}
+    for cid in customer_ids:
+        orders = await db[COL_ORDERS].find({
+            "customer_id": cid,
+            "status": {"$in": ["submitted", "approved"]},
+            "created_at": {"$gte": today_start}
+        }, {"_id": 0}).sort("created_at", -1).to_list(length=10)
+        if orders:
+            orders_by_cust[cid] = orders
+            continue
+        wc = await db["sf_working_copies"].find_one({"customer_id": cid, "status": "active"}, {"_id": 0})
+        if wc:
+            working_copies[cid] = wc
+            continue
+        draft = await db["sf_system_drafts"].find_one({"customer_id": cid}, {"_id": 0})
+        if draft:
+            system_drafts[cid] = draft
+    return orders_by_cust, working_copies, system_drafts
+
+
+async def _seed(db, n):
+    from services.seftali.core import now_utc, to_iso
+    now = to_iso(now_utc())
+    await db.sf_customers.delete_many({})
+    await db.sf_orders.delete_many({})
+    await db.sf_working_copies.delete_many({})
+    await db.sf_system_drafts.delete_many({})
+    await db.products.delete_many({})
+
+    await db.products.insert_many([
+        {"product_id": f"p{i}", "name": f"Urun {i}", "box_size": 1 + i % 3 * 6} for i in range(40)
+    ])
+    customers, orders, wcs, drafts = [], [], [], []
+    for i in range(n):
+        cid = f"c{i}"
+        customers.append({"id": cid, "name": f"Musteri {i}", "is_active": True,
+                          "route_plan": {"days": [ROUTE_DAY]}})
+        items = [{"product_id": f"p{(i + k) % 40}", "qty": 1 + k} for k in range(6)]
+        if i % 3 == 0:
+            orders.append({"id": f"o{i}", "customer_id": cid, "status": "submitted",
+                           "created_at": now, "items": items})
+        elif i % 3 == 1:
+            wcs.append({"id": f"w{i}", "customer_id": cid, "status": "active", "items": items})
+        drafts.append({"customer_id": cid, "items": [
+            {"product_id": it["product_id"], "suggested_qty": it["qty"]} for it in items
+        ]})
+    await db.sf_customers.insert_many(customers)
+    await db.sf_orders.insert_many(orders)
+    await db.sf_working_copies.insert_many(wcs)
+    await db.sf_system_drafts.insert_many(drafts)
+    for col, key in (("sf_orders", "customer_id"), ("sf_working_copies", "customer_id"),
+                     ("sf_system_drafts", "customer_id"), ("sf_customers", "route_plan.days")):
+        await db[col].create_index(key)
+
+
+async def bench(sizes, runs):
+    from config.database import db, Database
+    import routes.seftali.sales_routes as sales_routes
+
+    batched = sales_routes._load_warehouse_sources
+    try:
+        for n in sizes:
+            await _seed(db, n)
+            results = {}
+            line = f"{n:>7,} müşteri"
+            for label, loader in (("önce", _load_sources_per_customer), ("sonra", batched)):
+                sales_routes._load_warehouse_sources = loader
+                timings = []
+                for _ in range(runs):
+                    t0 = time.perf_counter()
+                    resp = await sales_routes.get_warehouse_draft(route_day=ROUTE_DAY, current_user=None)
+                    timings.append((time.perf_counter() - t0) * 1000)
+                results[label] = resp["data"]["order_items"]
+                line += (f" | {label} p50 {_percentile(timings, 50):9.1f} ms"
+                         f" p99 {_percentile(timings, 99):9.1f} ms")
+            sales_routes._load_warehouse_sources = batched
+            same = sorted(results["önce"], key=lambda x: x["product_id"]) == \
+                sorted(results["sonra"], key=lambda x: x["product_id"])
+            print(line + f" | aynı: {'EVET' if same else 'HAYIR'}")
+    finally:
+        sales_routes._load_warehouse_sources = batched
+        await Database.get_client().drop_database(db.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warehouse draft benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--db-name", default="seftali_bench_warehouse_draft")
+    args = parser.parse_args()
+
+    # Benchmark verileri ayrı veritabanına yazılır (sonunda silinir)
+    if args.db_name == os.environ.get("DB_NAME"):
+        parser.error("--db-name uygulama veritabanı ile aynı olamaz")
+    os.environ["DB_NAME"] = args.db_name
+
+    print("=" * 60)
+    print("WAREHOUSE DRAFT BENCHMARK (önce: N+1, sonra: toplu $in)")
+    print("=" * 60)
+    asyncio.run(bench(args.sizes, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Index Verification
+Sıcak sorguları explain() ile çalıştırır ve kazanan planda COLLSCAN
+olan sorgu varsa hata koduyla çıkar. --apply ile önce core.INDEXES
+kayıt defterindeki indeksler oluşturulur.
+
+Kullanım:
+    cd /app/backend && python scripts/check_indexes.py
+    cd /app/backend && python scripts/check_indexes.py --apply
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from config.database import db
+from services.seftali.core import (
+    ensure_indexes,
+    COL_USERS, COL_CUSTOMERS, COL_DELIVERIES, COL_AUDIT_EVENTS, COL_ORDERS, COL_SYSTEM_DRAFTS,
+    COL_WORKING_COPIES, COL_CAMPAIGNS, COL_PLASIYER_STOCK, COL_WAREHOUSE_STOCK,
+    COL_VARIANCE_EVENTS, COL_DE_STATE, COL_DE_MULTIPLIERS, COL_CUSTOMER_SUMMARY,
+    COL_DAILY_CONSUMPTION, COL_INVOICES, COL_INVOICE_PURCHASES, COL_CUSTOMER_CONSUMPTION, COL_CONSUMPTION_BASELINES,
+    COL_CONSUMPTION_PERIODS
+)
+
+IDS = ["x1", "x2"]
+PENDING = ["submitted", "approved"]
+
+# (isim, koleksiyon, filtre, sıralama, limit) - uygulamadaki sorguların şekli
+HOT_QUERIES = [
+    ("users.by_id", COL_USERS, {"id": "x"}, None, 1),
+    ("users.by_username", COL_USERS, {"username": "x"}, None, 1),
+    ("customers.by_id", COL_CUSTOMERS, {"id": "x"}, None, 1),
+    ("customers.by_ids", COL_CUSTOMERS, {"id": {"$in": IDS}}, None, 0),
+    ("customers.by_user", COL_CUSTOMERS, {"user_id": "x"}, None, 1),
+    ("customers.salesperson_route", COL_CUSTOMERS,
+     {"salesperson_id": "x", "is_active": True, "route_plan.days": "MON"}, None, 0),
+    ("customers.route", COL_CUSTOMERS, {"is_active": True, "route_plan.days": "MON"}, None, 0),
+    ("orders.by_id", COL_ORDERS, {"id": "x"}, None, 1),
+    ("orders.pending_by_customers", COL_ORDERS,
+     {"customer_id": {"$in": IDS}, "status": {"$in": PENDING}}, [("created_at", -1)], 0),
+    ("orders.by_status", COL_ORDERS, {"status": "submitted"}, [("created_at", -1)], 200),
+    ("orders.summary", COL_ORDERS, {"customer_id": {"$in": IDS}}, None, 0),
+    ("deliveries.by_id", COL_DELIVERIES, {"id": "x"}, None, 1),
+    ("deliveries.customer_pending", COL_DELIVERIES,
+     {"customer_id": "x", "acceptance_status": "pending"}, [("delivered_at", -1)], 100),
+    ("deliveries.customer_history", COL_DELIVERIES, {"customer_id": "x"}, [("delivered_at", -1)], 500),
+    ("deliveries.by_status", COL_DELIVERIES, {"acceptance_status": "pending"}, [("delivered_at", -1)], 200),
+    ("deliveries.accept_outbox", COL_DELIVERIES,
+     {"post_accept_pending": True, "accepted_at": {"$lte": "2024-01-01"}}, None, 200),
+    ("audit_events.by_delivery", COL_AUDIT_EVENTS, {"type": "delivery_accepted", "delivery_id": "x"}, None, 1),
+    ("system_drafts.by_customers", COL_SYSTEM_DRAFTS, {"customer_id": {"$in": IDS}}, None, 0),
+    ("system_drafts.current", COL_SYSTEM_DRAFTS,
+     {"customer_id": "x", "input_generation": 0, "computed_for": "2024-01-01"}, None, 1),
+    ("working_copies.active", COL_WORKING_COPIES,
+     {"customer_id": {"$in": IDS}, "status": "active"}, None, 0),
+    ("working_copies.by_id", COL_WORKING_COPIES, {"id": "x"}, None, 1),
+    ("campaigns.active", COL_CAMPAIGNS, {"status": "active"}, [("created_at", -1)], 50),
+    ("plasiyer_stock.by_salesperson", COL_PLASIYER_STOCK, {"salesperson_id": "x"}, None, 1),
+    ("warehouse_stock.by_product", COL_WAREHOUSE_STOCK, {"product_id": "x"}, None, 0),
+    ("warehouse_stock.by_depo", COL_WAREHOUSE_STOCK, {"depo_no": "D001"}, [("depo_no", 1), ("product_id", 1)], 0),
+    ("variance.customer_open", COL_VARIANCE_EVENTS,
+     {"customer_id": "x", "status": "needs_reason"}, None, 100),
+    ("variance.by_ids", COL_VARIANCE_EVENTS, {"id": {"$in": IDS}, "customer_id": "x"}, None, 0),
+    ("de_state.active_by_customers", COL_DE_STATE,
+     {"customer_id": {"$in": IDS}, "is_active": True}, None, 0),
+    ("de_state.by_customer_product", COL_DE_STATE, {"customer_id": "x", "product_id": "y"}, None, 1),
+    ("de_multipliers.by_week", COL_DE_MULTIPLIERS, {"week_start": "2024-01-01"}, None, 0),
+    ("customer_summary.by_customer", COL_CUSTOMER_SUMMARY, {"customer_id": "x"}, None, 1),
+    ("daily_consumption.range", COL_DAILY_CONSUMPTION,
+     {"customer_id": "x", "product_id": "y", "date": {"$gte": "2024-01-01", "$lte": "2024-12-31"}},
+     [("date", 1)], 0),
+    ("daily_consumption.customer", COL_DAILY_CONSUMPTION,
+     {"customer_id": "x", "date": {"$gte": "2024-01-01"}}, None, 0),
+    ("invoices.by_customer", COL_INVOICES, {"customer_id": "x", "is_active": True}, None, 0),
+    ("invoices.by_id", COL_INVOICES, {"id": "x", "is_active": True}, None, 1),
+    ("invoice_purchases.previous", COL_INVOICE_PURCHASES,
+     {"customer_id": "x", "product_code": "y", "invoice_date_iso": {"$lt": "2024-06-01"}, "invoice_id": {"$ne": "z"}},
+     [("invoice_date_iso", -1)], 1),
+    ("customer_consumption.by_product", COL_CUSTOMER_CONSUMPTION,
+     {"customer_id": "x", "product_code": "y", "can_calculate": True}, None, 0),
+    ("customer_consumption.iso_week", COL_CUSTOMER_CONSUMPTION,
+     {"customer_id": "x", "product_code": "y", "target_iso_year": 2024, "target_iso_week": 1, "can_calculate": True},
+     None, 0),
+    ("customer_consumption.dedupe", COL_CUSTOMER_CONSUMPTION,
+     {"customer_id": "x", "product_code": "y", "target_invoice_id": "z"}, None, 1),
+    ("consumption_baselines.by_product", COL_CONSUMPTION_BASELINES,
+     {"customer_id": "x", "product_code": "y"}, None, 1),
+    ("consumption_periods.by_period", COL_CONSUMPTION_PERIODS,
+     {"customer_id": "x", "product_code": "y", "period_type": "monthly", "period_year": 2024, "period_number": 1},
+     None, 1),
+]
+
+
+def _stages(plan):
+    """Plan ağacındaki tüm stage adları."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+async def check(apply: bool) -> int:
+    if apply:
+        result = await ensure_indexes(db)
+        print(f"İndeksler: {len(result['ensured'])} hazır, {len(result['failed'])} hatalı")
+        for failure in result["failed"]:
+            print(f"  HATA {failure}")
+
+    collscans = 0
+    for name, collection, filt, sort, limit in HOT_QUERIES:
+        cursor = db[collection].find(filt)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        explain = await cursor.explain()
+        stages = list(_stages(explain.get("queryPlanner", {}).get("winningPlan", {})))
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        if status == "COLLSCAN":
+            collscans += 1
+        print(f"{status:>8} | {name:<40} | {' > '.join(stages)}")
+
+    print("=" * 60)
+    print(f"{len(HOT_QUERIES)} sorgu, {collscans} COLLSCAN")
+    return collscans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sıcak sorgular için indeks doğrulama")
+    parser.add_argument("--apply", action="store_true", help="Önce kayıt defterindeki indeksleri oluştur")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("INDEX CHECK")
+    print("=" * 60)
+    collscans = asyncio.run(check(args.apply))
+    sys.exit(1 if collscans else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,16 @@ Her gün ayarlanan saatte çalışır ve yarınki rota için sipariş hesaplamas
 import asyncio
 import os
 import sys
+from pathlib import Path
 from datetime import datetime, timezone, timedelta
-from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 
 load_dotenv()
 sys.path.insert(0, '/app/backend')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.database import Database
 
-MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.environ.get("DB_NAME", "distribution_management")
 
 WEEKDAY_CODES = ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"]
@@ -27,9 +29,11 @@ def get_tomorrow_route_code():
 
 async def trigger_cutoff_calculation():
     """Kesim saati hesaplaması"""
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = Database.get_client()
     db = client[DB_NAME]
     
+    from services.seftali.draft_engine import DraftEngine
+    
     print("=" * 60)
     print("KESIM SAATI TETIKLEME")
     print(f"Çalışma Zamanı: {datetime.now(timezone.utc).isoformat()}")
@@ -81,6 +85,9 @@ async def trigger_cutoff_calculation():
         # Draft kullananlar
         draft_customer_ids = [cid for cid in customer_ids if cid not in ordered_customer_ids]
         
+        # Draft kullananların taslaklarını tek geçişte yenile
+        await DraftEngine.save_many(draft_customer_ids, "cutoff")
+        
         result = {
             "salesperson_id": sp_id,
             "salesperson_username": sp.get("username"),
@@ -107,7 +114,7 @@ async def trigger_cutoff_calculation():
     print(f"Toplam hesaplama: {len(results)}")
     print("=" * 60)
     
-    client.close()
+    Database.close_connection()
     return results
 
 
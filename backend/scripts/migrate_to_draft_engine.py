@@ -3,19 +3,22 @@
 
 import asyncio
 from datetime import datetime, timezone
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.database import Database
 
-MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.environ.get("DB_NAME", "dagitim_db")
 
 
 async def migrate_data():
     """Ana migrasyon fonksiyonu"""
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = Database.get_client()
     db = client[DB_NAME]
     
     print("=" * 60)
@@ -187,7 +190,7 @@ async def migrate_data():
     print(f"Rut Kayıtları:   {stats['routes']}")
     print("=" * 60)
     
-    client.close()
+    Database.close_connection()
     return stats
 
 
@@ -196,7 +199,7 @@ async def rebuild_customer_product_states():
     Migrate edilen teslimatlardan customer_product_state'leri yeniden oluşturur.
     Bu işlem Model B hesaplamalarını çalıştırır.
     """
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = Database.get_client()
     db = client[DB_NAME]
     
     print("\n" + "=" * 60)
@@ -279,7 +282,7 @@ async def rebuild_customer_product_states():
     print(f"Oluşturulan State: {processed_states}")
     print("=" * 60)
     
-    client.close()
+    Database.close_connection()
     return {
         "customers": processed_customers,
         "deliveries": processed_deliveries,
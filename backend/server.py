@@ -2,6 +2,7 @@
 ŞEFTALİ - Dağıtım Yönetim Sistemi
 Ana Sunucu Dosyası (Refaktör Edilmiş)
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter
 from starlette.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -14,6 +15,11 @@ from routes.auth_routes import router as auth_router
 from routes.products import router as products_router
 from routes.users_routes import router as users_router
 from routes.seftali import router as seftali_router
+from services.seftali.draft_queue import DraftQueue
+from services.seftali.delivery_acceptance import DeliveryAcceptance
+from config.database import Database, db
+from services.seftali.core import ensure_indexes
+from utils.auth import shutdown_password_pool
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -22,11 +28,36 @@ load_dotenv(ROOT_DIR / '.env')
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Paylaşılan MongoDB istemcisi (tüm route / servisler aynı havuzu kullanır)
+    try:
+        await Database.connect()
+        # İndeks kayıt defteri (core.INDEXES) - idempotent
+        result = await ensure_indexes(db)
+        for failure in result["failed"]:
+            logger.warning("İndeks oluşturulamadı: %s", failure)
+    except Exception:
+        logger.exception("MongoDB bağlantısı / indeks kurulumu başarısız")
+    # Draft yenileme kuyruğu worker'ı
+    DraftQueue.start()
+    # Teslimat onayı outbox taraması (yarım kalmış onaylar)
+    DeliveryAcceptance.start()
+    yield
+    # Devam eden onay tamamlamalarını ve bekleyen draft yenilemelerini işle
+    await DeliveryAcceptance.stop()
+    await DraftQueue.stop()
+    shutdown_password_pool()
+    Database.close_connection()
+
+
 # Create the main app
 app = FastAPI(
     title="ŞEFTALİ - Dağıtım Yönetim Sistemi",
     description="Süt ürünleri dağıtım ve sipariş yönetim sistemi",
-    version="3.0.0"
+    version="3.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
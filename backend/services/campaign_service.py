@@ -1,11 +1,8 @@
 from typing import List, Dict, Optional
 from datetime import datetime, timezone
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from config.database import Database
 
-MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.distribution_db
+db = Database.lazy_database("distribution_db")
 
 class CampaignService:
     """Kampanya uygulama servisi"""
@@ -3,53 +3,87 @@ Consumption Calculation Service
 Fatura bazlı müşteri tüketim hesaplama servisi
 """
 
+from bisect import bisect_left
 from datetime import datetime
 from typing import List, Dict, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import InsertOne, ReplaceOne, UpdateOne
 from models.customer_consumption import CustomerConsumption
+from utils.helpers import normalize_invoice_date, invoice_date_period_keys
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def target_period_fields(target_invoice_date: Optional[str]) -> Dict:
+    """Tüketim kaydının haftalık / aylık gruplama anahtarları (target_* alanları)"""
+    keys = invoice_date_period_keys(target_invoice_date) or {}
+    return {
+        "target_date_iso": keys.get("date_iso"),
+        "target_year": keys.get("year"),
+        "target_month": keys.get("month"),
+        "target_iso_year": keys.get("iso_year"),
+        "target_iso_week": keys.get("iso_week"),
+    }
+
+
+class _ChunkedWriter:
+    """Koleksiyon başına işlemleri biriktirip chunk_size'lık parçalarla toplu yazar"""
+    
+    def __init__(self, db: AsyncIOMotorDatabase, chunk_size: int):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.pending: Dict[str, List] = {}
+        self.counts: Dict[str, int] = {}
+    
+    async def add(self, collection: str, ops: List) -> None:
+        """bulk_write işlemleri (UpdateOne vb.) ekle"""
+        await self._append(collection, ops)
+    
+    async def insert(self, collection: str, docs: List[Dict]) -> None:
+        """insert_many ile yazılacak dokümanlar ekle"""
+        await self._append(collection, [InsertOne(doc) for doc in docs])
+    
+    async def flush(self, collection: Optional[str] = None) -> None:
+        for name in [collection] if collection else list(self.pending):
+            ops = self.pending.pop(name, [])
+            if ops:
+                await self.db[name].bulk_write(ops, ordered=False)
+                self.counts[name] = self.counts.get(name, 0) + len(ops)
+    
+    async def _append(self, collection: str, ops: List) -> None:
+        if not ops:
+            return
+        pending = self.pending.setdefault(collection, [])
+        pending.extend(ops)
+        if len(pending) >= self.chunk_size:
+            await self.flush(collection)
+
+
 class ConsumptionCalculationService:
     """Fatura bazlı tüketim hesaplama servisi"""
     
+    # Toplu hesaplamada tek bulk_write'a giren işlem sayısı
+    BULK_CHUNK_SIZE = 1000
+    # Önceki yıl verisi yoksa beklenen tüketimde kullanılan son kayıt sayısı
+    RECENT_WINDOW = 5
+    
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
     
     def _parse_invoice_date(self, date_str: str) -> datetime:
         """
         Fatura tarihini parse et
-        Desteklenen formatlar:
-        - "DD MM YYYY" (15 11 2024)
-        - "DD-MM-YYYY" (15-11-2024)
-        - "DD/MM/YYYY" (15/11/2024)
-        - "YYYY-MM-DD" (2024-11-15) - ISO format
+        
+        normalize_invoice_date ile aynı formatlar desteklenir (DD MM YYYY,
+        DD-MM-YYYY, DD/MM/YYYY, DD.MM.YYYY, YYYY-MM-DD, YYYY MM DD); sıralama
+        ve önceki alım aramaları invoice_date_iso ile tutarlı kalır.
         """
-        try:
-            # ISO format kontrolü (YYYY-MM-DD)
-            if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
-                # ISO format: 2024-11-15
-                parts = date_str.split('-')
-                year, month, day = parts
-                return datetime(int(year), int(month), int(day))
-            
-            # Diğer formatlar (DD MM YYYY, DD-MM-YYYY, DD/MM/YYYY)
-            parts = date_str.replace("-", " ").replace("/", " ").split()
-            if len(parts) == 3:
-                # Hangi format olduğunu tespit et
-                if len(parts[0]) == 4:
-                    # YYYY MM DD format
-                    year, month, day = parts
-                else:
-                    # DD MM YYYY format
-                    day, month, year = parts
-                
-                return datetime(int(year), int(month), int(day))
-        except Exception as e:
-            logger.error(f"Date parsing error for {date_str}: {e}")
+        date_iso = normalize_invoice_date(date_str)
+        if date_iso:
+            return datetime.strptime(date_iso, "%Y-%m-%d")
         
+        logger.error(f"Date parsing error for {date_str}")
         # Fallback: Şimdiki zaman
         return datetime.utcnow()
     
@@ -63,6 +97,9 @@ class ConsumptionCalculationService:
         """
         Belirli bir üründen içeren en yakın önceki faturayı bul
         
+        invoice_purchases üzerinde (customer_id, product_code, invoice_date_iso)
+        indeksiyle tek sorgu yapılır.
+        
         Args:
             customer_id: Müşteri ID
             product_code: Ürün kodu
@@ -72,46 +109,121 @@ class ConsumptionCalculationService:
         Returns:
             Fatura dict veya None
         """
-        # Müşterinin tüm önceki faturalarını al (tarih sırasına göre azalan)
-        cursor = self.db.invoices.find(
+        purchase = await self.db.invoice_purchases.find_one(
             {
                 "customer_id": customer_id,
-                "is_active": True,
-                "id": {"$ne": current_invoice_id}  # Mevcut faturayı dahil etme
+                "product_code": product_code.strip(),
+                "invoice_date_iso": {"$lt": before_date.strftime("%Y-%m-%d")},
+                "invoice_id": {"$ne": current_invoice_id}  # Mevcut faturayı dahil etme
             },
-            {"_id": 0}
+            {"_id": 0},
+            sort=[("invoice_date_iso", -1)]
         )
         
-        invoices = await cursor.to_list(length=None)
+        if not purchase:
+            # Hiçbir önceki faturada bu ürün bulunamadı
+            return None
         
-        # Faturaları tarih sırasına göre sırala (en yeniden eskiye)
-        sorted_invoices = sorted(
-            invoices,
-            key=lambda inv: self._parse_invoice_date(inv.get("invoice_date", "")),
-            reverse=True
-        )
+        return {
+            "invoice_id": purchase.get("invoice_id"),
+            "invoice_date": purchase.get("invoice_date"),
+            "product_quantity": purchase.get("quantity", 0.0)
+        }
+    
+    def _purchase_ops(self, invoice: Dict, date_iso: Optional[str], indexed_at: str) -> List[UpdateOne]:
+        """Faturanın invoice_purchases upsert işlemleri (ürün kodu başına ilk satır)"""
+        customer_id = invoice.get("customer_id")
+        if not customer_id or not date_iso:
+            return []
         
-        # Her faturada bu ürünü ara (en yeniden başlayarak)
-        for invoice in sorted_invoices:
-            invoice_date = self._parse_invoice_date(invoice.get("invoice_date", ""))
-            
-            # Sadece belirtilen tarihten önce olanları kontrol et
-            if invoice_date >= before_date:
+        ops = []
+        seen = set()
+        for product in invoice.get("products", []):
+            product_code = (product.get("product_code") or "").strip()
+            if not product_code or product_code in seen:
                 continue
-            
-            # Bu faturada ürün var mı?
-            products = invoice.get("products", [])
-            for product in products:
-                if product.get("product_code", "").strip() == product_code.strip():
-                    # BULUNDU! Bu ürünü içeren en yakın önceki fatura
-                    return {
-                        "invoice_id": invoice.get("id"),
-                        "invoice_date": invoice.get("invoice_date"),
-                        "product_quantity": product.get("quantity", 0.0)
-                    }
+            seen.add(product_code)
+            ops.append(UpdateOne(
+                {"invoice_id": invoice.get("id"), "product_code": product_code},
+                {"$set": {
+                    "customer_id": customer_id,
+                    "invoice_date": invoice.get("invoice_date"),
+                    "invoice_date_iso": date_iso,
+                    "quantity": product.get("quantity", 0.0),
+                    "indexed_at": indexed_at
+                }},
+                upsert=True
+            ))
+        return ops
+    
+    async def record_invoice_purchases(self, invoice: Dict) -> int:
+        """
+        Faturadaki ürün alımlarını invoice_purchases koleksiyonuna yaz (idempotent)
+        
+        Her (fatura, ürün kodu) için bir kayıt tutulur; aynı ürün faturada
+        birden fazla satırdaysa ilk satırın miktarı geçerlidir.
         
-        # Hiçbir önceki faturada bu ürün bulunamadı
-        return None
+        Returns:
+            Yazılan alım sayısı
+        """
+        date_iso = invoice.get("invoice_date_iso") or normalize_invoice_date(invoice.get("invoice_date"))
+        ops = self._purchase_ops(invoice, date_iso, datetime.utcnow().isoformat())
+        if ops:
+            await self.db.invoice_purchases.bulk_write(ops, ordered=False)
+        return len(ops)
+    
+    async def rebuild_purchase_index(self, customer_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Aktif faturalardan invoice_purchases'ı yeniden oluştur ve eksik
+        invoice_date_iso alanlarını doldur
+        
+        Kayıtlar yerinde upsert edilir; yeniden oluşturma sırasında canlı
+        yüklemeler indeksi okumaya devam eder. Bitince bu çalışmadan önce
+        yazılmış ve tekrar görülmeyen (silinmiş / pasif faturaların)
+        kayıtları silinir.
+        
+        Args:
+            customer_id: Verilirse yalnızca bu müşterinin faturaları
+        """
+        started_at = datetime.utcnow().isoformat()
+        query = {"is_active": True}
+        stale_query = {"indexed_at": {"$not": {"$gte": started_at}}}
+        if customer_id:
+            query["customer_id"] = customer_id
+            stale_query["customer_id"] = customer_id
+        
+        invoices = 0
+        purchases = 0
+        writer = _ChunkedWriter(self.db, self.BULK_CHUNK_SIZE)
+        cursor = self.db.invoices.find(query, {"_id": 0, "html_content": 0})
+        async for invoice in cursor:
+            invoices += 1
+            date_iso = await self._ensure_invoice_date_iso(invoice, writer)
+            ops = self._purchase_ops(invoice, date_iso, started_at)
+            purchases += len(ops)
+            await writer.add("invoice_purchases", ops)
+        await writer.flush()
+        
+        removed = await self.db.invoice_purchases.delete_many(stale_query)
+        
+        return {
+            "invoices": invoices,
+            "purchases": purchases,
+            "stale_removed": removed.deleted_count,
+            "dates_normalized": writer.counts.get("invoices", 0)
+        }
+    
+    async def _ensure_customer_purchases(self, customer_id: str) -> None:
+        """
+        Müşterinin hiç invoice_purchases kaydı yoksa faturalarından oluştur
+        
+        Koleksiyon boş başladığında (ör. ilk kurulum) önceki alımları olan
+        ürünlere yanlışlıkla "İlk fatura" kaydı yazılmasını önler.
+        """
+        if await self.db.invoice_purchases.find_one({"customer_id": customer_id}, {"_id": 1}):
+            return
+        result = await self.rebuild_purchase_index(customer_id)
+        logger.info(f"Purchase index backfilled for customer {customer_id}: {result['purchases']} purchases")
     
     async def calculate_consumption_for_invoice(self, invoice_id: str) -> Dict[str, any]:
         """
@@ -145,27 +257,24 @@ class ConsumptionCalculationService:
         invoice_date_obj = self._parse_invoice_date(invoice_date)
         products = invoice.get("products", [])
         
+        # İndekslenmemiş müşterinin geçmiş alımlarını doldur, sonra bu faturanın
+        # alımlarını sonraki faturaların önceki alım aramaları için kaydet
+        await self._ensure_customer_purchases(customer_id)
+        await self.record_invoice_purchases(invoice)
+        
+        product_ids = await self._product_ids_by_sku(products)
+        
         consumption_records_created = 0
         first_time_products = 0
         
         # Her ürün için tüketim hesapla
         for product in products:
             product_code = product.get("product_code", "").strip()
-            product_name = product.get("product_name", "").strip()
-            target_quantity = float(product.get("quantity", 0.0))
             
             if not product_code:
                 logger.warning(f"Product without code in invoice {invoice_id}, skipping")
                 continue
             
-            # Bu ürünü içeren product_id'yi bul (sku ile eşleştir)
-            product_doc = await self.db.products.find_one(
-                {"sku": product_code},
-                {"_id": 0, "id": 1}
-            )
-            
-            product_id = product_doc.get("id") if product_doc else product_code
-            
             # Önceki faturada bu ürünü ara
             previous = await self._find_previous_invoice_with_product(
                 customer_id=customer_id,
@@ -174,84 +283,22 @@ class ConsumptionCalculationService:
                 current_invoice_id=invoice_id
             )
             
+            expected_consumption = 0.0
             if previous:
-                # ÜRÜN BULUNDU - Tüketim hesapla
-                source_invoice_id = previous["invoice_id"]
-                source_invoice_date = previous["invoice_date"]
-                source_quantity = float(previous["product_quantity"])
-                
-                # Tarih farkı hesapla
-                source_date_obj = self._parse_invoice_date(source_invoice_date)
-                days_between = (invoice_date_obj - source_date_obj).days
-                
-                # Tüketim miktarı = SON ALINAN MİKTAR (source_quantity)
-                # Mantık: Son faturada 50 adet almış, ara faturalarda görünmüyor (stokta var),
-                # yeni faturada görünüyor demek ki stok bitmiş ve 50 adet tüketilmiş
-                consumption_quantity = source_quantity
-                
-                # Günlük tüketim oranı
-                daily_rate = consumption_quantity / days_between if days_between > 0 else 0.0
-                
                 # Beklenen tüketim hesapla (bir önceki yılın aynı dönemi)
                 expected_consumption = await self._calculate_expected_consumption(
                     customer_id=customer_id,
                     product_code=product_code,
-                    days=days_between,
+                    days=self._days_between(previous, invoice_date_obj),
                     current_date=invoice_date_obj
                 )
-                
-                # Sapma oranı hesapla
-                if expected_consumption > 0:
-                    deviation_rate = ((consumption_quantity - expected_consumption) / expected_consumption) * 100
-                else:
-                    deviation_rate = 0.0
-                
-                # Tüketim kaydı oluştur
-                consumption = CustomerConsumption(
-                    customer_id=customer_id,
-                    product_id=product_id,
-                    product_code=product_code,
-                    product_name=product_name,
-                    source_invoice_id=source_invoice_id,
-                    source_invoice_date=source_invoice_date,
-                    source_quantity=source_quantity,
-                    target_invoice_id=invoice_id,
-                    target_invoice_date=invoice_date,
-                    target_quantity=target_quantity,
-                    days_between=days_between,
-                    consumption_quantity=consumption_quantity,
-                    daily_consumption_rate=daily_rate,
-                    expected_consumption=expected_consumption,
-                    deviation_rate=round(deviation_rate, 2),
-                    can_calculate=True,
-                    notes=f"Günlük ort: {daily_rate:.2f} | Beklenen (önceki yıl): {expected_consumption:.2f} | Sapma: {deviation_rate:.1f}%"
-                )
             else:
-                # ÜRÜN BULUNAMADI - İlk fatura kaydı
                 first_time_products += 1
-                consumption = CustomerConsumption(
-                    customer_id=customer_id,
-                    product_id=product_id,
-                    product_code=product_code,
-                    product_name=product_name,
-                    source_invoice_id=None,
-                    source_invoice_date=None,
-                    source_quantity=0.0,
-                    target_invoice_id=invoice_id,
-                    target_invoice_date=invoice_date,
-                    target_quantity=target_quantity,
-                    days_between=0,
-                    consumption_quantity=0.0,
-                    daily_consumption_rate=0.0,
-                    expected_consumption=0.0,
-                    deviation_rate=0.0,
-                    can_calculate=False,
-                    notes="İlk fatura - Tüketim hesaplanamaz"
-                )
             
-            # MongoDB'ye kaydet
-            doc = consumption.model_dump()
-            doc['created_at'] = doc['created_at'].isoformat()
+            doc = self._build_consumption_doc(
+                invoice, invoice_date_obj, product, product_ids.get(product_code, product_code),
+                previous, expected_consumption
+            )
             
             # Aynı kayıt var mı kontrol et (중복 önleme)
             existing = await self.db.customer_consumption.find_one({
@@ -262,6 +309,7 @@ class ConsumptionCalculationService:
             
             if not existing:
                 await self.db.customer_consumption.insert_one(doc)
+                await self._record_baseline(doc)
                 consumption_records_created += 1
             else:
                 logger.info(f"Consumption record already exists for {customer_id}-{product_code}-{invoice_id}")
@@ -278,41 +326,270 @@ class ConsumptionCalculationService:
     async def bulk_calculate_all_invoices(self) -> Dict[str, any]:
         """
         Tüm faturalar için tüketim hesapla (mevcut veriler için)
-        Faturaları tarih sırasına göre işler
+        
+        Tek geçişli akış: faturalar müşteriye göre gruplanarak okunur, her
+        müşterinin faturaları tarih sırasına göre işlenir. Önceki alımlar ve
+        beklenen tüketim geçmişi bellekte tutulur; tüketim kayıtları,
+        yazımları BULK_CHUNK_SIZE'lık parçalar halinde toplu yazılır. Var olan
+        tüketim kayıtları korunur. Önce rebuild_purchase_index ile
+        invoice_purchases ve invoice_date_iso güncellenir.
         """
-        # Tüm faturaları tarih sırasına göre al
+        purchase_index = await self.rebuild_purchase_index()
+        writer = _ChunkedWriter(self.db, self.BULK_CHUNK_SIZE)
+        
+        totals = {"total_invoices": 0, "invoices_processed": 0, "first_time_products": 0}
+        group: List[Dict] = []
+        group_customer = None
+        
+        logger.info("Starting streaming bulk consumption calculation")
+        
+        # (customer_id, is_active) indeksiyle müşteriye göre gruplu akış
         cursor = self.db.invoices.find(
             {"is_active": True},
-            {"_id": 0}
+            {"_id": 0, "html_content": 0}
+        ).sort("customer_id", 1)
+        
+        async for invoice in cursor:
+            totals["total_invoices"] += 1
+            
+            customer_id = invoice.get("customer_id")
+            if not customer_id:
+                continue
+            if customer_id != group_customer and group:
+                await self._calculate_customer_stream(group_customer, group, writer, totals)
+                group = []
+            group_customer = customer_id
+            group.append(invoice)
+        
+        if group:
+            await self._calculate_customer_stream(group_customer, group, writer, totals)
+        await writer.flush()
+        
+        logger.info(
+            f"Bulk consumption calculation finished: {totals['invoices_processed']} invoices, "
+            f"{writer.counts.get('customer_consumption', 0)} records"
         )
         
-        invoices = await cursor.to_list(length=None)
+        return {
+            "success": True,
+            "total_invoices": totals["total_invoices"],
+            "invoices_processed": totals["invoices_processed"],
+            "total_consumption_records_created": writer.counts.get("customer_consumption", 0),
+            "first_time_products": totals["first_time_products"],
+            "purchases_indexed": purchase_index["purchases"]
+        }
+    
+    async def _calculate_customer_stream(
+        self,
+        customer_id: str,
+        invoices: List[Dict],
+        writer: "_ChunkedWriter",
+        totals: Dict[str, int]
+    ) -> None:
+        """
+        Tek müşterinin faturalarını tarih sırasıyla işle
         
-        # Tarih sırasına göre sırala (eskiden yeniye)
-        sorted_invoices = sorted(
-            invoices,
-            key=lambda inv: self._parse_invoice_date(inv.get("invoice_date", ""))
+        purchases: ürün kodu -> tarih sıralı (invoice_date_iso, alım) listeleri;
+        önceki alım, tarihi mevcut faturadan küçük son kayıttır
+        (_find_previous_invoice_with_product ile aynı kural).
+        baselines: ürün kodu -> beklenen tüketim baz değerleri; mevcut kayıtlardan
+        yeniden kurulur ve müşteri bitince consumption_baselines'a yazılır.
+        """
+        existing_keys = set()
+        history: List[Dict] = []
+        cursor = self.db.customer_consumption.find(
+            {"customer_id": customer_id},
+            {"_id": 0, "product_code": 1, "target_invoice_id": 1, "target_invoice_date": 1,
+             "daily_consumption_rate": 1, "can_calculate": 1, "created_at": 1}
         )
+        async for record in cursor:
+            existing_keys.add((record.get("product_code"), record.get("target_invoice_id")))
+            if record.get("can_calculate"):
+                history.append(record)
+        history.sort(key=lambda r: str(r.get("created_at") or ""))
+        
+        baselines: Dict[str, Dict] = {}
+        for record in history:
+            self._apply_to_baseline(
+                baselines.setdefault(record["product_code"], self._new_baseline(customer_id, record["product_code"])),
+                record
+            )
         
-        total_invoices = len(sorted_invoices)
-        processed = 0
-        total_records = 0
+        purchase_dates: Dict[str, List[str]] = {}
+        purchases: Dict[str, List[Dict]] = {}
         
-        logger.info(f"Starting bulk consumption calculation for {total_invoices} invoices")
+        dated = [(self._parse_invoice_date(inv.get("invoice_date", "")), inv) for inv in invoices]
+        dated.sort(key=lambda item: item[0])
         
-        for invoice in sorted_invoices:
-            result = await self.calculate_consumption_for_invoice(invoice.get("id"))
-            if result.get("success"):
-                total_records += result.get("consumption_records_created", 0)
-                processed += 1
+        for invoice_date_obj, invoice in dated:
+            invoice_id = invoice.get("id")
+            before_iso = invoice_date_obj.strftime("%Y-%m-%d")
+            products = invoice.get("products", [])
+            product_ids = await self._product_ids_by_sku(products)
+            
+            docs = []
+            seen = set()
+            for product in products:
+                product_code = product.get("product_code", "").strip()
+                if not product_code:
+                    logger.warning(f"Product without code in invoice {invoice_id}, skipping")
+                    continue
+                
+                # Tarihi mevcut faturadan küçük son alım; aynı tarihli alımlardan ilki
+                dates = purchase_dates.get(product_code, [])
+                idx = bisect_left(dates, before_iso)
+                previous = purchases[product_code][bisect_left(dates, dates[idx - 1])] if idx else None
+                
+                expected_consumption = 0.0
+                if previous:
+                    expected_consumption = self._expected_from_baseline(
+                        baselines.get(product_code),
+                        self._days_between(previous, invoice_date_obj),
+                        invoice_date_obj
+                    )
+                else:
+                    totals["first_time_products"] += 1
+                
+                if product_code in seen or (product_code, invoice_id) in existing_keys:
+                    continue
+                seen.add(product_code)
+                
+                doc = self._build_consumption_doc(
+                    invoice, invoice_date_obj, product, product_ids.get(product_code, product_code),
+                    previous, expected_consumption
+                )
+                docs.append(doc)
+                if doc["can_calculate"]:
+                    self._apply_to_baseline(
+                        baselines.setdefault(product_code, self._new_baseline(customer_id, product_code)), doc
+                    )
+            
+            # Alımları bu faturadan sonra ekle; aynı tarihli faturalar birbirini görmez
+            date_iso = invoice.get("invoice_date_iso")
+            if date_iso:
+                for product in products:
+                    product_code = (product.get("product_code") or "").strip()
+                    if not product_code or product_code in purchase_dates and purchases[product_code][-1]["invoice_id"] == invoice_id:
+                        continue
+                    purchase_dates.setdefault(product_code, []).append(date_iso)
+                    purchases.setdefault(product_code, []).append({
+                        "invoice_id": invoice_id,
+                        "invoice_date": invoice.get("invoice_date"),
+                        "product_quantity": product.get("quantity", 0.0)
+                    })
+            
+            await writer.insert("customer_consumption", docs)
+            totals["invoices_processed"] += 1
         
+        now = datetime.utcnow().isoformat()
+        await writer.add("consumption_baselines", [
+            ReplaceOne(
+                {"customer_id": customer_id, "product_code": product_code},
+                {**baseline, "updated_at": now},
+                upsert=True
+            )
+            for product_code, baseline in baselines.items()
+        ])
+    
+    async def _ensure_invoice_date_iso(self, invoice: Dict, writer: "_ChunkedWriter") -> Optional[str]:
+        """Eksik invoice_date_iso alanını hesapla ve toplu yazıma ekle"""
+        if not invoice.get("invoice_date_iso"):
+            invoice["invoice_date_iso"] = normalize_invoice_date(invoice.get("invoice_date"))
+            await writer.add("invoices", [UpdateOne(
+                {"id": invoice.get("id")},
+                {"$set": {"invoice_date_iso": invoice["invoice_date_iso"]}}
+            )])
+        return invoice["invoice_date_iso"]
+    
+    async def _product_ids_by_sku(self, products: List[Dict]) -> Dict[str, str]:
+        """Fatura satırlarındaki ürün kodlarını ürün id'lerine eşle (tek sorgu)"""
+        codes = {(p.get("product_code") or "").strip() for p in products} - {""}
+        if not codes:
+            return {}
         return {
-            "success": True,
-            "total_invoices": total_invoices,
-            "invoices_processed": processed,
-            "total_consumption_records_created": total_records
+            product["sku"]: product["id"]
+            async for product in self.db.products.find(
+                {"sku": {"$in": list(codes)}}, {"_id": 0, "sku": 1, "id": 1}
+            )
+            if product.get("id")
         }
-
+    
+    def _days_between(self, previous: Dict, invoice_date_obj: datetime) -> int:
+        return (invoice_date_obj - self._parse_invoice_date(previous["invoice_date"])).days
+    
+    def _build_consumption_doc(
+        self,
+        invoice: Dict,
+        invoice_date_obj: datetime,
+        product: Dict,
+        product_id: str,
+        previous: Optional[Dict],
+        expected_consumption: float
+    ) -> Dict:
+        """Fatura satırı ve önceki alımdan MongoDB'ye yazılacak tüketim kaydını oluştur"""
+        common = dict(
+            customer_id=invoice.get("customer_id"),
+            product_id=product_id,
+            product_code=product.get("product_code", "").strip(),
+            product_name=product.get("product_name", "").strip(),
+            target_invoice_id=invoice.get("id"),
+            target_invoice_date=invoice.get("invoice_date"),
+            target_quantity=float(product.get("quantity", 0.0)),
+            **target_period_fields(invoice.get("invoice_date")),
+        )
+        
+        if previous:
+            # ÜRÜN BULUNDU - Tüketim hesapla
+            source_quantity = float(previous["product_quantity"])
+            days_between = self._days_between(previous, invoice_date_obj)
+            
+            # Tüketim miktarı = SON ALINAN MİKTAR (source_quantity)
+            # Mantık: Son faturada 50 adet almış, ara faturalarda görünmüyor (stokta var),
+            # yeni faturada görünüyor demek ki stok bitmiş ve 50 adet tüketilmiş
+            consumption_quantity = source_quantity
+            
+            # Günlük tüketim oranı
+            daily_rate = consumption_quantity / days_between if days_between > 0 else 0.0
+            
+            # Sapma oranı hesapla
+            if expected_consumption > 0:
+                deviation_rate = ((consumption_quantity - expected_consumption) / expected_consumption) * 100
+            else:
+                deviation_rate = 0.0
+            
+            consumption = CustomerConsumption(
+                **common,
+                source_invoice_id=previous["invoice_id"],
+                source_invoice_date=previous["invoice_date"],
+                source_quantity=source_quantity,
+                days_between=days_between,
+                consumption_quantity=consumption_quantity,
+                daily_consumption_rate=daily_rate,
+                expected_consumption=expected_consumption,
+                deviation_rate=round(deviation_rate, 2),
+                can_calculate=True,
+                notes=f"Günlük ort: {daily_rate:.2f} | Beklenen (önceki yıl): {expected_consumption:.2f} | Sapma: {deviation_rate:.1f}%"
+            )
+        else:
+            # ÜRÜN BULUNAMADI - İlk fatura kaydı
+            consumption = CustomerConsumption(
+                **common,
+                source_invoice_id=None,
+                source_invoice_date=None,
+                source_quantity=0.0,
+                days_between=0,
+                consumption_quantity=0.0,
+                daily_consumption_rate=0.0,
+                expected_consumption=0.0,
+                deviation_rate=0.0,
+                can_calculate=False,
+                notes="İlk fatura - Tüketim hesaplanamaz"
+            )
+        
+        doc = consumption.model_dump()
+        doc['created_at'] = doc['created_at'].isoformat()
+        return doc
+    
     async def _calculate_expected_consumption(
         self, 
         customer_id: str, 
@@ -326,6 +603,8 @@ class ConsumptionCalculationService:
         Mevsimsel tüketim farklılıklarını dikkate alır.
         Örnek: 2024 Ocak için beklenen tüketim = 2023 Ocak'ın günlük ortalaması * gün sayısı
         
+        Değerler consumption_baselines'tan tek okumayla alınır.
+        
         Args:
             customer_id: Müşteri ID
             product_code: Ürün kodu
@@ -339,59 +618,82 @@ class ConsumptionCalculationService:
             if not current_date:
                 return 0.0
             
-            # Bir önceki yılın aynı ayını bul
-            previous_year = current_date.year - 1
-            current_month = current_date.month
-            
-            # Bir önceki yılın aynı ayındaki tüm tüketim kayıtlarını al
-            all_records = await self.db.customer_consumption.find(
-                {
-                    "customer_id": customer_id,
-                    "product_code": product_code,
-                    "can_calculate": True
-                }
-            ).to_list(length=500)
-            
-            # Bir önceki yılın aynı ayına ait kayıtları filtrele
-            previous_year_same_month = []
-            for record in all_records:
-                try:
-                    target_date_str = record.get("target_invoice_date")
-                    if target_date_str:
-                        target_date = self._parse_invoice_date(target_date_str)
-                        if target_date.year == previous_year and target_date.month == current_month:
-                            previous_year_same_month.append(record)
-                except:
-                    continue
-            
-            if previous_year_same_month:
-                # Bir önceki yılın aynı ayının günlük ortalama tüketimini hesapla
-                total_daily_rate = sum(r.get("daily_consumption_rate", 0.0) for r in previous_year_same_month)
-                avg_daily_rate = total_daily_rate / len(previous_year_same_month)
-                
-                # Beklenen tüketim = önceki yılın günlük ortalaması * bu dönemin gün sayısı
-                expected = avg_daily_rate * days
-                
-                return round(expected, 2)
-            else:
-                # Önceki yıl verisi yoksa, genel ortalama al (son 5 kayıt)
-                recent_records = await self.db.customer_consumption.find(
-                    {
-                        "customer_id": customer_id,
-                        "product_code": product_code,
-                        "can_calculate": True
-                    }
-                ).sort("created_at", -1).limit(5).to_list(length=5)
-                
-                if recent_records:
-                    total_daily_rate = sum(r.get("daily_consumption_rate", 0.0) for r in recent_records)
-                    avg_daily_rate = total_daily_rate / len(recent_records)
-                    expected = avg_daily_rate * days
-                    return round(expected, 2)
-                
-                return 0.0
+            baseline = await self.db.consumption_baselines.find_one(
+                {"customer_id": customer_id, "product_code": product_code},
+                {"_id": 0, f"months.{self._baseline_month_key(current_date.year - 1, current_date.month)}": 1,
+                 "recent_rates": 1}
+            )
+            return self._expected_from_baseline(baseline, days, current_date)
             
         except Exception as e:
             logger.error(f"Error calculating expected consumption: {e}")
             return 0.0
-
+    
+    def _new_baseline(self, customer_id: str, product_code: str) -> Dict:
+        return {"customer_id": customer_id, "product_code": product_code, "months": {}, "recent_rates": []}
+    
+    def _baseline_month_key(self, year: int, month: int) -> str:
+        return f"{year}-{month:02d}"
+    
+    def _apply_to_baseline(self, baseline: Dict, record: Dict) -> None:
+        """Hesaplanabilir tüketim kaydını bellekteki baz değerlere ekle (_record_baseline ile aynı)"""
+        rate = record.get("daily_consumption_rate", 0.0)
+        if record.get("target_invoice_date"):
+            target_date = self._parse_invoice_date(record["target_invoice_date"])
+            month = baseline["months"].setdefault(
+                self._baseline_month_key(target_date.year, target_date.month),
+                {"rate_sum": 0.0, "count": 0}
+            )
+            month["rate_sum"] += rate
+            month["count"] += 1
+        baseline["recent_rates"] = (baseline["recent_rates"] + [rate])[-self.RECENT_WINDOW:]
+    
+    async def _record_baseline(self, doc: Dict) -> None:
+        """
+        Yeni tüketim kaydını consumption_baselines'a artımlı işle
+        
+        (müşteri, ürün kodu) başına tek doküman: months.{YYYY-MM} altında
+        günlük oran toplamı / kayıt sayısı ve son RECENT_WINDOW günlük oran.
+        """
+        if not doc.get("can_calculate"):
+            return
+        
+        rate = doc.get("daily_consumption_rate", 0.0)
+        update = {
+            "$push": {"recent_rates": {"$each": [rate], "$slice": -self.RECENT_WINDOW}},
+            "$set": {"updated_at": datetime.utcnow().isoformat()}
+        }
+        if doc.get("target_invoice_date"):
+            target_date = self._parse_invoice_date(doc["target_invoice_date"])
+            key = self._baseline_month_key(target_date.year, target_date.month)
+            update["$inc"] = {f"months.{key}.rate_sum": rate, f"months.{key}.count": 1}
+        
+        await self.db.consumption_baselines.update_one(
+            {"customer_id": doc["customer_id"], "product_code": doc["product_code"]},
+            update,
+            upsert=True
+        )
+    
+    def _expected_from_baseline(self, baseline: Optional[Dict], days: int, current_date: datetime) -> float:
+        """
+        Beklenen tüketim = günlük ortalama * gün sayısı
+        
+        Günlük ortalama bir önceki yılın aynı ayından; o ay için kayıt yoksa
+        son RECENT_WINDOW kaydın ortalamasından alınır.
+        """
+        if not baseline:
+            return 0.0
+        
+        month = baseline.get("months", {}).get(
+            self._baseline_month_key(current_date.year - 1, current_date.month)
+        )
+        if month and month.get("count"):
+            avg_daily_rate = month["rate_sum"] / month["count"]
+        else:
+            # En yeniden eskiye topla (önceki created_at sıralı sorguyla aynı)
+            recent_rates = baseline.get("recent_rates") or []
+            if not recent_rates:
+                return 0.0
+            avg_daily_rate = sum(reversed(recent_rates)) / len(recent_rates)
+        
+        return round(avg_daily_rate * days, 2)
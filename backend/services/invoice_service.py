@@ -8,6 +8,7 @@ from typing import Dict, List, Optional
 from repositories.invoice_repository import InvoiceRepository
 from repositories.product_repository import ProductRepository
 from services.customer_service import CustomerService
+from services.seftali.product_catalog import ProductCatalog
 from repositories.base_repository import AsyncIOMotorDatabase
 from models.invoice import Invoice, InvoiceProduct
 from bs4 import BeautifulSoup
@@ -72,6 +73,10 @@ class InvoiceService:
                 await self.product_repo.create_product(new_product)
                 products_created.append(product_data["product_name"])
         
+        # Make new products visible to the in-process product catalog
+        if products_created:
+            ProductCatalog.invalidate()
+        
         # 3. Create invoice
         invoice_obj = Invoice(
             invoice_number=invoice_data["invoice_number"],
@@ -3,14 +3,8 @@ Notification Service
 Otomatik bildirim oluşturma servisi
 """
 from datetime import datetime, timezone
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
 import uuid
-
-# MongoDB connection
-MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
-client = AsyncIOMotorClient(MONGO_URL)
-db = client[os.environ.get('DB_NAME', 'distribution_management')]
+from config.database import db
 
 async def create_notification(user_id: str, notification_type: str, title: str, message: str, 
                        related_order_id: str = None, related_campaign_id: str = None):
@@ -6,7 +6,9 @@ Haftalık ve aylık tüketim aggregation ve analiz servisi
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
 from models.consumption_period import ConsumptionPeriod, YearOverYearComparison, TrendAnalysis
+from services.consumption_calculation_service import target_period_fields
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,22 +20,16 @@ class PeriodicConsumptionService:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
     
-    def _get_week_number(self, date: datetime) -> int:
-        """ISO hafta numarasını döndür (1-52/53)"""
-        return date.isocalendar()[1]
+    # Periyot tipine göre tüketim kaydındaki gruplama alanları (yıl, periyot)
+    PERIOD_FIELDS = {
+        "weekly": ("target_iso_year", "target_iso_week"),
+        "monthly": ("target_year", "target_month"),
+    }
+    BACKFILL_CHUNK_SIZE = 1000
     
     def _get_week_start_end(self, year: int, week: int) -> tuple:
-        """Hafta başlangıç ve bitiş tarihlerini döndür"""
-        # ISO 8601: Hafta Pazartesi başlar
-        jan_1 = datetime(year, 1, 1)
-        # İlk Pazartesi'yi bul
-        days_to_monday = (7 - jan_1.weekday()) % 7
-        if days_to_monday == 0 and jan_1.weekday() != 0:
-            days_to_monday = 7
-        first_monday = jan_1 + timedelta(days=days_to_monday)
-        
-        # Hedef haftaya git
-        week_start = first_monday + timedelta(weeks=week - 1)
+        """ISO hafta yılı ve numarasından hafta başlangıç (Pazartesi) ve bitiş tarihleri"""
+        week_start = datetime.fromisocalendar(year, week, 1)
         week_end = week_start + timedelta(days=6)
         
         return week_start, week_end
@@ -50,17 +46,39 @@ class PeriodicConsumptionService:
         
         return month_start, month_end
     
-    def _parse_invoice_date(self, date_str: str) -> datetime:
-        """Fatura tarihini parse et (DD MM YYYY formatı)"""
-        try:
-            parts = date_str.replace("-", " ").replace("/", " ").split()
-            if len(parts) == 3:
-                day, month, year = parts
-                return datetime(int(year), int(month), int(day))
-        except Exception as e:
-            logger.error(f"Date parsing error for {date_str}: {e}")
-        
-        return datetime.utcnow()
+    async def backfill_period_keys(self) -> int:
+        """
+        target_* periyot anahtarları olmayan tüketim kayıtlarını doldur
+        
+        Her kaydın target_invoice_date alanı bir kez çözülür; tarihi
+        çözülemeyen kayıtlar None anahtarla işaretlenir ve rollup'a girmez.
+        
+        Returns:
+            Güncellenen kayıt sayısı
+        """
+        updated = 0
+        ops = []
+        cursor = self.db.customer_consumption.find(
+            {"target_date_iso": {"$exists": False}},
+            {"_id": 1, "target_invoice_date": 1}
+        )
+        async for record in cursor:
+            ops.append(UpdateOne(
+                {"_id": record["_id"]},
+                {"$set": target_period_fields(record.get("target_invoice_date"))}
+            ))
+            if len(ops) >= self.BACKFILL_CHUNK_SIZE:
+                await self.db.customer_consumption.bulk_write(ops, ordered=False)
+                updated += len(ops)
+                ops = []
+        
+        if ops:
+            await self.db.customer_consumption.bulk_write(ops, ordered=False)
+            updated += len(ops)
+        
+        if updated:
+            logger.info(f"Backfilled period keys for {updated} consumption records")
+        return updated
     
     async def calculate_weekly_consumption(
         self, 
@@ -70,46 +88,14 @@ class PeriodicConsumptionService:
         week: int
     ) -> Optional[Dict]:
         """
-        Belirli bir hafta için tüketim hesapla
+        Belirli bir ISO hafta için tüketim hesapla
         """
         week_start, week_end = self._get_week_start_end(year, week)
-        
-        # Bu hafta içindeki tüketim kayıtlarını getir
-        cursor = self.db.customer_consumption.find(
-            {
-                "customer_id": customer_id,
-                "product_code": product_code,
-                "can_calculate": True
-            },
-            {"_id": 0}
+        return await self._calculate_period_consumption(
+            {"customer_id": customer_id, "product_code": product_code,
+             "target_iso_year": year, "target_iso_week": week},
+            week_start, week_end
         )
-        
-        records = await cursor.to_list(length=None)
-        
-        # Tarihleri parse et ve bu haftaya ait olanları filtrele
-        week_records = []
-        for record in records:
-            target_date_str = record.get("target_invoice_date", "")
-            target_date = self._parse_invoice_date(target_date_str)
-            
-            if week_start <= target_date <= week_end:
-                week_records.append(record)
-        
-        if not week_records:
-            return None
-        
-        # Toplam tüketim hesapla
-        total_consumption = sum(r.get("consumption_quantity", 0.0) for r in week_records)
-        days_in_week = 7
-        daily_average = total_consumption / days_in_week
-        
-        return {
-            "total_consumption": total_consumption,
-            "daily_average": daily_average,
-            "invoice_count": len(week_records),
-            "period_start": week_start.strftime("%Y-%m-%d"),
-            "period_end": week_end.strftime("%Y-%m-%d")
-        }
     
     async def calculate_monthly_consumption(
         self,
@@ -122,42 +108,38 @@ class PeriodicConsumptionService:
         Belirli bir ay için tüketim hesapla
         """
         month_start, month_end = self._get_month_start_end(year, month)
-        
-        # Bu ay içindeki tüketim kayıtlarını getir
+        return await self._calculate_period_consumption(
+            {"customer_id": customer_id, "product_code": product_code,
+             "target_year": year, "target_month": month},
+            month_start, month_end
+        )
+    
+    async def _calculate_period_consumption(
+        self,
+        period_filter: Dict,
+        period_start: datetime,
+        period_end: datetime
+    ) -> Optional[Dict]:
+        """Periyot anahtarlarıyla eşleşen tüketim kayıtlarının toplamı"""
         cursor = self.db.customer_consumption.find(
-            {
-                "customer_id": customer_id,
-                "product_code": product_code,
-                "can_calculate": True
-            },
-            {"_id": 0}
+            {**period_filter, "can_calculate": True},
+            {"_id": 0, "consumption_quantity": 1}
         )
-        
         records = await cursor.to_list(length=None)
         
-        # Tarihleri parse et ve bu aya ait olanları filtrele
-        month_records = []
-        for record in records:
-            target_date_str = record.get("target_invoice_date", "")
-            target_date = self._parse_invoice_date(target_date_str)
-            
-            if month_start <= target_date <= month_end:
-                month_records.append(record)
-        
-        if not month_records:
+        if not records:
             return None
         
         # Toplam tüketim hesapla
-        total_consumption = sum(r.get("consumption_quantity", 0.0) for r in month_records)
-        days_in_month = (month_end - month_start).days + 1
-        daily_average = total_consumption / days_in_month
+        total_consumption = sum(r.get("consumption_quantity", 0.0) for r in records)
+        days_in_period = (period_end - period_start).days + 1
         
         return {
             "total_consumption": total_consumption,
-            "daily_average": daily_average,
-            "invoice_count": len(month_records),
-            "period_start": month_start.strftime("%Y-%m-%d"),
-            "period_end": month_end.strftime("%Y-%m-%d")
+            "daily_average": total_consumption / days_in_period,
+            "invoice_count": len(records),
+            "period_start": period_start.strftime("%Y-%m-%d"),
+            "period_end": period_end.strftime("%Y-%m-%d")
         }
     
     async def generate_periodic_records(
@@ -166,165 +148,149 @@ class PeriodicConsumptionService:
     ) -> Dict:
         """
         Tüm müşteriler ve ürünler için periyodik kayıtlar oluştur
-        """
-        # Tüm tüketim kayıtlarını al
-        cursor = self.db.customer_consumption.find(
-            {"can_calculate": True},
-            {"_id": 0, "customer_id": 1, "product_code": 1, "product_name": 1, "target_invoice_date": 1}
-        )
         
-        records = await cursor.to_list(length=None)
+        Tek geçiş: tüketim kayıtları kayıtlı target_* periyot anahtarlarına
+        (haftalık: ISO yıl/hafta, aylık: yıl/ay) göre $group ile (müşteri,
+        ürün, yıl, periyot) kovalarında toplanır. Önceki periyot ve geçen yıl
+        karşılaştırmaları aynı kovalardan kaydırmayla bulunur; sonuçlar tek
+        bulk_write ile upsert edilir. Bu çalışmada yazılmayan (updated_at'i
+        çalışma başlangıcından eski) aynı tipteki kayıtlar artık hiçbir
+        kovaya düşmediğinden (ör. eski hafta numaralandırmasıyla yazılmış
+        haftalık kayıtlar) silinir.
+        """
+        await self.backfill_period_keys()
+        year_field, period_field = self.PERIOD_FIELDS[period_type]
+        
+        # (customer_id, product_code) -> {(yıl, periyot): toplam}
+        buckets: Dict[tuple, Dict[tuple, Dict]] = {}
+        product_names: Dict[tuple, str] = {}
+        
+        cursor = self.db.customer_consumption.aggregate([
+            {"$match": {"can_calculate": True, year_field: {"$ne": None}}},
+            {"$group": {
+                "_id": {
+                    "customer_id": "$customer_id",
+                    "product_code": "$product_code",
+                    "year": f"${year_field}",
+                    "period": f"${period_field}"
+                },
+                "product_name": {"$first": "$product_name"},
+                "total_consumption": {"$sum": "$consumption_quantity"},
+                "invoice_count": {"$sum": 1}
+            }}
+        ])
+        async for group in cursor:
+            key = group["_id"]
+            series_key = (key["customer_id"], key["product_code"])
+            product_names.setdefault(series_key, group.get("product_name"))
+            buckets.setdefault(series_key, {})[(key["year"], key["period"])] = {
+                "total_consumption": group["total_consumption"],
+                "invoice_count": group["invoice_count"]
+            }
+        
+        product_ids = {
+            product["sku"]: product["id"]
+            async for product in self.db.products.find(
+                {"sku": {"$in": list({code for _, code in buckets})}},
+                {"_id": 0, "sku": 1, "id": 1}
+            )
+            if product.get("id")
+        }
         
-        # Benzersiz müşteri-ürün-periyot kombinasyonları
-        combinations = set()
-        for record in records:
-            target_date = self._parse_invoice_date(record.get("target_invoice_date", ""))
-            year = target_date.year
-            
-            if period_type == "weekly":
-                period_num = self._get_week_number(target_date)
-            else:  # monthly
-                period_num = target_date.month
-            
-            combinations.add((
-                record.get("customer_id"),
-                record.get("product_code"),
-                record.get("product_name"),
-                year,
-                period_num
-            ))
+        now = datetime.utcnow().isoformat()
+        ops = []
+        for (customer_id, product_code), periods in buckets.items():
+            for (year, period_num), bucket in periods.items():
+                if period_type == "weekly":
+                    period_start, period_end = self._get_week_start_end(year, period_num)
+                else:
+                    period_start, period_end = self._get_month_start_end(year, period_num)
+                
+                total_consumption = bucket["total_consumption"]
+                
+                # Önceki periyot (aynı yıl içinde) ve geçen yılın aynı periyodu
+                previous = periods.get((year, period_num - 1)) if period_num > 1 else None
+                previous_year = periods.get((year - 1, period_num))
+                
+                previous_period_consumption = previous["total_consumption"] if previous else None
+                period_over_period_change = self._change_rate(total_consumption, previous_period_consumption)
+                previous_year_consumption = previous_year["total_consumption"] if previous_year else None
+                year_over_year_change = self._change_rate(total_consumption, previous_year_consumption)
+                
+                # Trend direction
+                trend_direction = "stable"
+                if year_over_year_change:
+                    if year_over_year_change > 10:
+                        trend_direction = "increasing"
+                    elif year_over_year_change < -10:
+                        trend_direction = "decreasing"
+                
+                # ConsumptionPeriod oluştur
+                period_record = ConsumptionPeriod(
+                    customer_id=customer_id,
+                    product_id=product_ids.get(product_code, product_code),
+                    product_code=product_code,
+                    product_name=product_names[(customer_id, product_code)],
+                    period_type=period_type,
+                    period_year=year,
+                    period_number=period_num,
+                    period_start_date=period_start.strftime("%Y-%m-%d"),
+                    period_end_date=period_end.strftime("%Y-%m-%d"),
+                    total_consumption=total_consumption,
+                    daily_average=total_consumption / ((period_end - period_start).days + 1),
+                    invoice_count=bucket["invoice_count"],
+                    previous_period_consumption=previous_period_consumption,
+                    previous_year_same_period=previous_year_consumption,
+                    period_over_period_change=period_over_period_change,
+                    year_over_year_change=year_over_year_change,
+                    trend_direction=trend_direction
+                )
+                
+                doc = period_record.model_dump()
+                # Mevcut kaydın period_id ve created_at alanları korunur
+                on_insert = {"period_id": doc.pop("period_id"), "created_at": now}
+                doc.pop("created_at")
+                doc["updated_at"] = now
+                
+                ops.append(UpdateOne(
+                    {
+                        "customer_id": customer_id,
+                        "product_code": product_code,
+                        "period_type": period_type,
+                        "period_year": year,
+                        "period_number": period_num
+                    },
+                    {"$set": doc, "$setOnInsert": on_insert},
+                    upsert=True
+                ))
         
         created_count = 0
         updated_count = 0
+        if ops:
+            result = await self.db.consumption_periods.bulk_write(ops, ordered=False)
+            created_count = result.upserted_count
+            updated_count = len(ops) - created_count
         
-        # Her kombinasyon için periyodik kayıt oluştur
-        for customer_id, product_code, product_name, year, period_num in combinations:
-            # Ürün ID'sini bul
-            product = await self.db.products.find_one(
-                {"sku": product_code},
-                {"_id": 0, "id": 1}
-            )
-            product_id = product.get("id") if product else product_code
-            
-            # Tüketim hesapla
-            if period_type == "weekly":
-                consumption_data = await self.calculate_weekly_consumption(
-                    customer_id, product_code, year, period_num
-                )
-            else:
-                consumption_data = await self.calculate_monthly_consumption(
-                    customer_id, product_code, year, period_num
-                )
-            
-            if not consumption_data:
-                continue
-            
-            # Önceki periyot verilerini al (karşılaştırma için)
-            if period_type == "weekly":
-                prev_period_num = period_num - 1 if period_num > 1 else None
-            else:
-                prev_period_num = period_num - 1 if period_num > 1 else None
-            
-            previous_period_consumption = None
-            period_over_period_change = None
-            
-            if prev_period_num:
-                prev_data = await self.db.consumption_periods.find_one({
-                    "customer_id": customer_id,
-                    "product_code": product_code,
-                    "period_type": period_type,
-                    "period_year": year,
-                    "period_number": prev_period_num
-                })
-                
-                if prev_data:
-                    previous_period_consumption = prev_data.get("total_consumption", 0)
-                    if previous_period_consumption > 0:
-                        period_over_period_change = (
-                            (consumption_data["total_consumption"] - previous_period_consumption) 
-                            / previous_period_consumption
-                        ) * 100
-            
-            # Geçen yılın aynı periyodu
-            previous_year_consumption = None
-            year_over_year_change = None
-            
-            prev_year_data = await self.db.consumption_periods.find_one({
-                "customer_id": customer_id,
-                "product_code": product_code,
-                "period_type": period_type,
-                "period_year": year - 1,
-                "period_number": period_num
-            })
-            
-            if prev_year_data:
-                previous_year_consumption = prev_year_data.get("total_consumption", 0)
-                if previous_year_consumption > 0:
-                    year_over_year_change = (
-                        (consumption_data["total_consumption"] - previous_year_consumption)
-                        / previous_year_consumption
-                    ) * 100
-            
-            # Trend direction
-            trend_direction = "stable"
-            if year_over_year_change:
-                if year_over_year_change > 10:
-                    trend_direction = "increasing"
-                elif year_over_year_change < -10:
-                    trend_direction = "decreasing"
-            
-            # ConsumptionPeriod oluştur
-            period_record = ConsumptionPeriod(
-                customer_id=customer_id,
-                product_id=product_id,
-                product_code=product_code,
-                product_name=product_name,
-                period_type=period_type,
-                period_year=year,
-                period_number=period_num,
-                period_start_date=consumption_data["period_start"],
-                period_end_date=consumption_data["period_end"],
-                total_consumption=consumption_data["total_consumption"],
-                daily_average=consumption_data["daily_average"],
-                invoice_count=consumption_data["invoice_count"],
-                previous_period_consumption=previous_period_consumption,
-                previous_year_same_period=previous_year_consumption,
-                period_over_period_change=period_over_period_change,
-                year_over_year_change=year_over_year_change,
-                trend_direction=trend_direction
-            )
-            
-            doc = period_record.model_dump()
-            doc['created_at'] = doc['created_at'].isoformat()
-            doc['updated_at'] = doc['updated_at'].isoformat()
-            
-            # Mevcut kayıt var mı kontrol et
-            existing = await self.db.consumption_periods.find_one({
-                "customer_id": customer_id,
-                "product_code": product_code,
-                "period_type": period_type,
-                "period_year": year,
-                "period_number": period_num
-            })
-            
-            if existing:
-                await self.db.consumption_periods.update_one(
-                    {"period_id": existing["period_id"]},
-                    {"$set": doc}
-                )
-                updated_count += 1
-            else:
-                await self.db.consumption_periods.insert_one(doc)
-                created_count += 1
+        stale = await self.db.consumption_periods.delete_many({
+            "period_type": period_type,
+            "updated_at": {"$not": {"$gte": now}}
+        })
         
         return {
             "success": True,
             "period_type": period_type,
             "created": created_count,
             "updated": updated_count,
+            "removed": stale.deleted_count,
             "total": created_count + updated_count
         }
     
+    def _change_rate(self, current: float, previous: Optional[float]) -> Optional[float]:
+        """Yüzde değişim (önceki değer yoksa veya sıfırsa None)"""
+        if not previous or previous <= 0:
+            return None
+        return ((current - previous) / previous) * 100
+    
     async def compare_year_over_year(
         self,
         customer_id: str,
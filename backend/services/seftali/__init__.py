@@ -6,7 +6,13 @@ Bu paket, ŞEFTALİ dağıtım yönetim sisteminin temel servislerini içerir.
 Modüller:
 - core: Temel yardımcı fonksiyonlar ve sabitler
 - draft_engine: Draft Engine 2.0 hesaplama motoru
+- draft_queue: Birleştirmeli draft yenileme kuyruğu
+- delivery_acceptance: Outbox ile teslimat onayı
+- variance_actions: Toplu varyans neden / kapatma
+- consumption_series: Gruplanmış, sayfalı günlük tüketim serisi
 - order_service: Plasiyer sipariş hesaplama servisi
+- customer_summary: Müşteri kartı özetleri
+- product_catalog: Süreç içi ürün kataloğu önbelleği
 """
 
 from .core import (
@@ -14,6 +20,7 @@ from .core import (
     to_iso,
     parse_date,
     get_route_info,
+    lookup_route_info,
     DAY_MAP,
     WEEKDAY_NAMES,
     SMA_WINDOW,
@@ -21,10 +28,18 @@ from .core import (
     std_resp,
     gen_id,
     get_product_by_id,
+    ensure_indexes,
+    INDEXES,
 )
 
 from .draft_engine import DraftEngine
+from .draft_queue import DraftQueue
+from .delivery_acceptance import DeliveryAcceptance
+from .variance_actions import VarianceActions
+from .consumption_series import ConsumptionSeries
 from .order_service import OrderService
+from .customer_summary import CustomerSummaryService
+from .product_catalog import ProductCatalog
 
 __all__ = [
     # Core utilities
@@ -32,6 +47,7 @@ __all__ = [
     'to_iso',
     'parse_date',
     'get_route_info',
+    'lookup_route_info',
     'DAY_MAP',
     'WEEKDAY_NAMES',
     'SMA_WINDOW',
@@ -39,8 +55,16 @@ __all__ = [
     'std_resp',
     'gen_id',
     'get_product_by_id',
+    'ensure_indexes',
+    'INDEXES',
     
     # Services
     'DraftEngine',
+    'DraftQueue',
+    'DeliveryAcceptance',
+    'VarianceActions',
+    'ConsumptionSeries',
     'OrderService',
+    'CustomerSummaryService',
+    'ProductCatalog',
 ]
@@ -0,0 +1,202 @@
+"""
+ŞEFTALİ - Günlük Tüketim Serisi
+sf_daily_consumption kayıtlarını grafik için sunucu tarafında gruplar
+
+Kayıtlar (ürün başına günde bir satır) tek aggregation ile gün / hafta /
+ay kovalarına toplanır ($dateTrunc, hafta pazartesi başlar). Sayfalar kova
+başlangıç tarihine göre cursor ile ilerler; cursor'dan sonraki ilk kova
+başlangıcı $match'e tarih alt sınırı olarak eklenir ve indeks kullanılır.
+points verilirse sayfa LTTB (Largest-Triangle-Three-Buckets) ile en fazla
+o kadar noktaya indirgenir; grafik yükü geçmişin uzunluğundan bağımsızdır.
+
+Kullanım:
+    page = await ConsumptionSeries.get(customer_id, bucket="week", product_id=pid)
+    page = await ConsumptionSeries.get(customer_id, bucket="day", points=200)
+    page["points"], page["next_cursor"]
+
+$dateTrunc MongoDB 5.0+ gerektirir.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List, Any, Optional
+
+from config.database import db
+
+from .core import COL_DAILY_CONSUMPTION
+
+
+def lttb(points: List[dict], threshold: int, y_key: str = "total") -> List[dict]:
+    """
+    Largest-Triangle-Three-Buckets ile seriyi threshold noktaya indir.
+
+    İlk ve son nokta korunur; aradaki her kovadan, önceki seçilen nokta
+    ve sonraki kovanın ortalamasıyla en büyük üçgeni oluşturan nokta
+    seçilir. x ekseni noktaların tarihidir (date, YYYY-MM-DD).
+
+    Args:
+        points: Tarihe göre sıralı noktalar
+        threshold: İstenen en fazla nokta sayısı (< 3 ise indirgeme yapılmaz)
+        y_key: y değeri alanı
+
+    Returns:
+        Seçilen noktalar (orijinal dict'ler, sıra korunur)
+    """
+    n = len(points)
+    if threshold < 3 or n <= threshold:
+        return list(points)
+
+    xs = [date.fromisoformat(p["date"]).toordinal() for p in points]
+    ys = [p.get(y_key) or 0 for p in points]
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Sonraki kovanın ortalaması (üçgenin üçüncü köşesi)
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        # Bu kovada en büyük üçgeni oluşturan nokta
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+class ConsumptionSeries:
+    """
+    Kovalara gruplanmış, sayfalı günlük tüketim serisi.
+
+    Her nokta: {"date": kova başlangıcı, "total": toplam tüketim,
+    "count": satır sayısı, "avg": total / count}
+    """
+
+    BUCKETS = ("day", "week", "month")
+    DEFAULT_PAGE_SIZE = 500
+    MAX_PAGE_SIZE = 5000
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    @classmethod
+    async def get(
+        cls,
+        customer_id: str,
+        bucket: str = "day",
+        product_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        points: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Tüketim serisinin bir sayfasını getir.
+
+        Args:
+            customer_id: Müşteri ID'si
+            bucket: Kova (day, week, month)
+            product_id: Tek ürün (None = tüm ürünlerin toplamı)
+            date_from / date_to: YYYY-MM-DD aralığı (dahil)
+            cursor: Önceki sayfanın next_cursor değeri
+            limit: Sayfadaki en fazla kova
+            points: Verilirse sayfa LTTB ile bu kadar noktaya indirgenir
+
+        Returns:
+            {"bucket", "points", "next_cursor", "source_points"}
+
+        Raises:
+            ValueError: Geçersiz kova veya cursor
+        """
+        if bucket not in cls.BUCKETS:
+            raise ValueError(f"Geçersiz kova: {bucket}")
+        limit = max(1, min(limit, cls.MAX_PAGE_SIZE))
+
+        match: Dict[str, Any] = {"customer_id": customer_id}
+        if product_id:
+            match["product_id"] = product_id
+        date_q: Dict[str, str] = {}
+        if date_from:
+            date_q["$gte"] = date_from
+        if cursor:
+            after = cls._next_bucket_start(cursor, bucket)
+            date_q["$gte"] = max(date_q.get("$gte", after), after)
+        if date_to:
+            date_q["$lte"] = date_to
+        if date_q:
+            match["date"] = date_q
+
+        rows = await db[COL_DAILY_CONSUMPTION].aggregate(
+            cls._pipeline(match, bucket, limit + 1)
+        ).to_list(limit + 1)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1]["date"]
+
+        return {
+            "bucket": bucket,
+            "points": lttb(rows, points) if points else rows,
+            "next_cursor": next_cursor,
+            "source_points": len(rows),
+        }
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    @classmethod
+    def _pipeline(cls, match: Dict[str, Any], bucket: str, limit: int) -> List[dict]:
+        """Eşle → kova başlangıcına göre grupla → sırala → sınırla."""
+        trunc: Dict[str, Any] = {
+            "date": {"$dateFromString": {"dateString": "$date", "format": "%Y-%m-%d"}},
+            "unit": bucket,
+        }
+        if bucket == "week":
+            trunc["startOfWeek"] = "monday"
+
+        return [
+            {"$match": match},
+            {"$group": {
+                "_id": {"$dateTrunc": trunc},
+                "total": {"$sum": "$consumption"},
+                "count": {"$sum": 1},
+            }},
+            {"$sort": {"_id": 1}},
+            {"$limit": limit},
+            {"$project": {
+                "_id": 0,
+                "date": {"$dateToString": {"date": "$_id", "format": "%Y-%m-%d"}},
+                "total": {"$round": ["$total", 4]},
+                "count": 1,
+                "avg": {"$round": [{"$divide": ["$total", "$count"]}, 4]},
+            }},
+        ]
+
+    @classmethod
+    def _next_bucket_start(cls, cursor: str, bucket: str) -> str:
+        """Cursor kovasından sonraki kovanın başlangıç tarihi (YYYY-MM-DD)."""
+        try:
+            start = date.fromisoformat(cursor)
+        except (TypeError, ValueError):
+            raise ValueError(f"Geçersiz cursor: {cursor}")
+
+        if bucket == "day":
+            return (start + timedelta(days=1)).isoformat()
+        if bucket == "week":
+            return (start + timedelta(days=7)).isoformat()
+        if start.month == 12:
+            return date(start.year + 1, 1, 1).isoformat()
+        return date(start.year, start.month + 1, 1).isoformat()
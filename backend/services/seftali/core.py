@@ -2,8 +2,9 @@
 ŞEFTALİ - Core Utilities
 Temel yardımcı fonksiyonlar ve sabitler
 """
-from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional
+from datetime import date, datetime, timezone, timedelta
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Optional
 import uuid
 
 # =============================================================================
@@ -48,6 +49,159 @@ COL_DE_MULTIPLIERS = "de_weekly_product_multipliers"
 # Variance collections
 COL_VARIANCE_EVENTS = "sf_variance_events"
 
+# Materialized views
+COL_CUSTOMER_SUMMARY = "sf_customer_summary"
+
+# Consumption collections
+COL_DAILY_CONSUMPTION = "sf_daily_consumption"
+COL_CONSUMPTION_STATS = "sf_consumption_stats"
+COL_INVOICES = "invoices"
+COL_INVOICE_PURCHASES = "invoice_purchases"
+COL_CUSTOMER_CONSUMPTION = "customer_consumption"
+COL_CONSUMPTION_BASELINES = "consumption_baselines"
+COL_CONSUMPTION_PERIODS = "consumption_periods"
+
+
+# =============================================================================
+# INDEX REGISTRY
+# =============================================================================
+
+# Koleksiyon başına indeksler: {"keys": [(alan, yön), ...], ...create_index seçenekleri}
+# Uygulama açılışında ensure_indexes() ile idempotent olarak oluşturulur;
+# sıcak sorguların indeks kullandığı scripts/check_indexes.py ile doğrulanır.
+INDEXES: Dict[str, List[dict]] = {
+    COL_USERS: [
+        {"keys": [("id", 1)]},
+        {"keys": [("username", 1)]},
+    ],
+    COL_PRODUCTS: [
+        {"keys": [("product_id", 1)]},
+        {"keys": [("id", 1)]},
+    ],
+    COL_CUSTOMERS: [
+        {"keys": [("id", 1)]},
+        {"keys": [("user_id", 1)], "unique": True},
+        {"keys": [("is_active", 1)]},
+        {"keys": [("salesperson_id", 1), ("route_plan.days", 1), ("is_active", 1)]},
+        {"keys": [("route_plan.days", 1), ("is_active", 1)]},
+    ],
+    COL_DELIVERIES: [
+        {"keys": [("id", 1)]},
+        {"keys": [("customer_id", 1), ("delivered_at", -1)]},
+        {"keys": [("customer_id", 1), ("acceptance_status", 1)]},
+        {"keys": [("acceptance_status", 1), ("delivered_at", -1)]},
+        {"keys": [("delivered_at", -1)]},
+        # Teslimat onayı outbox'ı: yalnızca tamamlanmamış onaylarda bulunur
+        {"keys": [("post_accept_pending", 1), ("accepted_at", 1)],
+         "partialFilterExpression": {"post_accept_pending": True}},
+    ],
+    COL_AUDIT_EVENTS: [
+        {"keys": [("delivery_id", 1), ("type", 1)]},
+    ],
+    COL_ORDERS: [
+        {"keys": [("id", 1)]},
+        {"keys": [("customer_id", 1), ("status", 1), ("created_at", -1)]},
+        {"keys": [("status", 1), ("created_at", -1)]},
+        {"keys": [("created_at", -1)]},
+    ],
+    COL_SYSTEM_DRAFTS: [
+        {"keys": [("customer_id", 1)]},
+    ],
+    COL_WORKING_COPIES: [
+        {"keys": [("id", 1)]},
+        {"keys": [("customer_id", 1), ("status", 1)]},
+    ],
+    COL_CAMPAIGNS: [
+        {"keys": [("id", 1)]},
+        {"keys": [("status", 1), ("created_at", -1)]},
+    ],
+    COL_STOCK_DECLARATIONS: [
+        {"keys": [("customer_id", 1), ("declared_at", -1)]},
+    ],
+    COL_PLASIYER_STOCK: [
+        {"keys": [("salesperson_id", 1)]},
+    ],
+    COL_WAREHOUSE_STOCK: [
+        {"keys": [("depo_no", 1), ("product_id", 1)]},
+        {"keys": [("product_id", 1)]},
+    ],
+    COL_VARIANCE_EVENTS: [
+        {"keys": [("id", 1)]},
+        {"keys": [("customer_id", 1), ("status", 1)]},
+        {"keys": [("customer_id", 1), ("product_id", 1), ("detected_at", -1)]},
+        {"keys": [("trigger.type", 1), ("trigger.ref_id", 1), ("product_id", 1)], "unique": True},
+        {"keys": [("detected_at", -1)]},
+    ],
+    COL_DE_STATE: [
+        {"keys": [("customer_id", 1), ("product_id", 1)]},
+        {"keys": [("customer_id", 1), ("is_active", 1)]},
+    ],
+    COL_DE_MULTIPLIERS: [
+        {"keys": [("week_start", 1), ("product_id", 1)]},
+    ],
+    COL_CUSTOMER_SUMMARY: [
+        {"keys": [("customer_id", 1)], "unique": True},
+    ],
+    COL_DAILY_CONSUMPTION: [
+        {"keys": [("customer_id", 1), ("product_id", 1), ("date", 1)], "unique": True},
+        {"keys": [("customer_id", 1), ("date", 1)]},
+    ],
+    COL_CONSUMPTION_STATS: [
+        {"keys": [("customer_id", 1), ("product_id", 1)], "unique": True},
+        {"keys": [("customer_id", 1), ("spike.detected_at", -1)]},
+    ],
+    COL_INVOICES: [
+        {"keys": [("id", 1)]},
+        {"keys": [("customer_id", 1), ("is_active", 1)]},
+        {"keys": [("is_active", 1), ("invoice_date_iso", 1)]},
+    ],
+    COL_INVOICE_PURCHASES: [
+        {"keys": [("customer_id", 1), ("product_code", 1), ("invoice_date_iso", -1)]},
+        {"keys": [("invoice_id", 1), ("product_code", 1)], "unique": True},
+    ],
+    COL_CUSTOMER_CONSUMPTION: [
+        {"keys": [("customer_id", 1), ("product_code", 1), ("target_invoice_id", 1)]},
+        {"keys": [("customer_id", 1), ("product_code", 1), ("target_year", 1), ("target_month", 1)]},
+        {"keys": [("customer_id", 1), ("product_code", 1), ("target_iso_year", 1), ("target_iso_week", 1)]},
+        {"keys": [("can_calculate", 1)]},
+    ],
+    COL_CONSUMPTION_BASELINES: [
+        {"keys": [("customer_id", 1), ("product_code", 1)], "unique": True},
+    ],
+    COL_CONSUMPTION_PERIODS: [
+        {"keys": [("customer_id", 1), ("product_code", 1), ("period_type", 1),
+                  ("period_year", 1), ("period_number", 1)]},
+    ],
+}
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """
+    INDEXES kayıt defterindeki tüm indeksleri oluştur (idempotent).
+    
+    Var olan indeksler için create_index bir şey yapmaz. Çakışan seçenekli
+    veya veri nedeniyle oluşturulamayan (ör. unique ihlali) indeksler
+    atlanır ve sonuçta raporlanır; açılışı durdurmaz.
+    
+    Args:
+        db: Database instance
+        
+    Returns:
+        {"ensured": ["koleksiyon.isim", ...], "failed": ["koleksiyon.anahtarlar: hata", ...]}
+    """
+    from pymongo.errors import OperationFailure
+    
+    result: Dict[str, List[str]] = {"ensured": [], "failed": []}
+    for collection, specs in INDEXES.items():
+        for spec in specs:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            try:
+                name = await db[collection].create_index(spec["keys"], **options)
+                result["ensured"].append(f"{collection}.{name}")
+            except OperationFailure as exc:
+                result["failed"].append(f"{collection}.{spec['keys']}: {exc}")
+    return result
+
 
 # =============================================================================
 # DATE/TIME UTILITIES
@@ -87,30 +241,21 @@ def parse_date(date_str) -> Optional[datetime.date]:
 # ROUTE UTILITIES
 # =============================================================================
 
-def get_route_info(route_days: List[str]) -> Dict[str, int]:
+def _compute_route_info(route_weekdays: List[int], today_weekday: int) -> Dict[str, int]:
     """
-    Rota günlerinden hesaplama bilgilerini çıkar.
+    Rota hafta günleri ve bugünün hafta gününden hesaplama bilgilerini çıkar.
     
     Args:
-        route_days: Rota günleri listesi (örn: ["TUE", "SAT"])
-        
-    Returns:
-        {
-            "days_to_next_route": int,  # Sonraki rotaya gün sayısı
-            "supply_days": int,         # Ardışık rotalar arası gün
-            "next_route_weekday": int   # Sonraki rota günü (0=Pzt)
-        }
+        route_weekdays: Sıralı, tekrarsız rota hafta günleri (0=Pzt)
+        today_weekday: Bugünün hafta günü (0=Pzt)
     """
-    if not route_days:
+    if not route_weekdays:
         return {
             "days_to_next_route": 7, 
             "supply_days": 7, 
             "next_route_weekday": None
         }
     
-    today_weekday = now_utc().weekday()
-    route_weekdays = sorted(set(DAY_MAP.get(d, 0) for d in route_days))
-    
     # Days to next route
     min_days = 8
     next_route_wd = None
@@ -144,6 +289,48 @@ def get_route_info(route_days: List[str]) -> Dict[str, int]:
     }
 
 
+# (rota günleri bit maskesi, bugünün hafta günü) -> salt okunur route info
+# 128 gün kümesi x 7 hafta günü, import sırasında bir kez hesaplanır.
+_ROUTE_INFO_TABLE: Dict[tuple, Mapping[str, int]] = {
+    (mask, weekday): MappingProxyType(
+        _compute_route_info([wd for wd in range(7) if mask >> wd & 1], weekday)
+    )
+    for mask in range(128)
+    for weekday in range(7)
+}
+
+
+def lookup_route_info(route_days: List[str], today: date) -> Mapping[str, int]:
+    """
+    Rota günlerinden hesaplama bilgilerini önceden hesaplanmış tablodan getir.
+    
+    Args:
+        route_days: Rota günleri listesi (örn: ["TUE", "SAT"])
+        today: Hesaplama günü (date/datetime)
+        
+    Returns:
+        Salt okunur mapping (değiştirilecekse dict() ile kopyalanmalı):
+        {
+            "days_to_next_route": int,  # Sonraki rotaya gün sayısı
+            "supply_days": int,         # Ardışık rotalar arası gün
+            "next_route_weekday": int   # Sonraki rota günü (0=Pzt)
+        }
+    """
+    mask = 0
+    for d in route_days or ():
+        mask |= 1 << DAY_MAP.get(d, 0)
+    return _ROUTE_INFO_TABLE[(mask, today.weekday())]
+
+
+def get_route_info(route_days: List[str]) -> Mapping[str, int]:
+    """
+    Rota günlerinden bugüne göre hesaplama bilgilerini çıkar.
+    
+    lookup_route_info(route_days, now_utc()) kısayolu.
+    """
+    return lookup_route_info(route_days, now_utc())
+
+
 def days_between_routes(route_days: List[str]) -> int:
     """
     Ardışık rota günleri arasındaki minimum gün sayısını hesapla.
@@ -194,21 +381,21 @@ def std_resp(success: bool, data=None, message: str = "") -> dict:
 # PRODUCT UTILITIES
 # =============================================================================
 
-async def get_product_by_id(db, product_id: str) -> Optional[dict]:
+async def get_product_by_id(product_id: str) -> Optional[dict]:
     """
     Ürünü ID'ye göre getir.
     
+    Ürün, süreç içi ProductCatalog önbelleğinden okunur.
+    
     Args:
-        db: Database instance
         product_id: Ürün ID'si
         
     Returns:
         Ürün bilgileri veya None
     """
-    product = await db[COL_PRODUCTS].find_one(
-        {"product_id": product_id}, 
-        {"_id": 0}
-    )
+    from .product_catalog import ProductCatalog
+    
+    product = await ProductCatalog.get(product_id)
     
     if product:
         return {
@@ -0,0 +1,256 @@
+"""
+ŞEFTALİ - Müşteri Kartı Özet Servisi
+Plasiyer müşteri kartları için sipariş / teslimat özetleri
+
+Özetler sf_orders (sayımlar, bekleyen sipariş önizlemesi) ve sf_deliveries
+üzerinde customer_id'ye göre gruplanan aggregation'larla hesaplanır ve
+müşterilerle bellekte birleştirilir.
+
+Opsiyonel olarak (CUSTOMER_SUMMARY_MATERIALIZED=True) özetler
+sf_customer_summary koleksiyonunda tutulur; sipariş/teslimat yazımlarında
+sadece ilgili müşterinin özeti yenilenir ve kart görünümü tek bir
+$lookup sorgusuyla okunur.
+
+Zamana bağlı alanlar (vadesi geçmiş teslimat sayısı, son siparişten bu
+yana geçen gün) her okumada hesaplanır.
+"""
+
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from config.database import db
+from config.settings import settings
+
+from .core import (
+    now_utc, to_iso,
+    COL_CUSTOMERS, COL_ORDERS, COL_DELIVERIES, COL_CUSTOMER_SUMMARY
+)
+
+
+class CustomerSummaryService:
+    """
+    Müşteri kartı özet servisi.
+
+    Kullanım:
+        cards = await CustomerSummaryService.get_cards()
+        await CustomerSummaryService.refresh(customer_id)   # yazımlardan sonra
+        await CustomerSummaryService.rebuild()              # tam yeniden oluşturma
+    """
+
+    PENDING_ORDER_STATUSES = ["submitted", "approved"]
+    PENDING_ORDERS_PREVIEW = 3
+    OVERDUE_DAYS = 7
+    REBUILD_BATCH_SIZE = 1000
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    @classmethod
+    def is_materialized(cls) -> bool:
+        return settings.CUSTOMER_SUMMARY_MATERIALIZED
+
+    @classmethod
+    async def get_cards(cls) -> List[dict]:
+        """
+        Tüm aktif müşterilerin kart özetlerini getir.
+
+        Returns:
+            Müşteri dokümanı + özet alanları listesi
+        """
+        now = now_utc()
+
+        if cls.is_materialized():
+            cursor = db[COL_CUSTOMERS].aggregate([
+                {"$match": {"is_active": True}},
+                {"$lookup": {
+                    "from": COL_CUSTOMER_SUMMARY,
+                    "localField": "id",
+                    "foreignField": "customer_id",
+                    "as": "_summary"
+                }},
+                {"$project": {"_id": 0, "_summary._id": 0}}
+            ])
+            cards = []
+            async for cust in cursor:
+                summary = cust.pop("_summary")
+                cards.append(cls._to_card(cust, summary[0] if summary else None, now))
+            return cards
+
+        customers = [c async for c in db[COL_CUSTOMERS].find({"is_active": True}, {"_id": 0})]
+        summaries = await cls._aggregate()
+        return [cls._to_card(c, summaries.get(c["id"]), now) for c in customers]
+
+    @classmethod
+    async def refresh(cls, customer_id: str) -> None:
+        """
+        Tek müşterinin materyalize özetini yenile.
+
+        Materyalize mod kapalıysa bir şey yapmaz.
+        """
+        if not cls.is_materialized():
+            return
+
+        summaries = await cls._aggregate([customer_id])
+        summary = summaries.get(customer_id) or cls._empty_summary()
+        await db[COL_CUSTOMER_SUMMARY].update_one(
+            {"customer_id": customer_id},
+            {"$set": {**summary, "customer_id": customer_id, "updated_at": to_iso(now_utc())}},
+            upsert=True
+        )
+
+    @classmethod
+    async def rebuild(cls) -> int:
+        """
+        Tüm müşterilerin materyalize özetlerini yeniden oluştur.
+
+        Returns:
+            Yazılan özet sayısı
+        """
+        summaries = await cls._aggregate()
+        now = to_iso(now_utc())
+
+        ops = []
+        written = 0
+        async for cust in db[COL_CUSTOMERS].find({}, {"_id": 0, "id": 1}):
+            cid = cust["id"]
+            summary = summaries.get(cid) or cls._empty_summary()
+            ops.append(UpdateOne(
+                {"customer_id": cid},
+                {"$set": {**summary, "customer_id": cid, "updated_at": now}},
+                upsert=True
+            ))
+            if len(ops) >= cls.REBUILD_BATCH_SIZE:
+                await db[COL_CUSTOMER_SUMMARY].bulk_write(ops, ordered=False)
+                written += len(ops)
+                ops = []
+        if ops:
+            await db[COL_CUSTOMER_SUMMARY].bulk_write(ops, ordered=False)
+            written += len(ops)
+        return written
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    @classmethod
+    async def _aggregate(cls, customer_ids: Optional[List[str]] = None) -> Dict[str, dict]:
+        """
+        Sipariş ve teslimat özetlerini customer_id bazında hesapla.
+
+        Args:
+            customer_ids: Sadece bu müşteriler (None ise tümü)
+
+        Returns:
+            {customer_id: özet}
+        """
+        match = [{"$match": {"customer_id": {"$in": customer_ids}}}] if customer_ids is not None else []
+
+        orders_pipeline = match + [
+            {"$group": {
+                "_id": "$customer_id",
+                "total_orders": {"$sum": 1},
+                "last_order_date": {"$max": "$created_at"}
+            }}
+        ]
+
+        # Bekleyen sipariş sayısı ve önizlemesi aynı aggregation'dan (aynı
+        # anlık görüntü), en yeniler önce: grup belleği müşterinin tüm
+        # siparişleriyle değil bekleyenlerle sınırlı. Tüm müşterilerin
+        # sonucu tek dokümana sığmayabileceğinden $facet kullanılmaz.
+        # (customer_id, status, created_at) indeksi eşleme ve sıralamayı karşılar
+        pending_orders_pipeline = match + [
+            {"$match": {"status": {"$in": cls.PENDING_ORDER_STATUSES}}},
+            {"$sort": {"customer_id": 1, "created_at": -1}},
+            {"$group": {
+                "_id": "$customer_id",
+                "pending_orders_count": {"$sum": 1},
+                "pending_orders": {"$push": {
+                    "id": "$id", "status": "$status", "items": "$items", "created_at": "$created_at"
+                }}
+            }},
+            {"$project": {
+                "pending_orders_count": 1,
+                "pending_orders": {"$slice": ["$pending_orders", cls.PENDING_ORDERS_PREVIEW]}
+            }}
+        ]
+
+        deliveries_pipeline = match + [
+            {"$group": {
+                "_id": "$customer_id",
+                "total_deliveries": {"$sum": 1},
+                "last_delivery_date": {"$max": {"$cond": [
+                    {"$eq": ["$acceptance_status", "accepted"]}, "$delivered_at", None
+                ]}},
+                "pending_delivery_dates": {"$push": {"$cond": [
+                    {"$eq": ["$acceptance_status", "pending"]}, "$delivered_at", None
+                ]}}
+            }},
+            {"$project": {
+                "total_deliveries": 1,
+                "last_delivery_date": 1,
+                "pending_delivery_dates": {"$filter": {
+                    "input": "$pending_delivery_dates", "as": "d", "cond": {"$ne": ["$$d", None]}
+                }}
+            }}
+        ]
+
+        summaries: Dict[str, dict] = {}
+        async for row in db[COL_ORDERS].aggregate(orders_pipeline):
+            summary = summaries.setdefault(row.pop("_id"), cls._empty_summary())
+            summary.update(row)
+        async for row in db[COL_ORDERS].aggregate(pending_orders_pipeline):
+            summary = summaries.setdefault(row.pop("_id"), cls._empty_summary())
+            summary.update(row)
+        async for row in db[COL_DELIVERIES].aggregate(deliveries_pipeline):
+            summary = summaries.setdefault(row.pop("_id"), cls._empty_summary())
+            summary.update(row)
+        return summaries
+
+    @classmethod
+    def _empty_summary(cls) -> dict:
+        return {
+            "total_orders": 0,
+            "pending_orders_count": 0,
+            "pending_orders": [],
+            "last_order_date": None,
+            "total_deliveries": 0,
+            "last_delivery_date": None,
+            "pending_delivery_dates": []
+        }
+
+    @classmethod
+    def _to_card(cls, cust: dict, summary: Optional[dict], now: datetime) -> dict:
+        """Müşteri ve özetten kart verisini oluştur (zamana bağlı alanlar dahil)."""
+        summary = summary or cls._empty_summary()
+
+        # Vadesi geçmiş teslimatlar (beklemede olan ve 7 günden eski)
+        overdue_before = (now.replace(tzinfo=None) - timedelta(days=cls.OVERDUE_DAYS)).isoformat() + "Z"
+        overdue = sum(
+            1 for d in summary.get("pending_delivery_dates", [])
+            if isinstance(d, str) and d < overdue_before
+        )
+
+        # Son sipariş kaç gün önce
+        last_order_date = summary.get("last_order_date")
+        days_since_last_order = None
+        if last_order_date:
+            try:
+                last_date = datetime.fromisoformat(last_order_date.replace("Z", "+00:00"))
+                days_since_last_order = (datetime.now(last_date.tzinfo) - last_date).days
+            except (ValueError, AttributeError):
+                pass
+
+        return {
+            **cust,
+            "pending_orders_count": summary.get("pending_orders_count", 0),
+            "pending_orders": summary.get("pending_orders", []),
+            "total_orders": summary.get("total_orders", 0),
+            "overdue_deliveries_count": overdue,
+            "total_deliveries": summary.get("total_deliveries", 0),
+            "last_delivery_date": summary.get("last_delivery_date"),
+            "last_order_date": last_order_date,
+            "days_since_last_order": days_since_last_order
+        }
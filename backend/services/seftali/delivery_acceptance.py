@@ -0,0 +1,242 @@
+"""
+ŞEFTALİ - Teslimat Onayı
+Teslimat onayını istek akışında iki yazıma indiren, yan etkileri
+teslimat dokümanındaki outbox işaretiyle arka planda tamamlayan servis
+
+İstek akışı:
+    1. Koşullu durum değişimi (acceptance_status: pending filtrede) ve
+       post_accept_pending işareti tek atomik find_one_and_update ile yazılır.
+    2. Aktif çalışma kopyası tek update_many ile kapatılır.
+
+Arka plan (outbox):
+    Özet yenileme, son onaylı miktarların state'e yazımı, draft kuyruğu
+    ve audit kaydı idempotent adımlardır; bitince post_accept_pending
+    silinir. Süreç arada çökerse işaretli teslimatlar recover() ile
+    (açılışta ve RECOVERY_INTERVAL_SECONDS'de bir) yeniden tamamlanır.
+
+Replica set gerektiren çok dokümanlı transaction yerine outbox işareti
+durum değişimiyle aynı dokümanda tutulur; onaylanmış ama yan etkileri
+yazılmamış teslimat kalmaz.
+
+Kullanım:
+    result = await DeliveryAcceptance.accept(customer_id, delivery_id, user_id)
+    await DeliveryAcceptance.recover()     # bekleyen outbox kayıtları
+    await DeliveryAcceptance.flush()       # arka plan işlerini bekle (script/test)
+    DeliveryAcceptance.metrics()
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Dict, Any, Optional, Set
+
+from pymongo import ReturnDocument
+
+from config.database import db
+
+from .core import (
+    now_utc, to_iso,
+    COL_DELIVERIES, COL_WORKING_COPIES, COL_AUDIT_EVENTS
+)
+from .customer_summary import CustomerSummaryService
+from .draft_engine import DraftEngine
+from .draft_queue import DraftQueue
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryAcceptance:
+    """
+    Teslimat onayı + outbox ile arka plan tamamlama.
+
+    Outbox kaydı teslimat dokümanındaki post_accept_pending alanıdır;
+    yalnızca tamamlanmamış onaylarda bulunur (sparse indeks).
+    """
+
+    RECOVERY_INTERVAL_SECONDS = 60
+    RECOVERY_GRACE_SECONDS = 30
+    RECOVERY_BATCH_SIZE = 200
+
+    _tasks: Set[asyncio.Task] = set()
+    _worker: Optional[asyncio.Task] = None
+    _stats: Dict[str, int] = {
+        "accepted": 0,
+        "completed": 0,
+        "recovered": 0,
+        "errors": 0,
+    }
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    @classmethod
+    async def accept(cls, customer_id: str, delivery_id: str, performed_by: str) -> Optional[Dict[str, Any]]:
+        """
+        Bekleyen teslimatı onayla ve aktif çalışma kopyasını kapat.
+
+        Yan etkiler arka planda tamamlanır; çağıran beklemez.
+
+        Args:
+            customer_id: Müşteri ID'si
+            delivery_id: Teslimat ID'si
+            performed_by: Onaylayan kullanıcı ID'si
+
+        Returns:
+            {"delivery": teslimat, "working_copy_deleted": bool} veya
+            teslimat bulunamadı / bekleyen durumda değilse None
+        """
+        now = to_iso(now_utc())
+        delivery = await db[COL_DELIVERIES].find_one_and_update(
+            {"id": delivery_id, "customer_id": customer_id, "acceptance_status": "pending"},
+            {"$set": {
+                "acceptance_status": "accepted",
+                "accepted_at": now,
+                "accepted_by": performed_by,
+                "updated_at": now,
+                "post_accept_pending": True
+            }},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if not delivery:
+            return None
+
+        wc_deleted = await cls._close_working_copies(customer_id, now)
+        cls._stats["accepted"] += 1
+        cls._schedule(delivery)
+        return {"delivery": delivery, "working_copy_deleted": wc_deleted}
+
+    @classmethod
+    async def recover(cls, older_than_seconds: Optional[float] = None) -> int:
+        """
+        Yan etkileri tamamlanmamış onayları (outbox) işle.
+
+        Args:
+            older_than_seconds: Yalnızca bu kadar önce onaylananlar
+                (varsayılan RECOVERY_GRACE_SECONDS; 0 = hepsi)
+
+        Returns:
+            Tamamlanan teslimat sayısı
+        """
+        grace = cls.RECOVERY_GRACE_SECONDS if older_than_seconds is None else older_than_seconds
+        cutoff = to_iso(now_utc() - timedelta(seconds=grace))
+        cursor = db[COL_DELIVERIES].find(
+            {"post_accept_pending": True, "accepted_at": {"$lte": cutoff}},
+            {"_id": 0}
+        ).limit(cls.RECOVERY_BATCH_SIZE)
+
+        count = 0
+        async for delivery in cursor:
+            # Çalışma kopyası kapatılmadan çökülmüş olabilir
+            if await cls._complete(delivery, close_working_copies=True):
+                count += 1
+        cls._stats["recovered"] += count
+        return count
+
+    @classmethod
+    def start(cls) -> None:
+        """Periyodik recover worker'ını başlat (çalışıyorsa bir şey yapmaz)."""
+        if cls._worker and not cls._worker.done():
+            return
+        cls._worker = asyncio.get_running_loop().create_task(cls._run())
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Worker'ı durdur ve devam eden tamamlama işlerini bekle."""
+        if cls._worker and not cls._worker.done():
+            cls._worker.cancel()
+            try:
+                await cls._worker
+            except asyncio.CancelledError:
+                pass
+        cls._worker = None
+        await cls.flush()
+
+    @classmethod
+    async def flush(cls) -> None:
+        """Devam eden arka plan tamamlama işlerini bekle."""
+        while cls._tasks:
+            await asyncio.gather(*list(cls._tasks), return_exceptions=True)
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        """Onay / tamamlama sayaçları ve devam eden iş sayısı."""
+        return {
+            **cls._stats,
+            "in_flight": len(cls._tasks),
+            "worker_running": bool(cls._worker and not cls._worker.done()),
+        }
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    @classmethod
+    def _schedule(cls, delivery: dict) -> None:
+        """Yan etkileri istek akışının dışında tamamla."""
+        task = asyncio.get_running_loop().create_task(cls._complete(delivery))
+        cls._tasks.add(task)
+        task.add_done_callback(cls._tasks.discard)
+
+    @classmethod
+    async def _run(cls) -> None:
+        """Worker döngüsü: açılışta ve periyodik olarak outbox'ı tara."""
+        while True:
+            try:
+                await cls.recover()
+            except Exception:
+                logger.exception("Teslimat onayı outbox taraması başarısız")
+            await asyncio.sleep(cls.RECOVERY_INTERVAL_SECONDS)
+
+    @classmethod
+    async def _close_working_copies(cls, customer_id: str, accepted_at: str) -> bool:
+        """
+        Onaydan önce açılmış aktif çalışma kopyalarını kapat.
+
+        accept() anında tüm aktif kopyalar bu koşulu sağlar. Koşul recover()
+        içindir: onaydan sonra çöken bir sürecin kaydı geç tamamlanırken
+        müşterinin onaydan sonra açtığı yeni kopya silinmez. created_at
+        alanı olmayan eski kopyalar onaydan önce açılmış sayılır.
+        """
+        result = await db[COL_WORKING_COPIES].update_many(
+            {"customer_id": customer_id, "status": "active", "created_at": {"$not": {"$gt": accepted_at}}},
+            {"$set": {"status": "deleted_by_delivery", "updated_at": accepted_at}}
+        )
+        return result.modified_count > 0
+
+    @classmethod
+    async def _complete(cls, delivery: dict, close_working_copies: bool = False) -> bool:
+        """
+        Onayın yan etkilerini uygula ve outbox işaretini sil.
+
+        Tüm adımlar idempotenttir; hata olursa işaret kalır ve recover()
+        tekrar dener.
+        """
+        customer_id = delivery["customer_id"]
+        try:
+            if close_working_copies:
+                await cls._close_working_copies(customer_id, delivery["accepted_at"])
+            await CustomerSummaryService.refresh(customer_id)
+            await DraftEngine.record_accepted_delivery(customer_id, delivery)
+            DraftQueue.mark_dirty(customer_id, "delivery_accept")
+            await db[COL_AUDIT_EVENTS].update_one(
+                {"type": "delivery_accepted", "delivery_id": delivery["id"]},
+                {"$setOnInsert": {
+                    "customer_id": customer_id,
+                    "performed_by": delivery.get("accepted_by"),
+                    "at": delivery["accepted_at"]
+                }},
+                upsert=True
+            )
+            await db[COL_DELIVERIES].update_one(
+                {"id": delivery["id"]},
+                {"$unset": {"post_accept_pending": ""}}
+            )
+        except Exception:
+            cls._stats["errors"] += 1
+            logger.exception("Teslimat onayı tamamlanamadı: %s", delivery.get("id"))
+            return False
+
+        cls._stats["completed"] += 1
+        return True
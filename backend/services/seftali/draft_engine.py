@@ -17,18 +17,32 @@ Hesaplama Formülü:
     rate_mt = SMA(son 8 interval rate)
     rate_used = rate_mt × weekly_multiplier
     need_qty = rate_used × supply_days
+
+Okuma Yolu:
+    Kaydedilen draft (sf_system_drafts.draft) müşterinin draft_generation
+    sayacı ve hesaplandığı gün ile etiketlenir. State, rota ve çarpan
+    yazımları sayacı artırır; get_current() sayaç ve gün tutuyorsa
+    kaydı döndürür, tutmuyorsa yeniden hesaplayıp kaydeder.
 """
 
+import logging
 from typing import Dict, List, Any, Optional
 from datetime import timedelta
+from time import monotonic
+from pymongo import UpdateOne
 from config.database import db
 
 from .core import (
-    now_utc, to_iso, parse_date, get_route_info,
+    now_utc, to_iso, parse_date, lookup_route_info,
     SMA_WINDOW, EPSILON, WEEKDAY_NAMES,
-    COL_CUSTOMERS, COL_PRODUCTS, COL_DELIVERIES,
+    COL_CUSTOMERS, COL_DELIVERIES,
     COL_SYSTEM_DRAFTS, COL_DE_STATE, COL_DE_MULTIPLIERS
 )
+from .draft_kernel import DraftKernel
+from .draft_queue import DraftQueue
+from .product_catalog import ProductCatalog
+
+logger = logging.getLogger(__name__)
 
 
 class DraftEngine:
@@ -39,6 +53,16 @@ class DraftEngine:
     SMA (Simple Moving Average) tabanlı, interval-based bir algoritma kullanır.
     """
     
+    # Eşzamanlı teslimatlarda state güncellemesi için deneme sayısı
+    STATE_UPDATE_RETRIES = 3
+    
+    # Müşteri rota günleri önbelleği: customer_id -> (route_days, cached_at)
+    ROUTE_CACHE_TTL_SECONDS = 300
+    _route_cache: Dict[str, tuple] = {}
+    
+    # get_current: kayıtlı draft kullanıldı mı / yeniden hesaplandı mı
+    _read_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+    
     # =========================================================================
     # PUBLIC METHODS
     # =========================================================================
@@ -64,13 +88,10 @@ class DraftEngine:
         if not customer:
             return None
         
-        route_days = customer.get("route_plan", {}).get("days", [])
-        route_info = get_route_info(route_days)
-        
         # Ürün durumlarını al
         states = await cls._get_product_states(customer_id)
         if not states:
-            return cls._empty_draft(customer_id, customer, route_info, now)
+            return cls._build_draft(customer, [], {}, {}, today, now)
         
         # Ürün bilgileri
         product_ids = [s["product_id"] for s in states]
@@ -79,45 +100,128 @@ class DraftEngine:
         # Haftalık çarpanlar
         multipliers = await cls._get_weekly_multipliers(today)
         
-        # Her ürün için hesapla
-        items = []
-        for state in states:
-            item = cls._calculate_item(state, products, multipliers, route_info, today)
-            items.append(item)
+        return cls._build_draft(customer, states, products, multipliers, today, now)
+    
+    @classmethod
+    async def calculate_many(
+        cls,
+        customer_ids: List[str],
+        vectorized: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Birden fazla müşteri için tahmini ihtiyacı tek geçişte hesapla.
         
-        # Sırala (yüksek ihtiyaçtan düşüğe)
-        items.sort(key=lambda x: (x.get("need_qty") or 0), reverse=True)
-        for i, item in enumerate(items):
-            item["priority_rank"] = i + 1
+        Müşteri sayısından bağımsız olarak sabit sayıda sorgu yapar:
+        müşteriler, ürün durumları, ürünler ve haftalık çarpanlar birer kez
+        okunur, tüm draft'lar bellekte hesaplanır.
         
-        # Next route date
-        next_route_date = (today + timedelta(days=route_info["days_to_next_route"])).isoformat()
-        next_route_weekday = WEEKDAY_NAMES[route_info["next_route_weekday"]] if route_info["next_route_weekday"] is not None else None
+        Args:
+            customer_ids: Müşteri ID listesi
+            vectorized: True ise item'lar DraftKernel (NumPy) ile hesaplanır
+            
+        Returns:
+            {customer_id: draft} (bulunamayan müşteriler dahil edilmez)
+        """
+        if not customer_ids:
+            return {}
         
-        return {
-            "customer_id": customer_id,
-            "customer_name": customer.get("name", ""),
-            "route_days": route_days,
-            "route_info": {
-                "days_to_next_route": route_info["days_to_next_route"],
-                "supply_days": route_info["supply_days"],
-                "next_route_date": next_route_date,
-                "next_route_weekday": next_route_weekday
-            },
-            "calculation_params": {
-                "today_date": today.isoformat(),
-                "sma_window": SMA_WINDOW,
-                "formula": "need_qty = rate_mt × weekly_multiplier × supply_days"
-            },
-            "items": items,
-            "summary": {
-                "total_products": len(items),
-                "total_need_qty": sum(i.get("need_qty") or 0 for i in items),
-                "products_with_data": len([i for i in items if i.get("rate_mt")]),
-                "products_low_data": len([i for i in items if i.get("flags", {}).get("low_data")])
+        now = now_utc()
+        today = now.date()
+        
+        cursor = db[COL_CUSTOMERS].find(
+            {"id": {"$in": list(customer_ids)}}, {"_id": 0}
+        )
+        customers = {c["id"]: c async for c in cursor}
+        if not customers:
+            return {}
+        
+        states_by_customer = await cls._get_product_states_many(list(customers.keys()))
+        
+        product_ids = list({
+            s["product_id"]
+            for states in states_by_customer.values()
+            for s in states
+        })
+        products = await cls._get_products(product_ids) if product_ids else {}
+        multipliers = await cls._get_weekly_multipliers(today)
+        
+        items_by_customer = None
+        if vectorized:
+            items_by_customer = cls._calculate_items_vectorized(
+                customers, states_by_customer, products, multipliers, today
+            )
+        
+        drafts = {}
+        for cid in customer_ids:
+            customer = customers.get(cid)
+            if not customer:
+                continue
+            drafts[cid] = cls._build_draft(
+                customer, states_by_customer.get(cid, []),
+                products, multipliers, today, now,
+                items=items_by_customer.get(cid) if items_by_customer is not None else None
+            )
+        return drafts
+    
+    @classmethod
+    async def get_current(cls, customer: dict) -> Optional[Dict[str, Any]]:
+        """
+        Müşterinin güncel draft'ını getir.
+        
+        Kayıtlı draft müşterinin draft_generation değeri ve bugünkü tarihle
+        hesaplanmışsa tek okumayla döndürülür; değilse yeniden hesaplanır
+        ve kaydedilir. Gün değişince days_to_next_route ve tarihe bağlı
+        alanlar değiştiğinden kayıt yalnızca hesaplandığı gün geçerlidir.
+        
+        Args:
+            customer: Müşteri dokümanı (draft_generation alanıyla)
+            
+        Returns:
+            Draft objesi veya None
+        """
+        customer_id = customer["id"]
+        stored = await db[COL_SYSTEM_DRAFTS].find_one(
+            {
+                "customer_id": customer_id,
+                "input_generation": customer.get("draft_generation", 0),
+                "computed_for": now_utc().date().isoformat()
             },
-            "generated_at": to_iso(now),
-            "generated_from": "draft_engine_v2"
+            {"_id": 0, "draft": 1}
+        )
+        if stored and stored.get("draft"):
+            cls._read_stats["hits"] += 1
+            return stored["draft"]
+        
+        cls._read_stats["misses"] += 1
+        draft = await cls.calculate(customer_id)
+        if draft:
+            await cls._persist(customer_id, draft, "read_through")
+        return draft
+    
+    @classmethod
+    def etag(cls, customer: dict) -> str:
+        """Draft girdilerinin sürümü: draft_generation + gün (If-None-Match için)."""
+        return f'W/"{customer.get("draft_generation", 0)}-{now_utc().date().isoformat()}"'
+    
+    @classmethod
+    async def bump_generation(cls, customer_ids: Optional[List[str]] = None) -> None:
+        """
+        Müşterilerin draft_generation sayacını artır (kayıtlı draft'lar bayatlar).
+        
+        State ve rota yazımları ilgili müşteri için çağırır; haftalık çarpan
+        yazımlarından sonra customer_ids verilmeden tüm müşteriler için
+        çağrılmalıdır.
+        """
+        query = {"id": {"$in": list(customer_ids)}} if customer_ids is not None else {}
+        await db[COL_CUSTOMERS].update_many(query, {"$inc": {"draft_generation": 1}})
+    
+    @classmethod
+    def read_metrics(cls) -> Dict[str, Any]:
+        """get_current hit / miss sayaçları."""
+        lookups = cls._read_stats["hits"] + cls._read_stats["misses"]
+        return {
+            **cls._read_stats,
+            "hit_ratio": round(cls._read_stats["hits"] / lookups, 4) if lookups else None,
         }
     
     @classmethod
@@ -136,42 +240,47 @@ class DraftEngine:
         if not draft:
             return None
         
-        now = now_utc()
+        return await cls._persist(customer_id, draft, source)
+    
+    @classmethod
+    async def save_many(
+        cls,
+        customer_ids: List[str],
+        source: str = "system",
+        vectorized: bool = False
+    ) -> Dict[str, dict]:
+        """
+        Birden fazla müşterinin draft'ını hesapla ve tek bulk_write ile kaydet.
         
-        # Legacy format için dönüştür
-        legacy_items = []
-        for item in draft.get("items", []):
-            legacy_items.append({
-                "product_id": item["product_id"],
-                "suggested_qty": item.get("suggested_qty", 0),
-                "rate_mt": item.get("rate_mt"),
-                "rate_used": item.get("rate_used"),
-                "weekly_multiplier": item.get("weekly_multiplier"),
-                "supply_days": item.get("supply_days"),
-                "interval_count": item.get("interval_count"),
-                "last_delivery_qty": item.get("last_delivery_qty"),
-                "last_delivery_date": item.get("last_delivery_date"),
-                "risk_score": item.get("risk_score"),
-                "priority_rank": item.get("priority_rank", 0),
-                "flags": item.get("flags", {})
-            })
+        Args:
+            customer_ids: Müşteri ID listesi
+            source: Kaynak (system, cutoff, route_change, vb.)
+            vectorized: True ise item'lar DraftKernel (NumPy) ile hesaplanır
+            
+        Returns:
+            {customer_id: kaydedilen draft}
+        """
+        drafts = await cls.calculate_many(customer_ids, vectorized=vectorized)
+        if not drafts:
+            return {}
         
-        draft_doc = {
-            "customer_id": customer_id,
-            "generated_from": source,
-            "items": legacy_items,
-            "route_info": draft.get("route_info"),
-            "calculation_params": draft.get("calculation_params"),
-            "updated_at": to_iso(now)
+        now = now_utc()
+        draft_docs = {
+            cid: cls._to_draft_doc(draft, source, now)
+            for cid, draft in drafts.items()
         }
         
-        await db[COL_SYSTEM_DRAFTS].update_one(
-            {"customer_id": customer_id},
-            {"$set": draft_doc, "$setOnInsert": {"created_at": to_iso(now)}},
-            upsert=True
-        )
-        
-        return draft_doc
+        operations = [
+            UpdateOne(
+                {"customer_id": cid},
+                {"$set": doc, "$setOnInsert": {"created_at": to_iso(now)}},
+                upsert=True
+            )
+            for cid, doc in draft_docs.items()
+        ]
+        await db[COL_SYSTEM_DRAFTS].bulk_write(operations, ordered=False)
+        
+        return draft_docs
     
     @classmethod
     async def process_delivery(
@@ -189,27 +298,193 @@ class DraftEngine:
             product_id: Ürün ID'si
             delivery_date: Teslimat tarihi
             delivery_qty: Teslimat miktarı
+            
+        Raises:
+            RuntimeError: Tüm denemeler eşzamanlı teslimatlara kaybedildiyse
+                (teslimat state'e işlenmeden sessizce düşmesin diye)
         """
         now = now_utc()
         delivery_dt = parse_date(delivery_date)
         
-        # Mevcut state
-        state = await db[COL_DE_STATE].find_one(
-            {"customer_id": customer_id, "product_id": product_id}
+        for _ in range(cls.STATE_UPDATE_RETRIES):
+            # Mevcut state
+            state = await db[COL_DE_STATE].find_one(
+                {"customer_id": customer_id, "product_id": product_id}
+            )
+            
+            if not state:
+                await cls._create_new_state(customer_id, product_id, delivery_date, delivery_qty, now)
+                break
+            if await cls._update_existing_state(state, delivery_date, delivery_qty, delivery_dt, now):
+                break
+        else:
+            logger.error(
+                "State güncellenemedi (%s deneme): customer=%s product=%s date=%s",
+                cls.STATE_UPDATE_RETRIES, customer_id, product_id, delivery_date
+            )
+            raise RuntimeError(
+                f"Teslimat state'e işlenemedi: {customer_id}/{product_id} {delivery_date}"
+            )
+        
+        await cls.bump_generation([customer_id])
+        
+        # Draft'ı kuyrukla güncelle (aynı teslimatın kalemleri tek yazıma birleşir)
+        DraftQueue.mark_dirty(customer_id, "delivery_event")
+    
+    @classmethod
+    async def record_accepted_delivery(cls, customer_id: str, delivery: dict) -> int:
+        """
+        Onaylanan teslimatın miktarlarını ürün state'lerine yaz.
+        
+        last_accepted_delivery_qty / last_accepted_delivered_at yalnızca
+        teslimat state'teki son onaylı teslimattan yeniyse güncellenir;
+        GET /customer/draft bu alanları ek sorgu olmadan kullanır.
+        
+        Returns:
+            Güncellenen state sayısı
+        """
+        delivered_at = delivery.get("delivered_at")
+        quantities: Dict[str, Any] = {}
+        for item in delivery.get("items", []):
+            quantities.setdefault(item["product_id"], item.get("qty"))
+        return await cls._set_last_accepted(
+            customer_id, {pid: (qty, delivered_at) for pid, qty in quantities.items()}
         )
+    
+    @classmethod
+    async def get_last_accepted_quantities(cls, customer_id: str, product_ids: List[str]) -> Dict[str, Any]:
+        """
+        Ürünlerin son onaylı teslimat miktarlarını tek pipeline ile bul.
         
-        if state:
-            await cls._update_existing_state(state, delivery_date, delivery_qty, delivery_dt, now)
-        else:
-            await cls._create_new_state(customer_id, product_id, delivery_date, delivery_qty, now)
+        State'te last_accepted_* alanı olmayan (bu alanlardan önce oluşmuş)
+        ürünler için kullanılır; bulunan değerler state'e yazılır, onaylı
+        teslimatı olmayan ürünler last_accepted_checked ile işaretlenir ve
+        bir daha aranmaz. Draft'ın etkin değeri değişmediğinden (okuma aynı
+        değeri teslimatlardan zaten bulur) draft_generation artırılmaz.
+        
+        Returns:
+            {product_id: qty} (onaylı teslimatı olmayanlar dahil edilmez)
+        """
+        if not product_ids:
+            return {}
+        
+        pipeline = [
+            {
+                "$match": {
+                    "customer_id": customer_id,
+                    "acceptance_status": "accepted",
+                    "items.product_id": {"$in": product_ids}
+                }
+            },
+            {"$sort": {"delivered_at": -1}},
+            {"$unwind": "$items"},
+            {"$match": {"items.product_id": {"$in": product_ids}}},
+            {
+                "$group": {
+                    "_id": "$items.product_id",
+                    "qty": {"$first": "$items.qty"},
+                    "delivered_at": {"$first": "$delivered_at"}
+                }
+            }
+        ]
+        latest = {
+            row["_id"]: (row.get("qty"), row.get("delivered_at"))
+            async for row in db[COL_DELIVERIES].aggregate(pipeline)
+        }
+        await cls._set_last_accepted(customer_id, latest, bump=False)
+        
+        unaccepted = [pid for pid in product_ids if pid not in latest]
+        if unaccepted:
+            await db[COL_DE_STATE].update_many(
+                {"customer_id": customer_id, "product_id": {"$in": unaccepted}},
+                {"$set": {"last_accepted_checked": True}}
+            )
+        return {pid: qty for pid, (qty, _) in latest.items()}
+    
+    @classmethod
+    async def fill_last_accepted(cls, customer: dict, draft: Dict[str, Any]) -> None:
+        """
+        Draft kalemlerinin eksik last_accepted_* alanlarını doldur.
+        
+        Yalnızca state'i hiç kontrol edilmemiş (last_accepted_checked
+        olmayan) kalemler için get_last_accepted_quantities çalışır; sonuç
+        kayıtlı draft'a da yazılır, böylece aynı sürümün sonraki okumaları
+        teslimatları tekrar taramaz.
+        """
+        items = draft.get("items", [])
+        missing = [
+            it["product_id"] for it in items
+            if it.get("last_accepted_delivered_at") is None and not it.get("last_accepted_checked")
+        ]
+        if not missing:
+            return
+        
+        customer_id = customer["id"]
+        await cls.get_last_accepted_quantities(customer_id, missing)
+        states = {
+            s["product_id"]: s
+            async for s in db[COL_DE_STATE].find(
+                {"customer_id": customer_id, "product_id": {"$in": missing}},
+                {"_id": 0, "product_id": 1, "last_accepted_delivery_qty": 1, "last_accepted_delivered_at": 1}
+            )
+        }
+        for it in items:
+            state = states.get(it["product_id"])
+            if state is None:
+                continue
+            it["last_accepted_delivery_qty"] = state.get("last_accepted_delivery_qty")
+            it["last_accepted_delivered_at"] = state.get("last_accepted_delivered_at")
+            it["last_accepted_checked"] = True
+        
+        await db[COL_SYSTEM_DRAFTS].update_one(
+            {
+                "customer_id": customer_id,
+                "input_generation": customer.get("draft_generation", 0),
+                "computed_for": now_utc().date().isoformat()
+            },
+            {"$set": {"draft.items": items}}
+        )
+    
+    @classmethod
+    async def get_route_days(cls, customer_id: str) -> List[str]:
+        """
+        Müşterinin rota günlerini önbellekten getir.
+        
+        Önbellekte yoksa (veya TTL dolduysa) müşteri okunur ve önbelleğe alınır.
+        """
+        cached = cls._route_cache.get(customer_id)
+        if cached and monotonic() - cached[1] < cls.ROUTE_CACHE_TTL_SECONDS:
+            return cached[0]
         
-        # Draft'ı güncelle
-        await cls.save(customer_id, "delivery_event")
+        customer = await db[COL_CUSTOMERS].find_one(
+            {"id": customer_id}, {"_id": 0, "route_plan": 1}
+        )
+        route_days = customer.get("route_plan", {}).get("days", []) if customer else []
+        cls._cache_route_days(customer_id, route_days)
+        return route_days
+    
+    @classmethod
+    def invalidate_route_cache(cls, customer_id: Optional[str] = None) -> None:
+        """
+        Rota önbelleğini temizle.
+        
+        Args:
+            customer_id: Sadece bu müşteriyi temizle (None ise tümü)
+        """
+        if customer_id is None:
+            cls._route_cache.clear()
+        else:
+            cls._route_cache.pop(customer_id, None)
     
     # =========================================================================
     # PRIVATE METHODS - Data Fetching
     # =========================================================================
     
+    @classmethod
+    def _cache_route_days(cls, customer_id: str, route_days: List[str]) -> None:
+        """Müşterinin rota günlerini önbelleğe yaz."""
+        cls._route_cache[customer_id] = (list(route_days), monotonic())
+    
     @classmethod
     async def _get_product_states(cls, customer_id: str) -> List[dict]:
         """Müşterinin aktif ürün durumlarını getir."""
@@ -220,14 +495,21 @@ class DraftEngine:
         return await cursor.to_list(length=500)
     
     @classmethod
-    async def _get_products(cls, product_ids: List[str]) -> Dict[str, dict]:
-        """Ürün bilgilerini getir."""
-        cursor = db[COL_PRODUCTS].find(
-            {"product_id": {"$in": product_ids}},
+    async def _get_product_states_many(cls, customer_ids: List[str]) -> Dict[str, List[dict]]:
+        """Birden fazla müşterinin aktif ürün durumlarını tek sorguda getir."""
+        cursor = db[COL_DE_STATE].find(
+            {"customer_id": {"$in": customer_ids}, "is_active": True},
             {"_id": 0}
         )
-        products = await cursor.to_list(length=500)
-        return {p["product_id"]: p for p in products}
+        states_by_customer: Dict[str, List[dict]] = {}
+        async for state in cursor:
+            states_by_customer.setdefault(state["customer_id"], []).append(state)
+        return states_by_customer
+    
+    @classmethod
+    async def _get_products(cls, product_ids: List[str]) -> Dict[str, dict]:
+        """Ürün bilgilerini katalogdan getir."""
+        return await ProductCatalog.get_many(product_ids)
     
     @classmethod
     async def _get_weekly_multipliers(cls, today) -> Dict[str, float]:
@@ -237,13 +519,160 @@ class DraftEngine:
             {"week_start": week_start.isoformat()},
             {"_id": 0}
         )
-        multipliers = await cursor.to_list(length=500)
-        return {m["product_id"]: m.get("multiplier", 1.0) for m in multipliers}
+        return {m["product_id"]: m.get("multiplier", 1.0) async for m in cursor}
     
     # =========================================================================
     # PRIVATE METHODS - Calculation
     # =========================================================================
     
+    @classmethod
+    def _build_draft(
+        cls,
+        customer: dict,
+        states: List[dict],
+        products: Dict[str, dict],
+        multipliers: Dict[str, float],
+        today,
+        now,
+        items: Optional[List[dict]] = None
+    ) -> Dict[str, Any]:
+        """
+        Önceden yüklenmiş verilerle tek müşterinin draft'ını oluştur.
+        
+        items verilmişse (vektörel yol) item hesaplaması atlanır.
+        """
+        customer_id = customer["id"]
+        route_days = customer.get("route_plan", {}).get("days", [])
+        route_info = lookup_route_info(route_days, today)
+        cls._cache_route_days(customer_id, route_days)
+        
+        if not states:
+            return cls._empty_draft(customer_id, customer, route_info, today, now)
+        
+        # Her ürün için hesapla
+        if items is None:
+            items = []
+            for state in states:
+                item = cls._calculate_item(state, products, multipliers, route_info, today)
+                items.append(item)
+        
+        # Sırala (yüksek ihtiyaçtan düşüğe)
+        items.sort(key=lambda x: (x.get("need_qty") or 0), reverse=True)
+        for i, item in enumerate(items):
+            item["priority_rank"] = i + 1
+        
+        # Next route date
+        next_route_date = (today + timedelta(days=route_info["days_to_next_route"])).isoformat()
+        next_route_weekday = WEEKDAY_NAMES[route_info["next_route_weekday"]] if route_info["next_route_weekday"] is not None else None
+        
+        return {
+            "customer_id": customer_id,
+            "customer_name": customer.get("name", ""),
+            "route_days": route_days,
+            "route_info": {
+                "days_to_next_route": route_info["days_to_next_route"],
+                "supply_days": route_info["supply_days"],
+                "next_route_date": next_route_date,
+                "next_route_weekday": next_route_weekday
+            },
+            "calculation_params": {
+                "today_date": today.isoformat(),
+                "sma_window": SMA_WINDOW,
+                "formula": "need_qty = rate_mt × weekly_multiplier × supply_days"
+            },
+            "items": items,
+            "summary": {
+                "total_products": len(items),
+                "total_need_qty": sum(i.get("need_qty") or 0 for i in items),
+                "products_with_data": len([i for i in items if i.get("rate_mt")]),
+                "products_low_data": len([i for i in items if i.get("flags", {}).get("low_data")])
+            },
+            "generated_at": to_iso(now),
+            "generated_from": "draft_engine_v2",
+            "input_generation": customer.get("draft_generation", 0),
+            "computed_for": today.isoformat()
+        }
+    
+    @classmethod
+    def _calculate_items_vectorized(
+        cls,
+        customers: Dict[str, dict],
+        states_by_customer: Dict[str, List[dict]],
+        products: Dict[str, dict],
+        multipliers: Dict[str, float],
+        today
+    ) -> Dict[str, List[dict]]:
+        """Tüm müşterilerin item'larını tek DraftKernel çağrısıyla hesapla."""
+        all_states = []
+        route_infos = []
+        owners = []
+        for cid, states in states_by_customer.items():
+            customer = customers.get(cid)
+            if not customer:
+                continue
+            route_info = lookup_route_info(customer.get("route_plan", {}).get("days", []), today)
+            all_states.extend(states)
+            route_infos.extend([route_info] * len(states))
+            owners.extend([cid] * len(states))
+        
+        items = DraftKernel.calculate_items(all_states, products, multipliers, route_infos, today)
+        
+        items_by_customer: Dict[str, List[dict]] = {}
+        for cid, item in zip(owners, items):
+            items_by_customer.setdefault(cid, []).append(item)
+        return items_by_customer
+    
+    @classmethod
+    async def _persist(cls, customer_id: str, draft: Dict[str, Any], source: str) -> dict:
+        """Draft'ı sf_system_drafts'a yaz (legacy alanlar + get_current için tam draft)."""
+        now = now_utc()
+        draft_doc = cls._to_draft_doc(draft, source, now)
+        
+        await db[COL_SYSTEM_DRAFTS].update_one(
+            {"customer_id": customer_id},
+            {"$set": draft_doc, "$setOnInsert": {"created_at": to_iso(now)}},
+            upsert=True
+        )
+        
+        return draft_doc
+    
+    @classmethod
+    def _to_draft_doc(cls, draft: Dict[str, Any], source: str, now) -> dict:
+        """
+        Hesaplanan draft'ı sf_system_drafts (legacy) formatına dönüştür.
+        
+        Tam draft, hesaplandığı girdi sürümüyle (input_generation,
+        computed_for) birlikte "draft" alanında saklanır.
+        """
+        legacy_items = []
+        for item in draft.get("items", []):
+            legacy_items.append({
+                "product_id": item["product_id"],
+                "suggested_qty": item.get("suggested_qty", 0),
+                "rate_mt": item.get("rate_mt"),
+                "rate_used": item.get("rate_used"),
+                "weekly_multiplier": item.get("weekly_multiplier"),
+                "supply_days": item.get("supply_days"),
+                "interval_count": item.get("interval_count"),
+                "last_delivery_qty": item.get("last_delivery_qty"),
+                "last_delivery_date": item.get("last_delivery_date"),
+                "risk_score": item.get("risk_score"),
+                "priority_rank": item.get("priority_rank", 0),
+                "flags": item.get("flags", {})
+            })
+        
+        return {
+            "customer_id": draft["customer_id"],
+            "generated_from": source,
+            "items": legacy_items,
+            "route_info": draft.get("route_info"),
+            "calculation_params": draft.get("calculation_params"),
+            "draft": draft,
+            "input_generation": draft.get("input_generation", 0),
+            "computed_for": draft.get("computed_for"),
+            "updated_at": to_iso(now)
+        }
+    
     @classmethod
     def _calculate_item(
         cls,
@@ -326,6 +755,9 @@ class DraftEngine:
             "prev_delivery_date": prev_delivery_date,
             "last_delivery_date": last_delivery_date,
             "last_delivery_qty": last_delivery_qty,
+            "last_accepted_delivery_qty": state.get("last_accepted_delivery_qty"),
+            "last_accepted_delivered_at": state.get("last_accepted_delivered_at"),
+            "last_accepted_checked": state.get("last_accepted_checked", False),
             "interval_rates": interval_rates[-3:],
             "interval_count": interval_count,
             
@@ -357,13 +789,13 @@ class DraftEngine:
         }
     
     @classmethod
-    def _empty_draft(cls, customer_id: str, customer: dict, route_info: dict, now) -> dict:
+    def _empty_draft(cls, customer_id: str, customer: dict, route_info: dict, today, now) -> dict:
         """Boş draft oluştur."""
         return {
             "customer_id": customer_id,
             "customer_name": customer.get("name", ""),
             "route_days": customer.get("route_plan", {}).get("days", []),
-            "route_info": route_info,
+            "route_info": dict(route_info),
             "items": [],
             "summary": {
                 "total_products": 0,
@@ -372,7 +804,9 @@ class DraftEngine:
                 "products_low_data": 0
             },
             "generated_at": to_iso(now),
-            "generated_from": "draft_engine_v2"
+            "generated_from": "draft_engine_v2",
+            "input_generation": customer.get("draft_generation", 0),
+            "computed_for": today.isoformat()
         }
     
     # =========================================================================
@@ -380,8 +814,23 @@ class DraftEngine:
     # =========================================================================
     
     @classmethod
-    async def _update_existing_state(cls, state: dict, delivery_date: str, delivery_qty: float, delivery_dt, now):
-        """Mevcut state'i güncelle."""
+    async def _update_existing_state(cls, state: dict, delivery_date: str, delivery_qty: float, delivery_dt, now) -> bool:
+        """
+        Mevcut state'i tek atomik update_one ile güncelle.
+        
+        interval_rates listesi yeniden toplanmaz: state üzerindeki
+        interval_rate_sum (pencere toplamı) yeni rate eklenip pencereden düşen
+        rate çıkarılarak O(1) güncellenir, liste $push + $slice ile kaydırılır.
+        Eşzamanlı bir teslimat state'i değiştirdiyse (delivery_count farklı)
+        güncelleme uygulanmaz ve False döner.
+        
+        Okunan state gereklidir: yeni rate önceki teslimatın miktar / tarihi
+        ile, pencere toplamı da pencereden düşecek rate ile hesaplanır ve
+        toplamı olmayan eski state'ler bir kez listeden toplanır.
+        
+        Returns:
+            Güncelleme uygulandı mı?
+        """
         prev_date = parse_date(state.get("last_delivery_date"))
         prev_qty = state.get("last_delivery_qty")
         
@@ -390,21 +839,30 @@ class DraftEngine:
         if prev_date and prev_qty and delivery_dt:
             days_between = (delivery_dt - prev_date).days
             if days_between > 0:
-                new_rate = prev_qty / days_between
+                new_rate = round(prev_qty / days_between, 4)
+        
+        # Pencere toplamı (eski dokümanlarda alan yoksa bir kez hesaplanır)
+        window = state.get("interval_rates", [])[-SMA_WINDOW:]
+        rate_sum = state.get("interval_rate_sum")
+        if rate_sum is None:
+            rate_sum = sum(window)
+        interval_count = len(window)
         
-        # interval_rates güncelle
-        interval_rates = state.get("interval_rates", [])
         if new_rate is not None:
-            interval_rates.append(round(new_rate, 4))
-            interval_rates = interval_rates[-SMA_WINDOW:]
+            rate_sum += new_rate
+            if interval_count == SMA_WINDOW:
+                rate_sum -= window[0]
+            else:
+                interval_count += 1
+        # Rate'ler 4 haneli olduğundan toplamı yuvarlamak birikimli hatayı önler
+        rate_sum = round(rate_sum, 4)
         
         # Yeni rate_mt
-        rate_mt = sum(interval_rates) / len(interval_rates) if interval_rates else None
+        rate_mt = rate_sum / interval_count if interval_count else None
         
-        # Route bilgisi
-        customer = await db[COL_CUSTOMERS].find_one({"id": state["customer_id"]}, {"_id": 0})
-        route_days = customer.get("route_plan", {}).get("days", []) if customer else []
-        route_info = get_route_info(route_days)
+        # Route bilgisi (müşteri bazında önbellekten)
+        route_days = await cls.get_route_days(state["customer_id"])
+        route_info = lookup_route_info(route_days, now)
         
         # need_qty
         multiplier = state.get("weekly_multiplier", 1.0)
@@ -419,9 +877,8 @@ class DraftEngine:
             "prev_delivery_qty": state.get("last_delivery_qty"),
             "last_delivery_date": delivery_date,
             "last_delivery_qty": delivery_qty,
-            "delivery_count": state.get("delivery_count", 0) + 1,
-            "interval_count": len(interval_rates),
-            "interval_rates": interval_rates,
+            "interval_count": interval_count,
+            "interval_rate_sum": rate_sum,
             "rate_mt": round(rate_mt, 4) if rate_mt else None,
             "rate_used": round(rate_mt * multiplier, 4) if rate_mt else None,
             "need_qty": need_qty,
@@ -432,10 +889,48 @@ class DraftEngine:
             "updated_at": to_iso(now)
         }
         
-        await db[COL_DE_STATE].update_one(
-            {"_id": state["_id"]},
-            {"$set": update_data}
+        update = {"$set": update_data, "$inc": {"delivery_count": 1}}
+        if new_rate is not None:
+            update["$push"] = {
+                "interval_rates": {"$each": [new_rate], "$slice": -SMA_WINDOW}
+            }
+        
+        result = await db[COL_DE_STATE].update_one(
+            {"_id": state["_id"], "delivery_count": state.get("delivery_count")},
+            update
         )
+        return result.matched_count == 1
+    
+    @classmethod
+    async def _set_last_accepted(cls, customer_id: str, latest: Dict[str, tuple], bump: bool = True) -> int:
+        """
+        {product_id: (qty, delivered_at)} değerlerini daha yeni değilse state'lere yaz.
+        
+        bump=False: değer zaten teslimatlardan okunabiliyorsa (geri doldurma)
+        kayıtlı draft bayatlatılmaz.
+        """
+        operations = [
+            UpdateOne(
+                {
+                    "customer_id": customer_id,
+                    "product_id": pid,
+                    "last_accepted_delivered_at": {"$not": {"$gt": delivered_at}}
+                },
+                {"$set": {
+                    "last_accepted_delivery_qty": qty,
+                    "last_accepted_delivered_at": delivered_at,
+                    "last_accepted_checked": True
+                }}
+            )
+            for pid, (qty, delivered_at) in latest.items()
+            if delivered_at is not None
+        ]
+        if not operations:
+            return 0
+        result = await db[COL_DE_STATE].bulk_write(operations, ordered=False)
+        if result.modified_count and bump:
+            await cls.bump_generation([customer_id])
+        return result.modified_count
     
     @classmethod
     async def _create_new_state(cls, customer_id: str, product_id: str, delivery_date: str, delivery_qty: float, now):
@@ -452,6 +947,7 @@ class DraftEngine:
             "prev_delivery_qty": None,
             "interval_count": 0,
             "interval_rates": [],
+            "interval_rate_sum": 0.0,
             "rate_mt": None,
             "weekly_multiplier": 1.0,
             "rate_used": None,
@@ -0,0 +1,328 @@
+"""
+ŞEFTALİ - Draft Engine Vektörel Çekirdek
+DraftEngine._calculate_item hesaplamasının NumPy ile sütunsal versiyonu
+
+Tüm depo yeniden hesaplamalarında (binlerce müşteri × ürün) state'ler
+NumPy dizilerine paketlenir ve SMA, rate_used, need_qty, risk_score,
+tükenme tarihi ve SKT riski dizi işlemleriyle tek seferde hesaplanır.
+
+Sonuçlar skaler yol ile birebir aynıdır:
+- SMA toplamı soldan sağa sütun sütun yapılır (Python sum() ile aynı sıra)
+- Yuvarlamalar Python round() ile aynı sonucu verir (yarıma yakın değerler
+  round() ile yeniden yuvarlanır, np.round farklı sonuç verebilir)
+- Tarih hesapları timedelta ile yapılır
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+from datetime import date, timedelta
+
+import numpy as np
+
+from .core import parse_date, SMA_WINDOW, EPSILON
+
+
+class DraftKernel:
+    """
+    Vektörel Draft hesaplama çekirdeği.
+
+    Kullanım:
+        items = DraftKernel.calculate_items(states, products, multipliers, route_infos, today)
+
+    route_infos tek bir dict (tüm state'ler aynı müşteriye ait) veya
+    state'lerle aynı sırada bir dict listesi olabilir.
+    """
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    @classmethod
+    def calculate_items(
+        cls,
+        states: List[dict],
+        products: Dict[str, dict],
+        multipliers: Dict[str, float],
+        route_infos: Union[Mapping, Sequence[Mapping]],
+        today: date
+    ) -> List[dict]:
+        """
+        State listesi için DraftEngine._calculate_item ile aynı item'ları üret.
+
+        Args:
+            states: de_customer_product_state dokümanları
+            products: {product_id: ürün}
+            multipliers: {product_id: haftalık çarpan}
+            route_infos: get_route_info çıktısı veya state başına liste
+            today: Hesaplama tarihi
+
+        Returns:
+            Item listesi (state sırasıyla)
+        """
+        if not states:
+            return []
+        packed = cls.pack(states, products, multipliers, route_infos, today)
+        result = cls.compute(packed)
+        return cls.to_items(states, products, packed, result, today)
+
+    @classmethod
+    def pack(
+        cls,
+        states: List[dict],
+        products: Dict[str, dict],
+        multipliers: Dict[str, float],
+        route_infos: Union[Mapping, Sequence[Mapping]],
+        today: date
+    ) -> Dict[str, np.ndarray]:
+        """
+        State'leri sütunsal NumPy dizilerine paketle.
+
+        None değerler NaN olarak, interval_rates ise SMA_WINDOW genişliğinde
+        sağdan sıfırla doldurulmuş bir matris olarak tutulur.
+        """
+        n = len(states)
+        if isinstance(route_infos, Mapping):
+            route_infos = [route_infos] * n
+
+        pids = [s["product_id"] for s in states]
+
+        rates = np.zeros((n, SMA_WINDOW), dtype=np.float64)
+        rate_counts = np.zeros(n, dtype=np.int64)
+        for i, s in enumerate(states):
+            window = (s.get("interval_rates") or [])[-SMA_WINDOW:]
+            if window:
+                rates[i, :len(window)] = window
+                rate_counts[i] = len(window)
+
+        stored_rate_mt = cls._float_column(s.get("rate_mt") for s in states)
+        weekly_multiplier = np.array(
+            [multipliers.get(pid, s.get("weekly_multiplier", 1.0)) for pid, s in zip(pids, states)],
+            dtype=np.float64
+        )
+        last_qty = cls._float_column(s.get("last_delivery_qty") for s in states)
+
+        last_dates = [parse_date(s.get("last_delivery_date")) for s in states]
+        last_ordinal = np.array(
+            [d.toordinal() if d else -1 for d in last_dates], dtype=np.int64
+        )
+
+        shelf_life = cls._float_column(
+            products.get(pid, {}).get("shelf_life_days") or None for pid in pids
+        )
+
+        supply_days = np.array([ri["supply_days"] for ri in route_infos], dtype=np.int64)
+        days_to_next = np.array([ri["days_to_next_route"] for ri in route_infos], dtype=np.int64)
+
+        delivery_count = np.array([s.get("delivery_count", 0) for s in states], dtype=np.int64)
+        interval_count = np.array([s.get("interval_count", 0) for s in states], dtype=np.int64)
+        age_days = np.array([s.get("age_days", 0) for s in states], dtype=np.int64)
+
+        return {
+            "rates": rates,
+            "rate_counts": rate_counts,
+            "stored_rate_mt": stored_rate_mt,
+            "weekly_multiplier": weekly_multiplier,
+            "last_qty": last_qty,
+            "last_ordinal": last_ordinal,
+            "shelf_life": shelf_life,
+            "supply_days": supply_days,
+            "days_to_next": days_to_next,
+            "delivery_count": delivery_count,
+            "interval_count": interval_count,
+            "age_days": age_days,
+        }
+
+    @classmethod
+    def compute(cls, packed: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Paketlenmiş diziler üzerinde tüm hesaplamaları yap.
+
+        Returns:
+            Sütunsal sonuçlar (None yerine NaN, bayraklar bool dizisi)
+        """
+        rates = packed["rates"]
+        counts = packed["rate_counts"]
+
+        # SMA - Python sum() ile aynı toplama sırası için sütun sütun topla
+        rate_sum = np.zeros(len(counts), dtype=np.float64)
+        for j in range(rates.shape[1]):
+            rate_sum += rates[:, j]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sma = np.where(counts > 0, rate_sum / np.maximum(counts, 1), np.nan)
+
+        stored = packed["stored_rate_mt"]
+        rate_mt = np.where(np.isnan(stored), sma, stored)
+        has_rate = cls._truthy(rate_mt)
+
+        # Rate Used
+        rate_used = np.where(has_rate, rate_mt * packed["weekly_multiplier"], np.nan)
+        usable = cls._truthy(rate_used) & (rate_used > EPSILON)
+
+        # Need Qty
+        need_raw = np.where(usable, rate_used * packed["supply_days"], np.nan)
+        need_qty = cls._py_round(need_raw, 2)
+
+        # Days since last delivery
+        last_ordinal = packed["last_ordinal"]
+
+        # Depletion / risk
+        last_qty = packed["last_qty"]
+        with_stock = usable & cls._truthy(last_qty)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            days_to_deplete = np.where(with_stock, last_qty / rate_used, np.nan)
+        risk_score = cls._py_round(days_to_deplete - packed["days_to_next"], 2)
+
+        # Maturity
+        delivery_count = packed["delivery_count"]
+        interval_count = packed["interval_count"]
+        first_time = delivery_count <= 1
+        mature = ~first_time & (interval_count >= 8) & (packed["age_days"] >= 365)
+
+        # SKT risk
+        shelf = packed["shelf_life"]
+        skt_candidate = ~np.isnan(shelf) & cls._truthy(need_qty) & cls._truthy(rate_used)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            coverage = np.where(rate_used > EPSILON, need_qty / rate_used, 999.0)
+        skt_risk = skt_candidate & (coverage > shelf / 2)
+
+        return {
+            "rate_mt": rate_mt,
+            "rate_used": rate_used,
+            "need_qty": need_qty,
+            "last_ordinal": last_ordinal,
+            "days_to_deplete": days_to_deplete,
+            "risk_score": risk_score,
+            "first_time": first_time,
+            "mature": mature,
+            "skt_risk": skt_risk,
+            "low_data": interval_count < 3,
+        }
+
+    @classmethod
+    def to_items(
+        cls,
+        states: List[dict],
+        products: Dict[str, dict],
+        packed: Dict[str, np.ndarray],
+        result: Dict[str, np.ndarray],
+        today: date
+    ) -> List[dict]:
+        """Sütunsal sonuçları DraftEngine item formatına dönüştür."""
+        today_ordinal = today.toordinal()
+
+        rate_mt = result["rate_mt"].tolist()
+        rate_used = result["rate_used"].tolist()
+        need_qty = result["need_qty"].tolist()
+        last_ordinal = result["last_ordinal"].tolist()
+        days_to_deplete = result["days_to_deplete"].tolist()
+        risk_score = result["risk_score"].tolist()
+        first_time = result["first_time"].tolist()
+        mature = result["mature"].tolist()
+        skt_risk = result["skt_risk"].tolist()
+        low_data = result["low_data"].tolist()
+        weekly_multiplier = packed["weekly_multiplier"].tolist()
+        supply_days = packed["supply_days"].tolist()
+        interval_count = packed["interval_count"].tolist()
+
+        items = []
+        for i, state in enumerate(states):
+            pid = state["product_id"]
+            product = products.get(pid, {})
+
+            if first_time[i]:
+                maturity_mode, maturity_label = "first_time", "İlk Sipariş"
+            elif mature[i]:
+                maturity_mode, maturity_label = "mature", "Olgun"
+            else:
+                maturity_mode, maturity_label = "young", "Gelişen"
+
+            r_mt = cls._none(rate_mt[i])
+            r_used = cls._none(rate_used[i])
+            need = cls._none(need_qty[i])
+            deplete = cls._none(days_to_deplete[i])
+
+            items.append({
+                "product_id": pid,
+                "product_name": product.get("name", pid),
+                "product_code": pid,
+
+                # Input parameters
+                "prev_delivery_qty": state.get("prev_delivery_qty"),
+                "prev_delivery_date": state.get("prev_delivery_date"),
+                "last_delivery_date": state.get("last_delivery_date"),
+                "last_delivery_qty": state.get("last_delivery_qty"),
+                "last_accepted_delivery_qty": state.get("last_accepted_delivery_qty"),
+                "last_accepted_delivered_at": state.get("last_accepted_delivered_at"),
+                "last_accepted_checked": state.get("last_accepted_checked", False),
+                "interval_rates": state.get("interval_rates", [])[-3:],
+                "interval_count": interval_count[i],
+
+                # Calculated values
+                "rate_mt": round(r_mt, 4) if r_mt else None,
+                "weekly_multiplier": round(weekly_multiplier[i], 2),
+                "rate_used": round(r_used, 4) if r_used else None,
+                "supply_days": supply_days[i],
+
+                # Result
+                "suggested_qty": need or 0,
+                "need_qty": need,
+
+                # Analysis
+                "days_since_last_delivery": today_ordinal - last_ordinal[i] if last_ordinal[i] >= 0 else None,
+                "estimated_depletion_at": (today + timedelta(days=deplete)).isoformat() if deplete is not None else None,
+                "risk_score": cls._none(risk_score[i]),
+                "maturity_mode": maturity_mode,
+                "maturity_label": maturity_label,
+
+                # Flags
+                "flags": {
+                    "skt_risk": skt_risk[i],
+                    "low_data": low_data[i],
+                    "new_product": first_time[i]
+                },
+
+                "priority_rank": 0
+            })
+
+        return items
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    @staticmethod
+    def _truthy(arr: np.ndarray) -> np.ndarray:
+        """Python truthiness karşılığı: None (NaN) ve 0 False sayılır."""
+        return ~np.isnan(arr) & (arr != 0)
+
+    @staticmethod
+    def _float_column(values) -> np.ndarray:
+        """None değerleri NaN olan float64 dizisi oluştur."""
+        return np.array(
+            [np.nan if v is None else v for v in values], dtype=np.float64
+        )
+
+    @staticmethod
+    def _py_round(arr: np.ndarray, ndigits: int) -> np.ndarray:
+        """
+        Python round() ile birebir aynı yuvarlama.
+
+        np.round yarım değerlere (x.xx5) çok yakın sayılarda Python round()'dan
+        farklı sonuç verebilir. Bu sayılar Python round() ile yeniden yuvarlanır,
+        kalanlar vektörel olarak yuvarlanır.
+        """
+        scale = 10.0 ** ndigits
+        scaled = arr * scale
+        rounded = np.rint(scaled) / scale
+
+        with np.errstate(invalid="ignore"):
+            frac = np.abs(scaled - np.floor(scaled) - 0.5)
+            ambiguous = ~np.isnan(arr) & ((frac < 1e-6) | (np.abs(scaled) > 1e9))
+
+        for i in np.flatnonzero(ambiguous).tolist():
+            rounded[i] = round(float(arr[i]), ndigits)
+        return rounded
+
+    @staticmethod
+    def _none(value: float) -> Optional[float]:
+        """NaN değerini None'a çevir."""
+        return None if value != value else value
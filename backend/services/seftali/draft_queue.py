@@ -0,0 +1,212 @@
+"""
+ŞEFTALİ - Draft Yenileme Kuyruğu
+Teslimat / stok olaylarından sonra draft yeniden hesaplamasını istek
+akışının dışına alan, tekrarları birleştiren (coalescing) asyncio kuyruğu
+
+Bir olay müşteriyi "kirli" olarak işaretler. Aynı müşteri DEBOUNCE_SECONDS
+içinde tekrar işaretlenirse tek bir yeniden hesaplamaya birleştirilir
+(ör. 9 kalemlik teslimat = 1 draft yazımı). Sürekli işaretlenen bir müşteri
+en geç MAX_DELAY_SECONDS sonra işlenir.
+
+Kullanım:
+    DraftQueue.mark_dirty(customer_id, "delivery_event")
+    await DraftQueue.flush()      # Bekleyenleri hemen işle (script/test)
+    DraftQueue.metrics()          # Kuyruk derinliği ve gecikme metrikleri
+"""
+
+import asyncio
+import logging
+from time import monotonic
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+
+class DraftQueue:
+    """
+    Süreç içi, birleştirmeli draft yenileme kuyruğu.
+
+    Kirli müşteriler {customer_id: (source, first_marked, last_marked)}
+    olarak tutulur; tek bir worker vadesi gelen müşterileri toplu olarak
+    DraftEngine.save_many ile yeniden hesaplar.
+    """
+
+    DEBOUNCE_SECONDS = 0.5
+    MAX_DELAY_SECONDS = 5.0
+    BATCH_SIZE = 200
+
+    _pending: Dict[str, tuple] = {}
+    _wakeup: Optional[asyncio.Event] = None
+    _worker: Optional[asyncio.Task] = None
+    _stats: Dict[str, Any] = {
+        "marked": 0,
+        "coalesced": 0,
+        "processed": 0,
+        "batches": 0,
+        "errors": 0,
+        "in_flight": 0,
+        "last_lag_ms": None,
+        "max_lag_ms": 0.0,
+        "total_lag_ms": 0.0,
+    }
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    @classmethod
+    def mark_dirty(cls, customer_id: str, source: str = "system") -> None:
+        """
+        Müşterinin draft'ını yeniden hesaplanmak üzere işaretle.
+
+        Beklemez; worker çalışmıyorsa başlatılır.
+
+        Args:
+            customer_id: Müşteri ID'si
+            source: Draft kaynağı (son işaretleme geçerlidir)
+        """
+        now = monotonic()
+        entry = cls._pending.get(customer_id)
+        cls._stats["marked"] += 1
+        if entry:
+            cls._stats["coalesced"] += 1
+            cls._pending[customer_id] = (source, entry[1], now)
+        else:
+            cls._pending[customer_id] = (source, now, now)
+
+        cls.start()
+        cls._wakeup.set()
+
+    @classmethod
+    def start(cls) -> None:
+        """Worker task'ı başlat (çalışıyorsa bir şey yapmaz)."""
+        if cls._worker and not cls._worker.done():
+            return
+        cls._wakeup = asyncio.Event()
+        cls._worker = asyncio.get_running_loop().create_task(cls._run())
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Worker'ı durdur ve bekleyen tüm müşterileri işle."""
+        if cls._worker and not cls._worker.done():
+            cls._worker.cancel()
+            try:
+                await cls._worker
+            except asyncio.CancelledError:
+                pass
+        cls._worker = None
+        await cls.flush()
+
+    @classmethod
+    async def flush(cls) -> int:
+        """
+        Vade beklemeden bekleyen tüm müşterileri işle.
+
+        Returns:
+            İşlenen müşteri sayısı
+        """
+        count = 0
+        while cls._pending:
+            count += await cls._process(cls._take(due_only=False))
+        return count
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        """Kuyruk derinliği, birleştirme ve gecikme metrikleri."""
+        now = monotonic()
+        stats = cls._stats
+        oldest = min((e[1] for e in cls._pending.values()), default=None)
+        return {
+            "depth": len(cls._pending),
+            "in_flight": stats["in_flight"],
+            "oldest_pending_ms": round((now - oldest) * 1000, 1) if oldest is not None else None,
+            "marked": stats["marked"],
+            "coalesced": stats["coalesced"],
+            "processed": stats["processed"],
+            "batches": stats["batches"],
+            "errors": stats["errors"],
+            "last_lag_ms": stats["last_lag_ms"],
+            "max_lag_ms": round(stats["max_lag_ms"], 1),
+            "avg_lag_ms": round(stats["total_lag_ms"] / stats["processed"], 1) if stats["processed"] else None,
+            "worker_running": bool(cls._worker and not cls._worker.done()),
+        }
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    @classmethod
+    async def _run(cls) -> None:
+        """Worker döngüsü: vadesi gelen müşterileri toplu işle."""
+        while True:
+            if not cls._pending:
+                cls._wakeup.clear()
+                await cls._wakeup.wait()
+                continue
+
+            delay = cls._next_due() - monotonic()
+            if delay > 0:
+                cls._wakeup.clear()
+                try:
+                    await asyncio.wait_for(cls._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await cls._process(cls._take(due_only=True))
+
+    @classmethod
+    def _due_at(cls, entry: tuple) -> float:
+        """Kaydın işleneceği an (debounce, en fazla MAX_DELAY)."""
+        _, first_marked, last_marked = entry
+        return min(last_marked + cls.DEBOUNCE_SECONDS, first_marked + cls.MAX_DELAY_SECONDS)
+
+    @classmethod
+    def _next_due(cls) -> float:
+        return min(cls._due_at(e) for e in cls._pending.values())
+
+    @classmethod
+    def _take(cls, due_only: bool) -> Dict[str, tuple]:
+        """Vadesi gelen (veya tüm) kayıtları kuyruktan al."""
+        now = monotonic()
+        batch = {}
+        for cid, entry in list(cls._pending.items()):
+            if due_only and cls._due_at(entry) > now:
+                continue
+            batch[cid] = cls._pending.pop(cid)
+            if len(batch) >= cls.BATCH_SIZE:
+                break
+        return batch
+
+    @classmethod
+    async def _process(cls, batch: Dict[str, tuple]) -> int:
+        """Kayıtları kaynağa göre gruplayıp DraftEngine.save_many ile yaz."""
+        from .draft_engine import DraftEngine
+
+        if not batch:
+            return 0
+
+        by_source: Dict[str, List[str]] = {}
+        for cid, (source, _, _) in batch.items():
+            by_source.setdefault(source, []).append(cid)
+
+        cls._stats["in_flight"] = len(batch)
+        try:
+            for source, customer_ids in by_source.items():
+                try:
+                    await DraftEngine.save_many(customer_ids, source)
+                except Exception:
+                    cls._stats["errors"] += 1
+                    logger.exception("Draft yenileme hatası (%d müşteri)", len(customer_ids))
+        finally:
+            cls._stats["in_flight"] = 0
+
+        now = monotonic()
+        for _, first_marked, _ in batch.values():
+            lag_ms = (now - first_marked) * 1000
+            cls._stats["total_lag_ms"] += lag_ms
+            cls._stats["max_lag_ms"] = max(cls._stats["max_lag_ms"], lag_ms)
+        cls._stats["last_lag_ms"] = round(lag_ms, 1)
+        cls._stats["processed"] += len(batch)
+        cls._stats["batches"] += 1
+        return len(batch)
@@ -0,0 +1,96 @@
+"""
+ŞEFTALİ - Toplu İsim Zenginleştirme
+Liste endpoint'lerinde satır başına find_one yerine koleksiyon başına tek
+$in sorgusu ile müşteri / ürün adlarını ekleyen yardımcı
+
+Kullanım (istek başına bir örnek oluşturulur):
+    lookups = LookupCache()
+    await lookups.enrich(items, "customer_id", COL_CUSTOMERS, {"name": "customer_name"})
+    await lookups.enrich(items, "product_id", COL_PRODUCTS, {"name": "product_name"},
+                         key="product_id")
+
+Aynı istekte tekrar eden ID'ler sadece bir kez sorgulanır; bulunamayan
+ID'ler de önbelleğe alınır ve tekrar sorgulanmaz.
+"""
+
+from typing import Dict, List, Any, Iterable, Optional
+
+from config.database import db
+
+
+class LookupCache:
+    """
+    İstek kapsamlı $in arama önbelleği.
+
+    Önbellek (koleksiyon, anahtar alan, alanlar) bazında tutulur; örnek
+    istek bitince atılır, istekler arasında paylaşılmaz.
+    """
+
+    def __init__(self, database=None):
+        self._db = database if database is not None else db
+        self._cache: Dict[tuple, Dict[Any, Optional[dict]]] = {}
+        self.queries = 0
+
+    async def fetch(
+        self,
+        collection: str,
+        ids: Iterable[Any],
+        key: str = "id",
+        fields: Iterable[str] = ("name",)
+    ) -> Dict[Any, dict]:
+        """
+        ID listesine karşılık gelen dokümanları getir.
+
+        Args:
+            collection: Koleksiyon adı
+            ids: Aranacak ID'ler (tekrar ve None olabilir)
+            key: Dokümanda ID'nin tutulduğu alan
+            fields: Getirilecek alanlar
+
+        Returns:
+            {id: doküman} (bulunamayanlar dahil edilmez)
+        """
+        fields = tuple(sorted(fields))
+        cache = self._cache.setdefault((collection, key, fields), {})
+
+        wanted = {i for i in ids if i is not None}
+        missing = [i for i in wanted if i not in cache]
+        if missing:
+            projection = {"_id": 0, key: 1, **{f: 1 for f in fields}}
+            self.queries += 1
+            async for doc in self._db[collection].find({key: {"$in": missing}}, projection):
+                cache.setdefault(doc.get(key), doc)
+            for i in missing:
+                cache.setdefault(i, None)
+
+        return {i: cache[i] for i in wanted if cache[i] is not None}
+
+    async def enrich(
+        self,
+        rows: List[dict],
+        id_field: str,
+        collection: str,
+        mapping: Dict[str, str],
+        key: str = "id",
+        default: Any = ""
+    ) -> List[dict]:
+        """
+        Satırlara ilişkili dokümandan alan ekle (yerinde).
+
+        Args:
+            rows: Zenginleştirilecek satırlar
+            id_field: Satırda ilişkili ID'nin bulunduğu alan
+            collection: İlişkili koleksiyon
+            mapping: {doküman alanı: satıra yazılacak alan}
+            key: İlişkili dokümanda ID alanı
+            default: Dokümanda alan yoksa yazılacak değer
+
+        Satır için doküman bulunamazsa satır değiştirilmez.
+        """
+        docs = await self.fetch(collection, (r.get(id_field) for r in rows), key, mapping.keys())
+        for row in rows:
+            doc = docs.get(row.get(id_field))
+            if doc:
+                for src, dst in mapping.items():
+                    row[dst] = doc.get(src, default)
+        return rows
@@ -9,6 +9,11 @@ Plasiyer sipariş hesaplama servisi
 4. Toplam ihtiyaçtan plasiyer stoğunu çıkar
 5. Koli yuvarlaması uygula
 6. Final sipariş listesini oluştur
+
+İki hesaplama motoru vardır (calculate(engine=...)):
+- "python": Koleksiyonlar ayrı ayrı okunur, Python'da birleştirilir
+- "pipeline": Müşteri seçimi, sipariş/draft birleştirmesi sf_customers üzerinde
+  tek aggregation ile yapılır; satırlar cursor'dan akarken toplanır
 """
 
 from typing import Dict, List, Optional, Any
@@ -18,10 +23,11 @@ from config.database import db
 
 from .core import (
     now_utc, to_iso,
-    COL_CUSTOMERS, COL_PRODUCTS, COL_ORDERS,
+    COL_CUSTOMERS, COL_ORDERS,
     COL_SYSTEM_DRAFTS, COL_PLASIYER_STOCK,
     WEEKDAY_CODES
 )
+from .product_catalog import ProductCatalog
 
 
 class OrderService:
@@ -31,6 +37,10 @@ class OrderService:
     Plasiyerin günlük rota için ihtiyaç listesini hesaplar.
     """
     
+    ENGINES = ("python", "pipeline")
+    CUSTOMER_CHUNK_SIZE = 1000
+    ORDER_STATUSES = ["submitted", "approved"]
+    
     # =========================================================================
     # PUBLIC METHODS
     # =========================================================================
@@ -45,7 +55,8 @@ class OrderService:
     async def calculate(
         cls,
         salesperson_id: str,
-        route_day: Optional[str] = None
+        route_day: Optional[str] = None,
+        engine: str = "python"
     ) -> Dict[str, Any]:
         """
         Plasiyerin belirtilen gün için sipariş ihtiyacını hesapla.
@@ -53,40 +64,65 @@ class OrderService:
         Args:
             salesperson_id: Plasiyer ID'si
             route_day: Rota günü (örn: "SAT"). None ise yarın.
+            engine: "python" (çoklu sorgu) veya "pipeline" (tek aggregation)
             
         Returns:
             Sipariş hesaplama sonucu
         """
+        if engine not in cls.ENGINES:
+            raise ValueError(f"Geçersiz hesaplama motoru: {engine}")
+        
         if not route_day:
             route_day = cls.get_tomorrow_route_code()
         
         now = now_utc()
         
-        # Rota müşterilerini al
-        customers = await cls._get_route_customers(salesperson_id, route_day)
-        customer_ids = [c["id"] for c in customers]
-        customer_names = {c["id"]: c.get("name", "Bilinmeyen") for c in customers}
+        if engine == "pipeline":
+            return await cls._calculate_pipeline(salesperson_id, route_day, now)
         
-        if not customer_ids:
-            return cls._empty_result(salesperson_id, route_day, now)
+        # Rota müşterileri parça parça okunur; her parça için siparişler ve
+        # draft'lar $in ile alınıp toplamlara eklenir (bellek parça boyutuyla sınırlı)
+        order_details, draft_details = [], []
+        totals = {}
+        total_customers = 0
+        customers_with_orders = 0
         
-        # Siparişleri al
-        customer_orders = await cls._get_customer_orders(customer_ids)
+        async for customers in cls._iter_route_customers(salesperson_id, route_day):
+            customer_ids = [c["id"] for c in customers]
+            customer_names = {c["id"]: c.get("name", "Bilinmeyen") for c in customers}
+            
+            # Siparişleri al
+            customer_orders = await cls._get_customer_orders(customer_ids)
+            
+            # Draft'ları al (sipariş atmayanlar için)
+            customers_without_orders = [cid for cid in customer_ids if cid not in customer_orders]
+            customer_drafts = await cls._get_customer_drafts(customers_without_orders)
+            
+            # Hesapla
+            details, chunk_totals = cls._aggregate_orders(
+                customer_orders, customer_drafts, customer_names
+            )
+            order_details.extend(d for d in details if d["source"] == "order")
+            draft_details.extend(d for d in details if d["source"] == "draft")
+            for pid, data in chunk_totals.items():
+                if pid not in totals:
+                    totals[pid] = {"orders_qty": 0, "drafts_qty": 0}
+                totals[pid]["orders_qty"] += data["orders_qty"]
+                totals[pid]["drafts_qty"] += data["drafts_qty"]
+            
+            total_customers += len(customer_ids)
+            customers_with_orders += len(customer_orders)
+        
+        if not total_customers:
+            return cls._empty_result(salesperson_id, route_day, now)
         
-        # Draft'ları al (sipariş atmayanlar için)
-        customers_without_orders = [cid for cid in customer_ids if cid not in customer_orders]
-        customer_drafts = await cls._get_customer_drafts(customers_without_orders)
+        customer_details = order_details + draft_details
         
         # Plasiyer stoğu
         plasiyer_stock = await cls._get_plasiyer_stock(salesperson_id)
         
-        # Ürün bilgileri
-        product_info = await cls._get_product_info()
-        
-        # Hesapla
-        customer_details, totals = cls._aggregate_orders(
-            customer_orders, customer_drafts, customer_names
-        )
+        # Ürün bilgileri (sadece ihtiyaç listesindeki ürünler)
+        product_info = await cls._get_product_info(list(totals))
         
         # Final hesaplama (stok düşürme + koli yuvarlama)
         final_totals, total_items, total_cases = cls._calculate_final_totals(
@@ -101,9 +137,9 @@ class OrderService:
             "customers": customer_details,
             "totals": final_totals,
             "summary": {
-                "total_customers": len(customer_ids),
-                "customers_with_orders": len(customer_orders),
-                "customers_with_drafts": len([c for c in customer_details if c["source"] == "draft"]),
+                "total_customers": total_customers,
+                "customers_with_orders": customers_with_orders,
+                "customers_with_drafts": len(draft_details),
                 "total_products": len(final_totals),
                 "total_items_to_order": total_items,
                 "total_cases_to_order": total_cases
@@ -181,14 +217,29 @@ class OrderService:
     # =========================================================================
     
     @classmethod
-    async def _get_route_customers(cls, salesperson_id: str, route_day: str) -> List[dict]:
-        """Rota müşterilerini getir."""
-        cursor = db[COL_CUSTOMERS].find({
+    def _route_customers_cursor(cls, salesperson_id: str, route_day: str):
+        return db[COL_CUSTOMERS].find({
             "salesperson_id": salesperson_id,
             "is_active": True,
             "route_plan.days": route_day
-        }, {"_id": 0})
-        return await cursor.to_list(length=500)
+        }, {"_id": 0}).batch_size(cls.CUSTOMER_CHUNK_SIZE)
+    
+    @classmethod
+    async def _get_route_customers(cls, salesperson_id: str, route_day: str) -> List[dict]:
+        """Rota müşterilerini getir."""
+        return [c async for c in cls._route_customers_cursor(salesperson_id, route_day)]
+    
+    @classmethod
+    async def _iter_route_customers(cls, salesperson_id: str, route_day: str):
+        """Rota müşterilerini CUSTOMER_CHUNK_SIZE'lık parçalar halinde getir."""
+        chunk = []
+        async for customer in cls._route_customers_cursor(salesperson_id, route_day):
+            chunk.append(customer)
+            if len(chunk) >= cls.CUSTOMER_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
     
     @classmethod
     async def _get_customer_orders(cls, customer_ids: List[str]) -> Dict[str, dict]:
@@ -197,15 +248,13 @@ class OrderService:
         
         cursor = db[COL_ORDERS].find({
             "customer_id": {"$in": customer_ids},
-            "status": {"$in": ["submitted", "approved"]},
+            "status": {"$in": cls.ORDER_STATUSES},
             "created_at": {"$gte": to_iso(today_start)}
         }, {"_id": 0})
         
-        orders = await cursor.to_list(length=500)
-        
         # Müşteri bazında grupla (en son sipariş)
         customer_orders = {}
-        for order in orders:
+        async for order in cursor:
             cid = order["customer_id"]
             if cid not in customer_orders:
                 customer_orders[cid] = order
@@ -219,10 +268,9 @@ class OrderService:
         """Müşteri draft'larını getir."""
         cursor = db[COL_SYSTEM_DRAFTS].find({
             "customer_id": {"$in": customer_ids}
-        }, {"_id": 0})
+        }, {"_id": 0, "draft": 0})
         
-        drafts = await cursor.to_list(length=500)
-        return {d["customer_id"]: d for d in drafts}
+        return {d["customer_id"]: d async for d in cursor}
     
     @classmethod
     async def _get_plasiyer_stock(cls, salesperson_id: str) -> Dict[str, float]:
@@ -238,11 +286,152 @@ class OrderService:
         return {item["product_id"]: item["qty"] for item in stock_doc.get("items", [])}
     
     @classmethod
-    async def _get_product_info(cls) -> Dict[str, dict]:
-        """Ürün bilgilerini getir."""
-        cursor = db[COL_PRODUCTS].find({}, {"_id": 0})
-        products = await cursor.to_list(length=500)
-        return {p["product_id"]: p for p in products}
+    async def _get_product_info(cls, product_ids: Optional[List[str]] = None) -> Dict[str, dict]:
+        """Ürün bilgilerini katalogdan getir (product_ids verilirse sadece o ürünler)."""
+        if product_ids is not None:
+            return await ProductCatalog.get_many(product_ids)
+        return {p["product_id"]: p for p in await ProductCatalog.all() if p.get("product_id")}
+    
+    # =========================================================================
+    # PRIVATE METHODS - Aggregation Engine
+    # =========================================================================
+    
+    @classmethod
+    async def _calculate_pipeline(cls, salesperson_id: str, route_day: str, now) -> Dict[str, Any]:
+        """
+        calculate() ile aynı sonucu tek aggregation ile üret.
+        
+        Sipariş > draft önceliği ve kalem seçimi veritabanında yapılır;
+        müşteri satırları cursor'dan akarken ürün toplamları biriktirilir
+        (tek çıktı dokümanı / 16MB sınırı yok), stok düşürme ve koli
+        yuvarlaması python motoruyla aynı şekilde uygulanır.
+        """
+        order_details, draft_details = [], []
+        totals = {}
+        total_customers = 0
+        
+        pipeline = cls._build_order_pipeline(salesperson_id, route_day, now)
+        async for row in db[COL_CUSTOMERS].aggregate(pipeline):
+            total_customers += 1
+            if row["source"] == "order":
+                order_details.append(row)
+            elif row["items"]:
+                draft_details.append(row)
+            else:
+                continue
+            qty_key = "orders_qty" if row["source"] == "order" else "drafts_qty"
+            for item in row["items"]:
+                entry = totals.setdefault(item["product_id"], {"orders_qty": 0, "drafts_qty": 0})
+                entry[qty_key] += item["qty"]
+        
+        if not total_customers:
+            return cls._empty_result(salesperson_id, route_day, now)
+        
+        customer_details = order_details + draft_details
+        plasiyer_stock = await cls._get_plasiyer_stock(salesperson_id)
+        product_info = await cls._get_product_info(list(totals))
+        final_totals, total_items, total_cases = cls._calculate_final_totals(
+            totals, plasiyer_stock, product_info
+        )
+        
+        return {
+            "salesperson_id": salesperson_id,
+            "route_day": route_day,
+            "route_day_name": cls._day_name(route_day),
+            "calculated_at": to_iso(now),
+            "customers": customer_details,
+            "totals": final_totals,
+            "summary": {
+                "total_customers": total_customers,
+                "customers_with_orders": len(order_details),
+                "customers_with_drafts": len(draft_details),
+                "total_products": len(final_totals),
+                "total_items_to_order": total_items,
+                "total_cases_to_order": total_cases
+            }
+        }
+    
+    @classmethod
+    def _build_order_pipeline(cls, salesperson_id: str, route_day: str, now) -> List[dict]:
+        """Sipariş hesaplama aggregation pipeline'ını oluştur."""
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        order_items = {
+            "$map": {
+                "input": {"$ifNull": ["$order.items", []]},
+                "as": "it",
+                "in": {"product_id": "$$it.product_id", "qty": {"$ifNull": ["$$it.qty", 0]}}
+            }
+        }
+        draft_items = {
+            "$map": {
+                "input": {
+                    "$filter": {
+                        "input": {"$ifNull": ["$draft.items", []]},
+                        "as": "it",
+                        "cond": {"$gt": [{"$ifNull": ["$$it.suggested_qty", 0]}, 0]}
+                    }
+                },
+                "as": "it",
+                "in": {"product_id": "$$it.product_id", "qty": "$$it.suggested_qty"}
+            }
+        }
+        
+        return [
+            # 1. Rota müşterileri
+            {"$match": {
+                "salesperson_id": salesperson_id,
+                "is_active": True,
+                "route_plan.days": route_day
+            }},
+            {"$project": {"id": 1, "name": 1}},
+            
+            # 2. Bugünkü en son sipariş
+            {"$lookup": {
+                "from": COL_ORDERS,
+                "let": {"cid": "$id"},
+                "pipeline": [
+                    {"$match": {
+                        "$expr": {"$eq": ["$customer_id", "$$cid"]},
+                        "status": {"$in": cls.ORDER_STATUSES},
+                        "created_at": {"$gte": to_iso(today_start)}
+                    }},
+                    {"$sort": {"created_at": -1}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 0, "items": 1}}
+                ],
+                "as": "order"
+            }},
+            {"$addFields": {
+                "has_order": {"$gt": [{"$size": "$order"}, 0]},
+                "order": {"$arrayElemAt": ["$order", 0]}
+            }},
+            
+            # 3. Sipariş atmayanlar için draft
+            {"$lookup": {
+                "from": COL_SYSTEM_DRAFTS,
+                "let": {"cid": "$id", "has_order": "$has_order"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$and": [
+                        {"$eq": ["$customer_id", "$$cid"]},
+                        {"$not": ["$$has_order"]}
+                    ]}}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 0, "items": 1}}
+                ],
+                "as": "draft"
+            }},
+            {"$addFields": {"draft": {"$arrayElemAt": ["$draft", 0]}}},
+            
+            # 4. Kaynak ve kalemler (sipariş > draft)
+            {"$project": {
+                "_id": 0,
+                "customer_id": "$id",
+                "customer_name": {"$ifNull": ["$name", "Bilinmeyen"]},
+                "source": {"$cond": ["$has_order", "order", "draft"]},
+                "items": {"$cond": ["$has_order", order_items, draft_items]}
+            }}
+        ]
     
     # =========================================================================
     # PRIVATE METHODS - Calculation
@@ -0,0 +1,172 @@
+"""
+ŞEFTALİ - Ürün Kataloğu Önbelleği
+Küçük ve nadiren değişen ürün kataloğunun süreç içi önbelleği
+
+Katalog tek sorguyla belleğe alınır ve product_id / id / sku / code
+alanlarına göre indekslenir. Önbellek TTL_SECONDS sonra ya da ürün yazan
+endpoint'lerden invalidate() çağrıldığında yeniden yüklenir.
+
+Kullanım:
+    products = await ProductCatalog.all()
+    product = await ProductCatalog.get(product_id)
+    by_id = await ProductCatalog.get_many(product_ids, key="id")
+    ProductCatalog.invalidate()       # ürün yazımlarından sonra
+    ProductCatalog.metrics()          # hit / miss sayaçları
+
+Dönen dokümanlar kopyadır; çağıran taraf değiştirebilir.
+"""
+
+import asyncio
+from time import monotonic
+from typing import Dict, List, Any, Iterable, Optional
+
+from config.database import db
+
+from .core import COL_PRODUCTS
+
+
+class ProductCatalog:
+    """
+    Süreç içi ürün kataloğu önbelleği.
+
+    Katalog {alan: {değer: doküman}} indeksleriyle tutulur; süresi dolmuş
+    veya geçersiz kılınmış katalog ilk erişimde (tek yükleme ile) yenilenir.
+    """
+
+    TTL_SECONDS = 300
+    INDEX_KEYS = ("product_id", "id", "sku", "code")
+
+    _products: Optional[List[dict]] = None
+    _indexes: Dict[str, Dict[Any, dict]] = {}
+    _loaded_at: float = float("-inf")
+    _generation = 0
+    _lock: Optional[asyncio.Lock] = None
+    _lock_loop = None
+    _stats: Dict[str, int] = {
+        "hits": 0,
+        "misses": 0,
+        "loads": 0,
+        "invalidations": 0,
+    }
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    @classmethod
+    async def all(cls) -> List[dict]:
+        """Tüm ürünleri getir."""
+        products, _ = await cls._ensure_loaded()
+        return [dict(p) for p in products]
+
+    @classmethod
+    async def get(cls, value: Any, key: str = "product_id") -> Optional[dict]:
+        """
+        Tek ürünü indeksli alana göre getir.
+
+        Args:
+            value: Aranan değer
+            key: İndeksli alan (product_id, id, sku, code)
+
+        Returns:
+            Ürün dokümanı veya None
+        """
+        _, indexes = await cls._ensure_loaded()
+        product = cls._index(indexes, key).get(value)
+        return dict(product) if product else None
+
+    @classmethod
+    async def get_many(cls, values: Iterable[Any], key: str = "product_id") -> Dict[Any, dict]:
+        """
+        Birden fazla ürünü indeksli alana göre getir.
+
+        Returns:
+            {değer: ürün} (bulunamayanlar dahil edilmez)
+        """
+        _, indexes = await cls._ensure_loaded()
+        index = cls._index(indexes, key)
+        return {v: dict(index[v]) for v in values if v in index}
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Katalogu geçersiz kıl; sonraki erişim veritabanından yükler."""
+        cls._loaded_at = float("-inf")
+        cls._generation += 1
+        cls._stats["invalidations"] += 1
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        """Önbellek boyutu, yaşı ve hit / miss sayaçları."""
+        stats = cls._stats
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "size": len(cls._products) if cls._products is not None else 0,
+            "age_seconds": round(monotonic() - cls._loaded_at, 1) if cls._is_fresh() else None,
+            "ttl_seconds": cls.TTL_SECONDS,
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else None,
+            "loads": stats["loads"],
+            "invalidations": stats["invalidations"],
+        }
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    @classmethod
+    def _is_fresh(cls) -> bool:
+        return cls._products is not None and monotonic() - cls._loaded_at < cls.TTL_SECONDS
+
+    @classmethod
+    def _index(cls, indexes: Dict[str, Dict[Any, dict]], key: str) -> Dict[Any, dict]:
+        if key not in cls.INDEX_KEYS:
+            raise ValueError(f"İndekslenmemiş ürün alanı: {key}")
+        return indexes[key]
+
+    @classmethod
+    def _get_lock(cls) -> asyncio.Lock:
+        """Çalışan event loop'a ait yükleme kilidi."""
+        loop = asyncio.get_running_loop()
+        if cls._lock is None or cls._lock_loop is not loop:
+            cls._lock = asyncio.Lock()
+            cls._lock_loop = loop
+        return cls._lock
+
+    @classmethod
+    async def _ensure_loaded(cls) -> tuple:
+        """
+        Katalog taze değilse yükle; eşzamanlı istekler tek yüklemeyi bekler.
+
+        Returns:
+            (ürünler, indeksler) anlık görüntüsü
+        """
+        if cls._is_fresh():
+            cls._stats["hits"] += 1
+            return cls._products, cls._indexes
+
+        cls._stats["misses"] += 1
+        async with cls._get_lock():
+            if not cls._is_fresh():
+                await cls._load()
+            return cls._products, cls._indexes
+
+    @classmethod
+    async def _load(cls) -> None:
+        """Tüm katalogu tek sorguyla yükle ve indeksle."""
+        generation = cls._generation
+        products = [p async for p in db[COL_PRODUCTS].find({}, {"_id": 0})]
+
+        indexes: Dict[str, Dict[Any, dict]] = {key: {} for key in cls.INDEX_KEYS}
+        for product in products:
+            for key in cls.INDEX_KEYS:
+                value = product.get(key)
+                if value is not None:
+                    indexes[key].setdefault(value, product)
+
+        cls._stats["loads"] += 1
+        # Yükleme sırasında invalidate() çağrıldıysa sonuç eski olabilir;
+        # yine de döndürülür ama bir sonraki erişim tekrar yükler.
+        cls._products = products
+        cls._indexes = indexes
+        cls._loaded_at = monotonic() if generation == cls._generation else float("-inf")
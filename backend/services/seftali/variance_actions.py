@@ -0,0 +1,113 @@
+"""
+ŞEFTALİ - Toplu Varyans İşlemleri
+Müşterinin varyans olaylarına toplu neden girme / kapatma
+
+İstenen id'lerin sahipliği ve durumu tek find ile doğrulanır, değişiklik
+tek update_many ile uygulanır (id başına find_one + update_one yerine).
+Yarışta başka bir istek olayı önce kapatırsa (update_many filtresindeki
+status koşulu) ilgili id'ler tek ek sorguyla "conflict" olarak raporlanır.
+
+Kullanım:
+    result = await VarianceActions.resolve_bulk(
+        customer_id, event_ids, "recorded",
+        {"reason_code": "TATIL", "reason_note": ""}
+    )
+    result["modified"], result["results"]   # [{"event_id", "outcome"}]
+"""
+
+from typing import Dict, List, Any
+
+from config.database import db
+
+from .core import now_utc, to_iso, COL_VARIANCE_EVENTS
+
+
+class VarianceActions:
+    """
+    Toplu varyans neden / kapatma işlemleri.
+
+    Sonuçlar (outcome):
+        updated      Olay güncellendi
+        not_found    Olay yok veya müşteriye ait değil
+        not_pending  Olay needs_reason durumunda değil
+        conflict     Doğrulamadan sonra başka bir istek güncelledi
+    """
+
+    PENDING_STATUS = "needs_reason"
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    @classmethod
+    async def resolve_bulk(
+        cls,
+        customer_id: str,
+        event_ids: List[str],
+        status: str,
+        fields: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Bekleyen varyans olaylarını tek update_many ile yeni duruma geçir.
+
+        Args:
+            customer_id: Olayların sahibi müşteri
+            event_ids: Olay ID'leri (tekrarlar birleştirilir)
+            status: Yeni durum (recorded, dismissed)
+            fields: Ek $set alanları (reason_code, reason_note, ...)
+
+        Returns:
+            {"modified": int, "results": [{"event_id", "outcome"}, ...]}
+        """
+        ids = list(dict.fromkeys(event_ids))
+        if not ids:
+            return {"modified": 0, "results": []}
+
+        current = {
+            ev["id"]: ev["status"]
+            async for ev in db[COL_VARIANCE_EVENTS].find(
+                {"id": {"$in": ids}, "customer_id": customer_id},
+                {"_id": 0, "id": 1, "status": 1}
+            )
+        }
+        outcomes = {
+            eid: "not_found" if eid not in current
+            else "updated" if current[eid] == cls.PENDING_STATUS
+            else "not_pending"
+            for eid in ids
+        }
+        eligible = [eid for eid in ids if outcomes[eid] == "updated"]
+
+        modified = 0
+        if eligible:
+            now = to_iso(now_utc())
+            result = await db[COL_VARIANCE_EVENTS].update_many(
+                {"id": {"$in": eligible}, "customer_id": customer_id, "status": cls.PENDING_STATUS},
+                {"$set": {**fields, "status": status, "customer_action_at": now, "updated_at": now}}
+            )
+            modified = result.modified_count
+            if modified < len(eligible):
+                await cls._mark_conflicts(eligible, status, now, outcomes)
+
+        return {
+            "modified": modified,
+            "results": [{"event_id": eid, "outcome": outcomes[eid]} for eid in ids],
+        }
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    @classmethod
+    async def _mark_conflicts(cls, eligible: List[str], status: str, now: str, outcomes: Dict[str, str]) -> None:
+        """Bu istekle güncellenmeyen (yarışı kaybeden) id'leri işaretle."""
+        applied = {
+            ev["id"]
+            async for ev in db[COL_VARIANCE_EVENTS].find(
+                {"id": {"$in": eligible}, "status": status, "customer_action_at": now},
+                {"_id": 0, "id": 1}
+            )
+        }
+        for eid in eligible:
+            if eid not in applied:
+                outcomes[eid] = "conflict"
@@ -0,0 +1,49 @@
+"""
+Consumption Baseline Tests
+Beklenen tüketim baz değerlerinin (consumption_baselines) hesaplanmasını doğrular.
+
+Run: cd /app/backend && python -m pytest tests/test_consumption_baselines.py -q
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services.consumption_calculation_service import ConsumptionCalculationService
+
+
+def _service():
+    return ConsumptionCalculationService(db=None)
+
+
+def _record(date: str, rate: float) -> dict:
+    return {"target_invoice_date": date, "daily_consumption_rate": rate, "can_calculate": True}
+
+
+def test_same_month_last_year_is_preferred():
+    service = _service()
+    baseline = service._new_baseline("c1", "SUT001")
+    for record in [_record("10 01 2023", 2.0), _record("25 01 2023", 4.0), _record("10 06 2023", 10.0)]:
+        service._apply_to_baseline(baseline, record)
+
+    assert baseline["months"]["2023-01"] == {"rate_sum": 6.0, "count": 2}
+    # 2024 Ocak -> 2023 Ocak ortalaması (3.0) * 10 gün
+    assert service._expected_from_baseline(baseline, 10, datetime(2024, 1, 15)) == 30.0
+
+
+def test_falls_back_to_recent_window():
+    service = _service()
+    baseline = service._new_baseline("c1", "SUT001")
+    for i in range(1, 8):
+        service._apply_to_baseline(baseline, _record(f"{i:02d} 03 2024", float(i)))
+
+    assert baseline["recent_rates"] == [3.0, 4.0, 5.0, 6.0, 7.0]
+    # Önceki yıl Nisan verisi yok -> son 5 kaydın ortalaması (5.0) * 4 gün
+    assert service._expected_from_baseline(baseline, 4, datetime(2024, 4, 20)) == 20.0
+
+
+def test_missing_baseline_returns_zero():
+    assert _service()._expected_from_baseline(None, 30, datetime(2024, 1, 1)) == 0.0
@@ -0,0 +1,68 @@
+"""
+Consumption Series Tests
+LTTB indirgemesinin uç noktaları ve tepe noktalarını koruduğunu, sayfa
+cursor'ının bir sonraki kova başlangıcına çevrildiğini doğrular.
+
+Run: cd /app/backend && python -m pytest tests/test_consumption_series.py -q
+"""
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services.seftali.consumption_series import ConsumptionSeries, lttb
+
+
+def _series(values, start=date(2024, 1, 1)):
+    return [
+        {"date": (start + timedelta(days=i)).isoformat(), "total": v, "count": 1, "avg": v}
+        for i, v in enumerate(values)
+    ]
+
+
+def test_lttb_keeps_short_series():
+    points = _series([1, 2, 3])
+    assert lttb(points, 10) == points
+    assert lttb(points, 2) == points
+
+
+def test_lttb_reduces_to_threshold_and_keeps_order():
+    points = _series([(i * 7) % 13 for i in range(1000)])
+    sampled = lttb(points, 100)
+    assert len(sampled) == 100
+    assert sampled[0] is points[0] and sampled[-1] is points[-1]
+    assert [p["date"] for p in sampled] == sorted(p["date"] for p in sampled)
+
+
+def test_lttb_keeps_spike():
+    values = [1.0] * 500
+    values[321] = 50.0
+    sampled = lttb(_series(values), 20)
+    assert any(p["total"] == 50.0 for p in sampled)
+
+
+@pytest.mark.parametrize("bucket, cursor, expected", [
+    ("day", "2024-02-28", "2024-02-29"),
+    ("week", "2024-12-30", "2025-01-06"),
+    ("month", "2024-01-01", "2024-02-01"),
+    ("month", "2024-12-01", "2025-01-01"),
+])
+def test_next_bucket_start(bucket, cursor, expected):
+    assert ConsumptionSeries._next_bucket_start(cursor, bucket) == expected
+
+
+def test_invalid_cursor_raises():
+    with pytest.raises(ValueError):
+        ConsumptionSeries._next_bucket_start("2024-13-01", "day")
+
+
+def test_week_pipeline_starts_on_monday():
+    pipeline = ConsumptionSeries._pipeline({"customer_id": "x"}, "week", 11)
+    trunc = pipeline[1]["$group"]["_id"]["$dateTrunc"]
+    assert trunc["unit"] == "week" and trunc["startOfWeek"] == "monday"
+    assert pipeline[3] == {"$limit": 11}
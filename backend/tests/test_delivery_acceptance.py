@@ -0,0 +1,129 @@
+"""
+Delivery Acceptance Tests
+Onayın aktif çalışma kopyasını kapattığını, recover() ile geç
+tamamlanan onayın müşterinin onaydan sonra açtığı kopyayı silmediğini ve
+outbox yolunun (_complete, recover) post_accept_pending işaretini
+temizlediğini doğrular.
+
+Gerçek MongoDB gerektirir (MONGO_URL / DB_NAME). Veriler çalışma başına
+açılan geçici bir veritabanına yazılır ve sonunda silinir.
+
+Run: cd /app/backend && python -m pytest tests/test_delivery_acceptance.py -q
+"""
+import sys
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from config.database import Database
+from config.settings import settings
+from services.seftali import customer_summary, delivery_acceptance, draft_engine
+from services.seftali.core import (
+    now_utc, to_iso, COL_DELIVERIES, COL_WORKING_COPIES, COL_DE_STATE, COL_AUDIT_EVENTS
+)
+from services.seftali.delivery_acceptance import DeliveryAcceptance
+from services.seftali.draft_queue import DraftQueue
+
+RUN = uuid.uuid4().hex[:8]
+TEST_DB_NAME = f"{settings.DB_NAME}_accept_{RUN}"
+db = Database.get_client()[TEST_DB_NAME]
+
+
+@pytest.fixture
+async def test_db(monkeypatch):
+    try:
+        await db.command("ping")
+    except Exception as exc:
+        pytest.skip(f"MongoDB erişilemiyor: {exc}")
+
+    for module in (delivery_acceptance, customer_summary, draft_engine):
+        monkeypatch.setattr(module, "db", db)
+    # Arka plan işleri testlerde doğrudan _complete / recover ile çalıştırılır
+    monkeypatch.setattr(DeliveryAcceptance, "_schedule", classmethod(lambda cls, delivery: None))
+    monkeypatch.setattr(DraftQueue, "mark_dirty", classmethod(lambda cls, customer_id, source="system": None))
+    try:
+        yield db
+    finally:
+        await Database.get_client().drop_database(TEST_DB_NAME)
+
+
+async def _working_copy(wc_id: str, customer_id: str, created_at=None) -> None:
+    doc = {"id": wc_id, "customer_id": customer_id, "status": "active", "items": []}
+    if created_at is not None:
+        doc["created_at"] = created_at
+    await db[COL_WORKING_COPIES].insert_one(doc)
+
+
+async def _status(wc_id: str) -> str:
+    return (await db[COL_WORKING_COPIES].find_one({"id": wc_id}))["status"]
+
+
+async def test_accept_closes_active_working_copies(test_db):
+    await db[COL_DELIVERIES].insert_one(
+        {"id": "d1", "customer_id": "c1", "acceptance_status": "pending", "items": []}
+    )
+    await _working_copy("wc1", "c1", to_iso(now_utc() - timedelta(hours=1)))
+    await _working_copy("wc-legacy", "c1")
+
+    result = await DeliveryAcceptance.accept("c1", "d1", "u1")
+
+    assert result["working_copy_deleted"] is True
+    assert await _status("wc1") == "deleted_by_delivery"
+    assert await _status("wc-legacy") == "deleted_by_delivery"
+    assert await DeliveryAcceptance.accept("c1", "d1", "u1") is None
+
+
+async def test_late_recovery_keeps_copy_opened_after_acceptance(test_db):
+    accepted_at = now_utc() - timedelta(minutes=10)
+    await _working_copy("wc-before", "c2", to_iso(accepted_at - timedelta(minutes=5)))
+    await _working_copy("wc-after", "c2", to_iso(accepted_at + timedelta(minutes=5)))
+
+    closed = await DeliveryAcceptance._close_working_copies("c2", to_iso(accepted_at))
+
+    assert closed is True
+    assert await _status("wc-before") == "deleted_by_delivery"
+    assert await _status("wc-after") == "active"
+
+
+async def _flagged_delivery(delivery_id: str, customer_id: str, accepted_at) -> dict:
+    delivery = {
+        "id": delivery_id, "customer_id": customer_id, "acceptance_status": "accepted",
+        "delivered_at": to_iso(accepted_at), "accepted_at": to_iso(accepted_at),
+        "accepted_by": "u1", "post_accept_pending": True,
+        "items": [{"product_id": "p1", "qty": 4}],
+    }
+    await db[COL_DELIVERIES].insert_one(dict(delivery))
+    return delivery
+
+
+async def test_complete_clears_outbox_flag(test_db):
+    await db[COL_DE_STATE].insert_one({"customer_id": "c3", "product_id": "p1"})
+    delivery = await _flagged_delivery("d3", "c3", now_utc())
+
+    assert await DeliveryAcceptance._complete(delivery) is True
+
+    assert "post_accept_pending" not in await db[COL_DELIVERIES].find_one({"id": "d3"})
+    state = await db[COL_DE_STATE].find_one({"customer_id": "c3", "product_id": "p1"})
+    assert state["last_accepted_delivery_qty"] == 4
+    assert await db[COL_AUDIT_EVENTS].count_documents({"delivery_id": "d3"}) == 1
+
+    # Tekrar tamamlamak (recover yarışı) audit kaydını çoğaltmaz
+    assert await DeliveryAcceptance._complete(delivery) is True
+    assert await db[COL_AUDIT_EVENTS].count_documents({"delivery_id": "d3"}) == 1
+
+
+async def test_recover_completes_flagged_delivery_after_grace(test_db):
+    now = now_utc()
+    await _flagged_delivery("d-old", "c4", now - timedelta(minutes=10))
+    await _flagged_delivery("d-new", "c4", now)
+
+    assert await DeliveryAcceptance.recover(older_than_seconds=60) == 1
+
+    assert "post_accept_pending" not in await db[COL_DELIVERIES].find_one({"id": "d-old"})
+    assert (await db[COL_DELIVERIES].find_one({"id": "d-new"}))["post_accept_pending"] is True
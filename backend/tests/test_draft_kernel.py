@@ -0,0 +1,131 @@
+"""
+Draft Kernel Differential Tests
+DraftKernel (NumPy) çıktısının DraftEngine._calculate_item ile birebir aynı
+olduğunu rastgele ve uç durum state'leri üzerinde doğrular.
+
+Run: cd /app/backend && python -m pytest tests/test_draft_kernel.py -q
+"""
+import random
+import sys
+from pathlib import Path
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services.seftali.core import get_route_info, SMA_WINDOW, WEEKDAY_CODES
+from services.seftali.draft_engine import DraftEngine
+from services.seftali.draft_kernel import DraftKernel
+
+TODAY = date(2025, 6, 18)
+PRODUCTS = {
+    "p-shelf": {"product_id": "p-shelf", "name": "Ayran 200 ML", "shelf_life_days": 21},
+    "p-short": {"product_id": "p-short", "name": "Yogurt 3 KG", "shelf_life_days": 2},
+    "p-none": {"product_id": "p-none", "name": "Peynir", "shelf_life_days": None},
+}
+PIDS = list(PRODUCTS) + ["p-missing"]
+
+
+def random_state(rng: random.Random) -> dict:
+    n_rates = rng.choice([0, 1, 2, 3, SMA_WINDOW - 1, SMA_WINDOW, SMA_WINDOW + 4])
+    rates = [round(rng.uniform(0, 40), 4) for _ in range(n_rates)]
+    if rates and rng.random() < 0.1:
+        rates[0] = 0.0
+    last_date = TODAY - timedelta(days=rng.randint(0, 60))
+    return {
+        "customer_id": "c1",
+        "product_id": rng.choice(PIDS),
+        "interval_rates": rates,
+        "rate_mt": rng.choice([None, None, 0.0, round(rng.uniform(0.01, 30), 4)]),
+        "weekly_multiplier": rng.choice([1.0, 0.85, 1.2]),
+        "prev_delivery_qty": rng.choice([None, rng.randint(1, 200)]),
+        "prev_delivery_date": rng.choice([None, (last_date - timedelta(days=7)).isoformat()]),
+        "last_delivery_qty": rng.choice([None, 0, rng.randint(1, 400), round(rng.uniform(0.5, 99), 2)]),
+        "last_delivery_date": rng.choice([None, last_date.isoformat(), last_date.isoformat() + "T08:30:00Z"]),
+        "delivery_count": rng.randint(0, 40),
+        "interval_count": rng.randint(0, 12),
+        "age_days": rng.randint(0, 800),
+    }
+
+
+def random_route_info(rng: random.Random) -> dict:
+    days = rng.sample(WEEKDAY_CODES, rng.randint(0, 3))
+    return get_route_info(days)
+
+
+def scalar_items(states, multipliers, route_infos):
+    return [
+        DraftEngine._calculate_item(s, PRODUCTS, multipliers, ri, TODAY)
+        for s, ri in zip(states, route_infos)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_kernel_matches_scalar_random(seed):
+    rng = random.Random(seed)
+    states = [random_state(rng) for _ in range(2000)]
+    route_infos = [random_route_info(rng) for _ in states]
+    multipliers = {"p-shelf": 1.15, "p-short": 0.0}
+
+    expected = scalar_items(states, multipliers, route_infos)
+    actual = DraftKernel.calculate_items(states, PRODUCTS, multipliers, route_infos, TODAY)
+
+    assert len(actual) == len(expected)
+    for exp, act in zip(expected, actual):
+        assert act == exp
+
+
+def test_kernel_single_route_info():
+    rng = random.Random(42)
+    states = [random_state(rng) for _ in range(200)]
+    route_info = get_route_info(["TUE", "SAT"])
+
+    expected = scalar_items(states, {}, [route_info] * len(states))
+    actual = DraftKernel.calculate_items(states, PRODUCTS, {}, route_info, TODAY)
+
+    assert actual == expected
+
+
+def test_kernel_edge_cases():
+    route_info = get_route_info(["MON"])
+    states = [
+        # Hiç veri yok
+        {"product_id": "p-shelf"},
+        # Sadece kayıtlı rate_mt
+        {"product_id": "p-shelf", "rate_mt": 5.0, "last_delivery_qty": 30, "delivery_count": 2},
+        # rate_mt = 0 -> rate_used None
+        {"product_id": "p-none", "rate_mt": 0.0, "interval_rates": [1.0, 2.0]},
+        # SKT riski (coverage > shelf_life / 2)
+        {"product_id": "p-short", "interval_rates": [10.0] * 10, "last_delivery_qty": 50,
+         "delivery_count": 12, "interval_count": 10, "age_days": 400},
+        # EPSILON altı rate
+        {"product_id": "p-shelf", "interval_rates": [1e-9], "last_delivery_qty": 10},
+    ]
+
+    expected = scalar_items(states, {}, [route_info] * len(states))
+    actual = DraftKernel.calculate_items(states, PRODUCTS, {}, route_info, TODAY)
+
+    assert actual == expected
+    assert actual[3]["flags"]["skt_risk"] is True
+    assert actual[3]["maturity_mode"] == "mature"
+
+
+def test_py_round_matches_builtin():
+    rng = random.Random(3)
+    values = [rng.uniform(-500, 500) for _ in range(20000)]
+    values += [0.125, 2.675, 1.005, -0.125, 0.5, 1e12 + 0.005]
+    values += [k / 1000 for k in range(-5000, 5000)]
+    arr = np.array(values + [float("nan")])
+
+    rounded = DraftKernel._py_round(arr, 2).tolist()
+
+    assert rounded[:-1] == [round(v, 2) for v in values]
+    assert rounded[-1] != rounded[-1]
+
+
+def test_kernel_empty():
+    assert DraftKernel.calculate_items([], PRODUCTS, {}, {}, TODAY) == []
@@ -0,0 +1,67 @@
+"""
+Draft Queue Tests
+Aynı müşteri için ardışık işaretlemelerin tek bir draft yenilemesine
+birleştirildiğini ve metriklerin güncellendiğini doğrular.
+
+Run: cd /app/backend && python -m pytest tests/test_draft_queue.py -q
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services.seftali.draft_engine import DraftEngine
+from services.seftali.draft_queue import DraftQueue
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    calls = []
+
+    async def fake_save_many(customer_ids, source="system", vectorized=False):
+        calls.append((source, sorted(customer_ids)))
+        return []
+
+    monkeypatch.setattr(DraftEngine, "save_many", fake_save_many)
+    monkeypatch.setattr(DraftQueue, "DEBOUNCE_SECONDS", 0.05)
+    monkeypatch.setattr(DraftQueue, "_pending", {})
+    monkeypatch.setattr(DraftQueue, "_stats", dict(DraftQueue._stats, processed=0, coalesced=0, marked=0))
+    return calls
+
+
+def test_coalesces_repeated_marks(saved):
+    async def run():
+        for _ in range(9):
+            DraftQueue.mark_dirty("c1", "delivery_event")
+        DraftQueue.mark_dirty("c2", "delivery_event")
+        assert DraftQueue.metrics()["depth"] == 2
+        await asyncio.sleep(0.2)
+        metrics = DraftQueue.metrics()
+        await DraftQueue.stop()
+        return metrics
+
+    metrics = asyncio.run(run())
+
+    assert saved == [("delivery_event", ["c1", "c2"])]
+    assert metrics["depth"] == 0
+    assert metrics["processed"] == 2
+    assert metrics["coalesced"] == 8
+    assert metrics["max_lag_ms"] >= 50
+
+
+def test_flush_groups_by_source(saved):
+    async def run():
+        DraftQueue.mark_dirty("c1", "delivery_accept")
+        DraftQueue.mark_dirty("c2", "stock_decl")
+        DraftQueue.mark_dirty("c1", "stock_decl")
+        processed = await DraftQueue.flush()
+        await DraftQueue.stop()
+        return processed
+
+    assert asyncio.run(run()) == 2
+    assert sorted(saved) == [("stock_decl", ["c1", "c2"])]
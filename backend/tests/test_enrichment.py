@@ -0,0 +1,102 @@
+"""
+LookupCache Tests
+Toplu isim zenginleştirmenin koleksiyon başına tek $in sorgusu yaptığını,
+tekrar eden ID'leri önbellekten verdiğini ve satırları doğru doldurduğunu
+doğrular.
+
+Run: cd /app/backend && python -m pytest tests/test_enrichment.py -q
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services.seftali.enrichment import LookupCache
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def find(self, query, projection):
+        (key, cond), = query.items()
+        self.calls.append(sorted(cond["$in"]))
+        fields = [f for f, v in projection.items() if v]
+        return _Cursor([
+            {f: d[f] for f in fields if f in d}
+            for d in self.docs if d.get(key) in cond["$in"]
+        ])
+
+
+class _Database(dict):
+    pass
+
+
+def _db():
+    return _Database(
+        sf_customers=_Collection([{"id": "c1", "name": "Market 1"}, {"id": "c2", "name": "Market 2"}]),
+        products=_Collection([{"id": "p1", "product_id": "p1", "name": "Ayran", "code": "AY"}]),
+    )
+
+
+def test_enrich_uses_one_query_per_collection():
+    database = _db()
+    rows = [{"customer_id": "c1"}, {"customer_id": "c2"}, {"customer_id": "c1"}, {"customer_id": "cX"}]
+
+    lookups = LookupCache(database)
+    asyncio.run(lookups.enrich(rows, "customer_id", "sf_customers", {"name": "customer_name"}))
+
+    assert [r.get("customer_name") for r in rows] == ["Market 1", "Market 2", "Market 1", None]
+    assert database["sf_customers"].calls == [["c1", "c2", "cX"]]
+
+
+def test_cache_is_reused_within_request():
+    database = _db()
+    lookups = LookupCache(database)
+
+    async def run():
+        await lookups.enrich([{"customer_id": "c1"}, {"customer_id": "cX"}], "customer_id",
+                             "sf_customers", {"name": "customer_name"})
+        rows = [{"customer_id": "c1"}, {"customer_id": "c2"}, {"customer_id": "cX"}]
+        await lookups.enrich(rows, "customer_id", "sf_customers", {"name": "customer_name"})
+        return rows
+
+    rows = asyncio.run(run())
+
+    assert rows[1]["customer_name"] == "Market 2"
+    # İkinci çağrı sadece önbellekte olmayan c2'yi sorgular
+    assert database["sf_customers"].calls == [["c1", "cX"], ["c2"]]
+    assert lookups.queries == 2
+
+
+def test_enrich_multiple_fields_with_default():
+    database = _db()
+    database["products"].docs.append({"product_id": "p2", "name": "Yogurt"})
+    rows = [{"product_id": "p1"}, {"product_id": "p2"}]
+
+    asyncio.run(LookupCache(database).enrich(
+        rows, "product_id", "products", {"name": "product_name", "code": "product_code"}, key="product_id"
+    ))
+
+    assert rows == [
+        {"product_id": "p1", "product_name": "Ayran", "product_code": "AY"},
+        {"product_id": "p2", "product_name": "Yogurt", "product_code": ""},
+    ]
@@ -0,0 +1,55 @@
+"""
+Invoice Date Normalization Tests
+Fatura tarihlerinin sıralanabilir "YYYY-MM-DD" formatına ve periyot
+anahtarlarına (yıl/ay, ISO yıl/hafta) çevrildiğini doğrular.
+
+Run: cd /app/backend && python -m pytest tests/test_invoice_dates.py -q
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from utils.helpers import normalize_invoice_date, invoice_date_period_keys
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("15 11 2024", "2024-11-15"),
+    ("5-3-2024", "2024-03-05"),
+    ("05/03/2024", "2024-03-05"),
+    ("05.03.2024", "2024-03-05"),
+    ("2024-03-05", "2024-03-05"),
+    (" 01 12 2023 ", "2023-12-01"),
+])
+def test_normalizes_supported_formats(raw, expected):
+    assert normalize_invoice_date(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["", "31 02 2024", "2024-13", None, "abc def ghi"])
+def test_invalid_dates_return_none(raw):
+    assert normalize_invoice_date(raw) is None
+
+
+def test_normalized_dates_sort_chronologically():
+    raw = ["01 02 2024", "15 11 2023", "2 1 2024"]
+    assert sorted(map(normalize_invoice_date, raw)) == ["2023-11-15", "2024-01-02", "2024-02-01"]
+
+
+@pytest.mark.parametrize("raw, iso_year, iso_week, year, month", [
+    ("30 12 2024", 2025, 1, 2024, 12),   # ISO 2025'in ilk haftası
+    ("01 01 2023", 2022, 52, 2023, 1),   # ISO 2022'nin son haftası
+    ("31-12-2020", 2020, 53, 2020, 12),  # 53 haftalı yıl
+    ("2024-06-15", 2024, 24, 2024, 6),
+])
+def test_period_keys_use_iso_week_year(raw, iso_year, iso_week, year, month):
+    keys = invoice_date_period_keys(raw)
+    assert (keys["iso_year"], keys["iso_week"]) == (iso_year, iso_week)
+    assert (keys["year"], keys["month"]) == (year, month)
+
+
+def test_period_keys_invalid_date():
+    assert invoice_date_period_keys("31 02 2024") is None
@@ -0,0 +1,150 @@
+"""
+Order Calculation Scale Tests
+20.000 rota müşterisiyle OrderService.calculate ve depo taslağının
+eksiksiz toplam ürettiğini (500 satır kesmesi olmadan) ve ara bellek
+kullanımının müşteri sayısıyla büyümediğini doğrular.
+
+Gerçek MongoDB gerektirir (MONGO_URL / DB_NAME). Veriler DB_NAME yerine
+çalışma başına açılan geçici bir veritabanına yazılır ve sonunda silinir;
+servislerin modül düzeyindeki db referansları bu veritabanına yönlendirilir.
+
+Run: cd /app/backend && python -m pytest tests/test_order_scale.py -q
+"""
+import sys
+import tracemalloc
+import uuid
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from config.database import Database
+from config.settings import settings
+from services.seftali import order_service, product_catalog
+from services.seftali.core import (
+    now_utc, to_iso, COL_CUSTOMERS, COL_ORDERS, COL_SYSTEM_DRAFTS, COL_PRODUCTS
+)
+from services.seftali.order_service import OrderService
+from services.seftali.product_catalog import ProductCatalog
+from routes.seftali import sales_routes
+from routes.seftali.sales_routes import get_warehouse_draft
+
+CUSTOMER_COUNT = 20_000
+ROUTE_DAY = "SUN"
+RUN = uuid.uuid4().hex[:8]
+SP = f"scale-sp-{RUN}"
+P_UNIT = f"scale-p-unit-{RUN}"
+P_CASE = f"scale-p-case-{RUN}"
+SCALE_DB_NAME = f"{settings.DB_NAME}_scale_{RUN}"
+db = Database.get_client()[SCALE_DB_NAME]
+
+
+async def _seed(count: int, salesperson_id: str) -> None:
+    now = to_iso(now_utc())
+    customers, orders, drafts = [], [], []
+    for i in range(count):
+        cid = f"{salesperson_id}-c{i}"
+        customers.append({
+            "id": cid, "name": f"Scale {i}", "salesperson_id": salesperson_id,
+            "is_active": True, "route_plan": {"days": [ROUTE_DAY]},
+        })
+        if i % 2 == 0:
+            orders.append({
+                "id": f"{cid}-o", "customer_id": cid, "status": "submitted", "created_at": now,
+                "items": [{"product_id": P_UNIT, "qty": 2}, {"product_id": P_CASE, "qty": 1}],
+            })
+        else:
+            drafts.append({
+                "customer_id": cid,
+                "items": [{"product_id": P_UNIT, "suggested_qty": 3}],
+            })
+    await db[COL_CUSTOMERS].insert_many(customers)
+    await db[COL_ORDERS].insert_many(orders)
+    await db[COL_SYSTEM_DRAFTS].insert_many(drafts)
+
+
+async def _cleanup(salesperson_id: str) -> None:
+    prefix = {"$regex": f"^{salesperson_id}-"}
+    await db[COL_CUSTOMERS].delete_many({"salesperson_id": salesperson_id})
+    await db[COL_ORDERS].delete_many({"customer_id": prefix})
+    await db[COL_SYSTEM_DRAFTS].delete_many({"customer_id": prefix})
+
+
+@pytest.fixture(scope="module")
+async def seeded():
+    try:
+        await db.command("ping")
+    except Exception as exc:
+        pytest.skip(f"MongoDB erişilemiyor: {exc}")
+
+    with pytest.MonkeyPatch.context() as mp:
+        for module in (order_service, product_catalog, sales_routes):
+            mp.setattr(module, "db", db)
+        ProductCatalog.invalidate()
+        try:
+            await db[COL_PRODUCTS].insert_many([
+                {"product_id": P_UNIT, "name": "Scale Tekli", "case_size": 1},
+                {"product_id": P_CASE, "name": "Scale Koli", "case_size": 6, "case_name": "Koli"},
+            ])
+            await _seed(CUSTOMER_COUNT, SP)
+            yield
+        finally:
+            ProductCatalog.invalidate()
+            await Database.get_client().drop_database(SCALE_DB_NAME)
+
+
+@pytest.mark.parametrize("engine", OrderService.ENGINES)
+async def test_order_calculation_totals(seeded, engine):
+    result = await OrderService.calculate(SP, ROUTE_DAY, engine=engine)
+
+    half = CUSTOMER_COUNT // 2
+    summary = result["summary"]
+    assert summary["total_customers"] == CUSTOMER_COUNT
+    assert summary["customers_with_orders"] == half
+    assert summary["customers_with_drafts"] == half
+    assert len(result["customers"]) == CUSTOMER_COUNT
+
+    unit = result["totals"][P_UNIT]
+    assert unit["orders_qty"] == 2 * half
+    assert unit["drafts_qty"] == 3 * half
+    assert unit["to_order"] == 5 * half
+
+    case = result["totals"][P_CASE]
+    assert case["orders_qty"] == half
+    assert case["cases_needed"] == -(-half // 6)
+    assert case["to_order"] == case["cases_needed"] * 6
+
+
+async def test_order_calculation_memory_is_flat(seeded):
+    """Ara bellek (peak - sonuç) 5k ve 20k müşteride aynı mertebede kalmalı."""
+    small_sp = f"{SP}-small"
+    await _seed(CUSTOMER_COUNT // 4, small_sp)
+    try:
+        overheads = []
+        for sp in (small_sp, SP):
+            tracemalloc.start()
+            result = await OrderService.calculate(sp, ROUTE_DAY)
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert result["summary"]["total_customers"] > 0
+            overheads.append(peak - retained)
+    finally:
+        await _cleanup(small_sp)
+
+    small, large = overheads
+    assert large < small * 2, f"Ara bellek müşteri sayısıyla büyüyor: {small} -> {large}"
+
+
+async def test_warehouse_draft_totals(seeded):
+    resp = await get_warehouse_draft(route_day=ROUTE_DAY, current_user=None)
+    items = {it["product_id"]: it for it in resp["data"]["order_items"]}
+
+    half = CUSTOMER_COUNT // 2
+    assert items[P_UNIT]["order_qty"] == 2 * half
+    assert items[P_UNIT]["draft_qty"] == 3 * half
+    assert items[P_CASE]["order_qty"] == half
+    ours = [c for c in resp["data"]["customers"] if c["customer_id"].startswith(SP)]
+    assert len(ours) == CUSTOMER_COUNT
@@ -0,0 +1,104 @@
+"""
+ProductCatalog Tests
+Ürün kataloğu önbelleğinin tek yükleme ile tüm indeksleri doldurduğunu,
+TTL / invalidate sonrası yeniden yüklediğini ve hit / miss sayaçlarını
+doğru tuttuğunu doğrular.
+
+Run: cd /app/backend && python -m pytest tests/test_product_catalog.py -q
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services.seftali import product_catalog
+from services.seftali.product_catalog import ProductCatalog
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = 0
+
+    def find(self, query, projection):
+        self.finds += 1
+        return _Cursor([dict(d) for d in self.docs])
+
+
+@pytest.fixture
+def products(monkeypatch):
+    collection = _Collection([
+        {"product_id": "p1", "name": "Ayran", "code": "AY"},
+        {"id": "legacy-1", "sku": "SUT001", "name": "Süt"},
+    ])
+    monkeypatch.setattr(product_catalog, "db", {"products": collection})
+    monkeypatch.setattr(ProductCatalog, "_stats", {"hits": 0, "misses": 0, "loads": 0, "invalidations": 0})
+    ProductCatalog.invalidate()
+    yield collection
+    ProductCatalog.invalidate()
+
+
+def test_single_load_serves_all_indexes(products):
+    async def run():
+        return (
+            await ProductCatalog.get("p1"),
+            await ProductCatalog.get("AY", key="code"),
+            await ProductCatalog.get_many(["legacy-1", "missing"], key="id"),
+            await ProductCatalog.get("SUT001", key="sku"),
+        )
+
+    by_pid, by_code, by_id, by_sku = asyncio.run(run())
+
+    assert by_pid["name"] == by_code["name"] == "Ayran"
+    assert list(by_id) == ["legacy-1"]
+    assert by_sku["name"] == "Süt"
+    assert products.finds == 1
+    metrics = ProductCatalog.metrics()
+    assert (metrics["misses"], metrics["hits"], metrics["loads"]) == (1, 3, 1)
+
+
+def test_invalidate_and_ttl_reload(products, monkeypatch):
+    asyncio.run(ProductCatalog.get("p1"))
+    products.docs[0]["name"] = "Ayran 1L"
+
+    # Geçersiz kılınmadan eski değer döner
+    assert asyncio.run(ProductCatalog.get("p1"))["name"] == "Ayran"
+
+    ProductCatalog.invalidate()
+    assert asyncio.run(ProductCatalog.get("p1"))["name"] == "Ayran 1L"
+    assert products.finds == 2
+
+    monkeypatch.setattr(ProductCatalog, "TTL_SECONDS", 0)
+    asyncio.run(ProductCatalog.all())
+    assert products.finds == 3
+
+
+def test_returned_documents_are_copies(products):
+    product = asyncio.run(ProductCatalog.get("p1"))
+    product["name"] = "değişti"
+
+    assert asyncio.run(ProductCatalog.get("p1"))["name"] == "Ayran"
+
+
+def test_unknown_key_rejected(products):
+    with pytest.raises(ValueError):
+        asyncio.run(ProductCatalog.get("x", key="barcode"))
@@ -0,0 +1,60 @@
+"""
+Route Info Lookup Tests
+Önceden hesaplanmış rota tablosunun doğrudan hesaplamayla aynı olduğunu ve
+get_route_info sarmalayıcısının bugüne göre çalıştığını doğrular.
+
+Run: cd /app/backend && python -m pytest tests/test_route_info.py -q
+"""
+import itertools
+import sys
+from pathlib import Path
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from services.seftali import core
+from services.seftali.core import lookup_route_info, get_route_info, DAY_MAP, WEEKDAY_CODES
+
+MONDAY = date(2025, 6, 16)
+
+
+@pytest.mark.parametrize("weekday", range(7))
+def test_table_matches_direct_calculation(weekday):
+    today = MONDAY + timedelta(days=weekday)
+    for r in range(len(WEEKDAY_CODES) + 1):
+        for days in itertools.combinations(WEEKDAY_CODES, r):
+            expected = core._compute_route_info(sorted(DAY_MAP[d] for d in days), weekday)
+            assert dict(lookup_route_info(list(days), today)) == expected
+
+
+def test_known_values():
+    # Çarşamba, rota Salı + Cumartesi
+    info = lookup_route_info(["TUE", "SAT"], date(2025, 6, 18))
+    assert dict(info) == {"days_to_next_route": 3, "supply_days": 3, "next_route_weekday": 5}
+
+    # Rota günü bugünse sonraki hafta sayılır
+    assert lookup_route_info(["WED"], date(2025, 6, 18))["days_to_next_route"] == 7
+
+    # Rota yok
+    assert dict(lookup_route_info([], MONDAY)) == {
+        "days_to_next_route": 7, "supply_days": 7, "next_route_weekday": None
+    }
+
+
+def test_order_and_duplicates_do_not_matter():
+    assert lookup_route_info(["SAT", "TUE", "TUE"], MONDAY) is lookup_route_info(["TUE", "SAT"], MONDAY)
+
+
+def test_result_is_frozen():
+    with pytest.raises(TypeError):
+        lookup_route_info(["MON"], MONDAY)["supply_days"] = 1
+
+
+def test_wrapper_uses_today(monkeypatch):
+    from datetime import datetime, timezone
+    monkeypatch.setattr(core, "now_utc", lambda: datetime(2025, 6, 18, 10, tzinfo=timezone.utc))
+    assert get_route_info(["TUE", "SAT"]) is lookup_route_info(["TUE", "SAT"], date(2025, 6, 18))
@@ -0,0 +1,64 @@
+"""
+UserCache Tests
+Kimlik doğrulama kullanıcı önbelleğinin (kullanıcı id, token iat) anahtarıyla
+çalıştığını, LRU sınırını, TTL'i ve kullanıcı bazlı invalidate'i doğrular.
+
+Run: cd /app/backend && python -m pytest tests/test_user_cache.py -q
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+from utils import user_cache as user_cache_module
+from utils.user_cache import UserCache
+
+
+def test_keyed_by_user_and_iat():
+    cache = UserCache(max_size=10, ttl_seconds=60)
+    cache.put("u1", 100, "user-1")
+
+    assert cache.get("u1", 100) == "user-1"
+    assert cache.get("u1", 200) is None
+    assert cache.metrics()["hits"] == 1
+    assert cache.metrics()["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = UserCache(max_size=2, ttl_seconds=60)
+    cache.put("u1", 1, "a")
+    cache.put("u2", 1, "b")
+    cache.get("u1", 1)          # u1 en son kullanılan
+    cache.put("u3", 1, "c")
+
+    assert cache.get("u2", 1) is None
+    assert cache.get("u1", 1) == "a"
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(user_cache_module, "monotonic", lambda: clock[0])
+    cache = UserCache(max_size=10, ttl_seconds=30)
+    cache.put("u1", 1, "a")
+
+    clock[0] += 29
+    assert cache.get("u1", 1) == "a"
+    clock[0] += 2
+    assert cache.get("u1", 1) is None
+    assert cache.metrics()["size"] == 0
+
+
+def test_invalidate_drops_all_tokens_of_user():
+    cache = UserCache(max_size=10, ttl_seconds=60)
+    cache.put("u1", 1, "a")
+    cache.put("u1", 2, "a")
+    cache.put("u2", 1, "b")
+
+    cache.invalidate("u1")
+
+    assert cache.get("u1", 1) is None
+    assert cache.get("u1", 2) is None
+    assert cache.get("u2", 1) == "b"
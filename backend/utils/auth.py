@@ -3,9 +3,13 @@ import jwt
 from datetime import datetime, timezone, timedelta
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import List
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.settings import settings
+from config.database import db
+from utils.user_cache import user_cache
 
 # Security setup
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -14,11 +18,6 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
-# MongoDB
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
 # Import User model
 try:
     from models.user import User, UserRole
@@ -45,13 +44,44 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# bcrypt (~250 ms CPU) event loop'u bloklamasın diye async handler'larda
+# ayrılmış, sınırlı bir thread havuzunda çalıştırılır. Havuz doluyken gelen
+# istekler kuyrukta bekler; eşzamanlı hash sayısı PASSWORD_HASH_WORKERS ile sınırlı.
+_password_pool: Optional[ThreadPoolExecutor] = None
+
+def _get_password_pool() -> ThreadPoolExecutor:
+    global _password_pool
+    if _password_pool is None:
+        _password_pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.PASSWORD_HASH_WORKERS),
+            thread_name_prefix="password-hash"
+        )
+    return _password_pool
+
+async def hash_password_async(password: str) -> str:
+    """hash_password'ü parola havuzunda çalıştır"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_pool(), hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password'ü parola havuzunda çalıştır"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_pool(), verify_password, plain_password, hashed_password)
+
+def shutdown_password_pool() -> None:
+    """Parola havuzunu kapat (uygulama kapanışında)"""
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=True)
+        _password_pool = None
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -66,6 +96,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
+    # Aynı token ile gelen istekler önbellekteki kullanıcıyı kullanır
+    iat = payload.get("iat")
+    cached = user_cache.get(user_id, iat)
+    if cached is not None:
+        return cached
+    
     user_doc = await db.users.find_one({"id": user_id}, {"_id": 0})
     if user_doc is None:
         raise HTTPException(status_code=401, detail="User not found")
@@ -77,10 +113,13 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     # Import User class dynamically
     try:
         from models.user import User as UserModel
-        return UserModel(**user_doc)
+        user = UserModel(**user_doc)
     except:
         # Return dict if model not available
-        return user_doc
+        user = user_doc
+    
+    user_cache.put(user_id, iat, user)
+    return user
 
 def require_role(allowed_roles: List[UserRole]):
     """Role-based access control"""
@@ -6,6 +6,7 @@ DRY (Don't Repeat Yourself) prensibine uygun kod yazımı için.
 """
 
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, Any, List
 import uuid
 
@@ -24,6 +25,47 @@ def get_iso_timestamp() -> str:
     return get_current_utc_time().isoformat()
 
 
+def normalize_invoice_date(date_str: Optional[str]) -> Optional[str]:
+    """
+    Fatura tarihini sıralanabilir "YYYY-MM-DD" formatına çevirir.
+    Desteklenen girdiler: "DD MM YYYY", "DD-MM-YYYY", "DD/MM/YYYY",
+    "DD.MM.YYYY", "YYYY-MM-DD" ve "YYYY MM DD". Çözülemezse None.
+    """
+    if not isinstance(date_str, str):
+        return None
+    parts = date_str.strip().replace("-", " ").replace("/", " ").replace(".", " ").split()
+    if len(parts) != 3:
+        return None
+    try:
+        if len(parts[0]) == 4:
+            year, month, day = parts
+        else:
+            day, month, year = parts
+        return datetime(int(year), int(month), int(day)).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def _date_period_keys(date_iso: str) -> tuple:
+    date = datetime.strptime(date_iso, "%Y-%m-%d")
+    iso_year, iso_week, _ = date.isocalendar()
+    return date.year, date.month, iso_year, iso_week
+
+
+def invoice_date_period_keys(date_str: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Fatura tarihinden periyot anahtarları: "YYYY-MM-DD", (yıl, ay) ve
+    ISO (yıl, hafta). Hafta yılı ISO yılıdır (ör. 30 12 2024 -> 2025/1).
+    Aynı tarihler tekrar tekrar çözülmez. Çözülemezse None.
+    """
+    date_iso = normalize_invoice_date(date_str)
+    if not date_iso:
+        return None
+    year, month, iso_year, iso_week = _date_period_keys(date_iso)
+    return {"date_iso": date_iso, "year": year, "month": month, "iso_year": iso_year, "iso_week": iso_week}
+
+
 def generate_uuid() -> str:
     """Benzersiz UUID üretir."""
     return str(uuid.uuid4())
@@ -0,0 +1,82 @@
+"""
+Authenticated User Cache
+========================
+JWT doğrulamasından sonra kullanıcı dokümanını her istekte veritabanından
+okumak yerine süreç içi, sınırlı boyutlu LRU/TTL önbellekte tutar.
+
+Anahtar (kullanıcı id, token iat) ikilisidir; aynı token ile gelen istekler
+hazır User nesnesini alır. Kullanıcı güncellendiğinde / pasife alındığında /
+silindiğinde invalidate(user_id) o kullanıcının tüm girdilerini siler.
+
+Kullanım:
+    user = user_cache.get(user_id, iat)
+    if user is None:
+        user = ...                      # veritabanından oku
+        user_cache.put(user_id, iat, user)
+    user_cache.invalidate(user_id)      # kullanıcı yazımlarından sonra
+"""
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import settings
+
+
+class UserCache:
+    """Sınırlı boyutlu LRU + TTL kullanıcı önbelleği."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, Any], Tuple[float, Any]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, user_id: str, iat: Any) -> Optional[Any]:
+        """Önbellekteki kullanıcıyı getir (yoksa veya süresi dolmuşsa None)."""
+        key = (user_id, iat)
+        entry = self._entries.get(key)
+        if entry is None or monotonic() - entry[0] >= self.ttl_seconds:
+            if entry is not None:
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry[1]
+
+    def put(self, user_id: str, iat: Any, user: Any) -> None:
+        """Kullanıcıyı önbelleğe ekle; boyut aşılırsa en eski girdiyi at."""
+        if self.max_size <= 0:
+            return
+        key = (user_id, iat)
+        self._entries[key] = (monotonic(), user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Kullanıcının tüm token girdilerini (None ise tüm önbelleği) sil."""
+        self._stats["invalidations"] += 1
+        if user_id is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == user_id]:
+            del self._entries[key]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Önbellek boyutu ve hit / miss sayaçları."""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            **self._stats,
+            "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else None,
+        }
+
+
+# utils.auth ve middleware.auth aynı örneği paylaşır
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
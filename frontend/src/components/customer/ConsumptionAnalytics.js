@@ -32,8 +32,8 @@ const ConsumptionAnalytics = () => {
       items.sort((a, b) => b.avg_daily - a.avg_daily);
       setSummary(items);
 
-      // Load all daily data for monthly aggregation
-      const params = {};
+      // Monthly totals (all products), grouped on the server
+      const params = { bucket: 'month' };
       if (period === '3m') {
         const d = new Date(); d.setMonth(d.getMonth() - 3);
         params.date_from = d.toISOString().slice(0, 10);
@@ -46,22 +46,15 @@ const ConsumptionAnalytics = () => {
       }
 
       const dailyRes = await sfCustomerAPI.getDailyConsumption(params);
-      const raw = dailyRes.data?.data || [];
-
-      // Aggregate by month for the line chart (sum all products per month)
-      const byMonth = {};
-      raw.forEach(r => {
-        const month = r.date.slice(0, 7); // YYYY-MM
-        if (!byMonth[month]) byMonth[month] = 0;
-        byMonth[month] += r.consumption;
-      });
-      const monthArr = Object.entries(byMonth)
-        .sort(([a], [b]) => a.localeCompare(b))
-        .map(([m, total]) => ({
+      const points = dailyRes.data?.data?.points || [];
+      const monthArr = points.map(p => {
+        const m = p.date.slice(0, 7); // YYYY-MM
+        return {
           month: m,
           label: formatMonth(m),
-          total: Math.round(total),
-        }));
+          total: Math.round(p.total),
+        };
+      });
       setMonthlyData(monthArr);
     } catch (err) {
       console.error('Consumption data load error', err);
@@ -77,7 +70,8 @@ const ConsumptionAnalytics = () => {
     if (!selectedProduct) { setDailyData([]); return; }
     const load = async () => {
       try {
-        const params = { product_id: selectedProduct.product_id };
+        // Weekly buckets (Monday start), grouped on the server
+        const params = { product_id: selectedProduct.product_id, bucket: 'week' };
         if (period === '3m') {
           const d = new Date(); d.setMonth(d.getMonth() - 3);
           params.date_from = d.toISOString().slice(0, 10);
@@ -89,26 +83,13 @@ const ConsumptionAnalytics = () => {
           params.date_from = d.toISOString().slice(0, 10);
         }
         const res = await sfCustomerAPI.getDailyConsumption(params);
-        const raw = res.data?.data || [];
-        // Aggregate by week for readability
-        const byWeek = {};
-        raw.forEach(r => {
-          const d = new Date(r.date);
-          const weekStart = new Date(d);
-          weekStart.setDate(d.getDate() - d.getDay() + 1);
-          const key = weekStart.toISOString().slice(0, 10);
-          if (!byWeek[key]) byWeek[key] = { total: 0, count: 0 };
-          byWeek[key].total += r.consumption;
-          byWeek[key].count++;
-        });
-        const weekArr = Object.entries(byWeek)
-          .sort(([a], [b]) => a.localeCompare(b))
-          .map(([w, v]) => ({
-            week: w,
-            label: w.slice(5),
-            avg: Math.round((v.total / v.count) * 100) / 100,
-            total: Math.round(v.total * 100) / 100,
-          }));
+        const points = res.data?.data?.points || [];
+        const weekArr = points.map(p => ({
+          week: p.date,
+          label: p.date.slice(5),
+          avg: Math.round(p.avg * 100) / 100,
+          total: Math.round(p.total * 100) / 100,
+        }));
         setDailyData(weekArr);
       } catch (err) {
         console.error(err);